@@ -20,6 +20,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from arbitrage_os.db.models import Base
+from arbitrage_os.db import scraping_source, scraped_page, analysis_cache, geocode_cache, distance_cache, image_analysis_cache  # noqa: F401 - register tables
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
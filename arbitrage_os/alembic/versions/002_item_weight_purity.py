@@ -0,0 +1,28 @@
+"""Add weight_grams and purity to items for batch re-valuation
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('items', sa.Column('weight_grams', sa.Float(), nullable=True))
+    op.add_column('items', sa.Column('purity', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('items', 'purity')
+    op.drop_column('items', 'weight_grams')
@@ -0,0 +1,45 @@
+"""Add scraped_pages conditional-GET cache and items.content_hash
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scraped_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('last_modified', sa.String(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('last_fetched', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scraped_pages_id'), 'scraped_pages', ['id'], unique=False)
+    op.create_index(op.f('ix_scraped_pages_url'), 'scraped_pages', ['url'], unique=True)
+
+    op.add_column('items', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('items', 'content_hash')
+
+    op.drop_index(op.f('ix_scraped_pages_url'), table_name='scraped_pages')
+    op.drop_index(op.f('ix_scraped_pages_id'), table_name='scraped_pages')
+    op.drop_table('scraped_pages')
@@ -0,0 +1,44 @@
+"""Add analysis_cache table for LLM analysis results
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analysis_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('prompt_version', sa.String(), nullable=False),
+        sa.Column('result', sa.Text(), nullable=False),
+        sa.Column('latency_ms', sa.Float(), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('stored_at', sa.DateTime(), nullable=False),
+        sa.Column('last_accessed', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_cache_id'), 'analysis_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_analysis_cache_cache_key'), 'analysis_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_analysis_cache_last_accessed'), 'analysis_cache', ['last_accessed'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analysis_cache_last_accessed'), table_name='analysis_cache')
+    op.drop_index(op.f('ix_analysis_cache_cache_key'), table_name='analysis_cache')
+    op.drop_index(op.f('ix_analysis_cache_id'), table_name='analysis_cache')
+    op.drop_table('analysis_cache')
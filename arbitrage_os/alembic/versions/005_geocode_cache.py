@@ -0,0 +1,41 @@
+"""Add geocode_cache table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'geocode_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('address_key', sa.String(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('formatted_address', sa.String(), nullable=True),
+        sa.Column('found', sa.Boolean(), nullable=True),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('stored_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_geocode_cache_id'), 'geocode_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_geocode_cache_address_key'), 'geocode_cache', ['address_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_geocode_cache_address_key'), table_name='geocode_cache')
+    op.drop_index(op.f('ix_geocode_cache_id'), table_name='geocode_cache')
+    op.drop_table('geocode_cache')
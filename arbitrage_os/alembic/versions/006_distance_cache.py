@@ -0,0 +1,43 @@
+"""Add distance_cache table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'distance_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('origin_key', sa.String(), nullable=False),
+        sa.Column('destination_key', sa.String(), nullable=False),
+        sa.Column('distance_m', sa.Float(), nullable=True),
+        sa.Column('duration_s', sa.Float(), nullable=True),
+        sa.Column('stored_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source', 'origin_key', 'destination_key', name='uq_distance_cache_pair')
+    )
+    op.create_index(op.f('ix_distance_cache_id'), 'distance_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_distance_cache_origin_key'), 'distance_cache', ['origin_key'], unique=False)
+    op.create_index(op.f('ix_distance_cache_destination_key'), 'distance_cache', ['destination_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_distance_cache_destination_key'), table_name='distance_cache')
+    op.drop_index(op.f('ix_distance_cache_origin_key'), table_name='distance_cache')
+    op.drop_index(op.f('ix_distance_cache_id'), table_name='distance_cache')
+    op.drop_table('distance_cache')
@@ -0,0 +1,54 @@
+"""Add indexed geohash to items for spatial queries
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from arbitrage_os.logistics.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column('items', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index(op.f('ix_items_geohash'), 'items', ['geohash'], unique=False)
+
+    # Backfill already geocoded items in keyset batches.
+    items = sa.table(
+        'items', sa.column('id', sa.Integer), sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float), sa.column('geohash', sa.String),
+    )
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(items.c.id, items.c.latitude, items.c.longitude)
+            .where(items.c.id > last_id, items.c.latitude.isnot(None), items.c.longitude.isnot(None))
+            .order_by(items.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            items.update().where(items.c.id == sa.bindparam('item_id')).values(geohash=sa.bindparam('hash')),
+            [{'item_id': row.id, 'hash': encode(row.latitude, row.longitude)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_items_geohash'), table_name='items')
+    op.drop_column('items', 'geohash')
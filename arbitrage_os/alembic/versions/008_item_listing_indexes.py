@@ -0,0 +1,30 @@
+"""Add keyset pagination indexes for the item listing
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination skips rows without a creation time.
+    op.execute(sa.text("UPDATE items SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+    op.create_index('ix_items_created_at_id', 'items', ['created_at', 'id'], unique=False)
+    op.create_index('ix_items_status_created_at_id', 'items', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_status_created_at_id', table_name='items')
+    op.drop_index('ix_items_created_at_id', table_name='items')
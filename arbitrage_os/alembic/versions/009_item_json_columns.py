@@ -0,0 +1,166 @@
+"""Store item JSON documents as JSONB with indexed hot fields
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import json
+import math
+from typing import Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_COLUMNS = ('image_urls', 'image_analysis_results', 'roi_analysis')
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _finite(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    return value
+
+
+def top_hallmark(image_analysis_results) -> Tuple[Optional[str], Optional[float]]:
+    # The most confident Ximilar label across an item's images, as computed when this
+    # revision was written.
+    best_name, best_prob = None, None
+    for entry in image_analysis_results or []:
+        analysis = entry.get('analysis') if isinstance(entry, dict) else None
+        records = analysis.get('records', []) if isinstance(analysis, dict) else []
+        for record in records:
+            labels = list(record.get('best_labels') or []) + list(record.get('labels') or [])
+            if record.get('best_label'):
+                labels.append(record['best_label'])
+            for label in labels:
+                prob = label.get('prob')
+                if label.get('name') and prob is not None and (best_prob is None or prob > best_prob):
+                    best_name, best_prob = label['name'], float(prob)
+    return best_name, best_prob
+
+
+def replace_non_finite_numbers(connection, column: str, postgres: bool) -> None:
+    """
+    Rewrites the Infinity and NaN numbers of a JSON text column as null. Rows are parsed,
+    so strings that merely contain "Infinity" or "NaN" are left untouched.
+    """
+    items = sa.table('items', sa.column('id', sa.Integer), sa.column(column, sa.Text))
+    text = items.c[column]
+    if postgres:
+        candidates = text.op('~')('\\m(Infinity|NaN)\\M')
+    else:
+        candidates = sa.or_(text.like('%Infinity%'), text.like('%NaN%'))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(items.c.id, text)
+            .where(items.c.id > last_id, candidates)
+            .order_by(items.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for item_id, document in rows:
+            try:
+                value = json.loads(document)
+            except ValueError:
+                continue
+            cleaned = json.dumps(_finite(value))
+            if cleaned != json.dumps(value):
+                updates.append({'item_id': item_id, 'document': cleaned})
+        if updates:
+            connection.execute(
+                items.update().where(items.c.id == sa.bindparam('item_id')).values({column: sa.bindparam('document')}),
+                updates,
+            )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    postgres = connection.dialect.name == 'postgresql'
+
+    # json.dumps wrote Infinity and NaN (e.g. the ROI of an item without a purchase price), which JSON rejects.
+    for column in ('image_analysis_results', 'roi_analysis'):
+        replace_non_finite_numbers(connection, column, postgres)
+
+    if postgres:
+        for column in JSON_COLUMNS:
+            op.alter_column(
+                'items', column, type_=postgresql.JSONB(), existing_type=sa.Text(),
+                postgresql_using=f'{column}::jsonb',
+            )
+    # SQLite keeps the JSON text as it is.
+
+    # Postgres only supports stored generated columns, SQLite can only add virtual ones.
+    roi_analysis = sa.table('items', sa.column('roi_analysis', sa.JSON())).c.roi_analysis
+    for column in ('roi_percent', 'max_buy_price'):
+        op.add_column('items', sa.Column(
+            column, sa.Float(), sa.Computed(roi_analysis[column].as_float(), persisted=postgres), nullable=True,
+        ))
+    op.add_column('items', sa.Column('hallmark_label', sa.String(), nullable=True))
+    op.add_column('items', sa.Column('hallmark_confidence', sa.Float(), nullable=True))
+    op.create_index(op.f('ix_items_hallmark_label'), 'items', ['hallmark_label'], unique=False)
+    op.create_index('ix_items_roi_percent_id', 'items', ['roi_percent', 'id'], unique=False)
+    op.create_index('ix_items_max_buy_price_id', 'items', ['max_buy_price', 'id'], unique=False)
+    op.create_index('ix_items_hallmark_confidence_id', 'items', ['hallmark_confidence', 'id'], unique=False)
+
+    # Backfill the top hallmark of already analyzed items in keyset batches.
+    items = sa.table(
+        'items', sa.column('id', sa.Integer), sa.column('image_analysis_results', sa.JSON()),
+        sa.column('hallmark_label', sa.String), sa.column('hallmark_confidence', sa.Float),
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(items.c.id, items.c.image_analysis_results)
+            .where(items.c.id > last_id, items.c.image_analysis_results.isnot(None))
+            .order_by(items.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        hallmarks = [(row.id, top_hallmark(row.image_analysis_results)) for row in rows]
+        updates = [
+            {'item_id': item_id, 'label': label, 'confidence': confidence}
+            for item_id, (label, confidence) in hallmarks
+            if label is not None
+        ]
+        if updates:
+            connection.execute(
+                items.update().where(items.c.id == sa.bindparam('item_id'))
+                .values(hallmark_label=sa.bindparam('label'), hallmark_confidence=sa.bindparam('confidence')),
+                updates,
+            )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_hallmark_confidence_id', table_name='items')
+    op.drop_index('ix_items_max_buy_price_id', table_name='items')
+    op.drop_index('ix_items_roi_percent_id', table_name='items')
+    op.drop_index(op.f('ix_items_hallmark_label'), table_name='items')
+    op.drop_column('items', 'hallmark_confidence')
+    op.drop_column('items', 'hallmark_label')
+    op.drop_column('items', 'max_buy_price')
+    op.drop_column('items', 'roi_percent')
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in JSON_COLUMNS:
+            op.alter_column(
+                'items', column, type_=sa.Text(), existing_type=postgresql.JSONB(),
+                postgresql_using=f'{column}::text',
+            )
@@ -0,0 +1,50 @@
+"""Add image_analysis_cache table
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'image_analysis_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('dhash', sa.String(length=16), nullable=True),
+        sa.Column('band0', sa.Integer(), nullable=True),
+        sa.Column('band1', sa.Integer(), nullable=True),
+        sa.Column('band2', sa.Integer(), nullable=True),
+        sa.Column('band3', sa.Integer(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('stored_at', sa.DateTime(), nullable=False),
+        sa.Column('last_accessed', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('task_id', 'content_hash', name='uq_image_analysis_cache_image')
+    )
+    op.create_index(op.f('ix_image_analysis_cache_id'), 'image_analysis_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_image_analysis_cache_content_hash'), 'image_analysis_cache', ['content_hash'], unique=False)
+    for band in range(4):
+        op.create_index(op.f(f'ix_image_analysis_cache_band{band}'), 'image_analysis_cache', [f'band{band}'], unique=False)
+
+
+def downgrade() -> None:
+    for band in reversed(range(4)):
+        op.drop_index(op.f(f'ix_image_analysis_cache_band{band}'), table_name='image_analysis_cache')
+    op.drop_index(op.f('ix_image_analysis_cache_content_hash'), table_name='image_analysis_cache')
+    op.drop_index(op.f('ix_image_analysis_cache_id'), table_name='image_analysis_cache')
+    op.drop_table('image_analysis_cache')
@@ -1,13 +1,16 @@
+import asyncio
 import logging
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from arbitrage_os.api.discovery import run_discovery
-from arbitrage_os.db.database import SessionLocal
+from arbitrage_os.api.discovery import create_pending_item, dispatch_discovery_batch
+from arbitrage_os.db.database import AsyncSessionLocal, SessionLocal
 from arbitrage_os.db.scraping_source import ScrapingSource as ScrapingSourceModel
 
 logger = logging.getLogger(__name__)
@@ -21,6 +24,11 @@ def get_db():
     finally:
         db.close()
 
+# Dependency for async endpoints, so database I/O does not block the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 class ScrapingSourceCreate(BaseModel):
     url: str
     name: Optional[str] = None
@@ -38,28 +46,35 @@ def add_scraping_source(source: ScrapingSourceCreate, db: Session = Depends(get_
     return db_source
 
 @router.post("/run_scheduled_scrape/")
-async def run_scheduled_scrape(db: Session = Depends(get_db)):
+async def run_scheduled_scrape(db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint to run a scheduled scrape for all active sources.
     """
-    sources = db.query(ScrapingSourceModel).filter(ScrapingSourceModel.is_active == True).all()
+    sources = (await db.execute(
+        select(ScrapingSourceModel).where(ScrapingSourceModel.is_active == True)
+    )).scalars().all()
     
     all_results = []
+    item_ids = []
     for source in sources:
         try:
-            # For now, we'll just call run_discovery for each source URL
+            # For now, we'll just create one item for each source URL
             # In a real scenario, this might involve more complex scraping logic
             # that yields multiple URLs from a single source.
-            item = await run_discovery(source.url, db)
+            item = await create_pending_item(source.url, db)
+            item_ids.append(item.id)
             source.last_scraped = datetime.now()
             db.add(source)
-            db.commit()
-            db.refresh(source)
+            await db.commit()
+            await db.refresh(source)
             all_results.append({"source_url": source.url, "status": "success", "item_id": item.id})
         except HTTPException as e:
             all_results.append({"source_url": source.url, "status": "failed", "detail": e.detail})
         except Exception as e:
             all_results.append({"source_url": source.url, "status": "failed", "detail": str(e)})
             logger.error(f"Error during scheduled scrape for source {source.url}: {e}")
-            
+
+    # Scrape all sources concurrently instead of one task per source
+    await asyncio.to_thread(dispatch_discovery_batch, item_ids)
+
     return {"message": "Scheduled scrape completed", "results": all_results}
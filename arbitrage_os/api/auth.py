@@ -3,9 +3,10 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from arbitrage_os.auth.schemas import Token, UserCreate, UserOut
+from arbitrage_os.auth.schemas import Token, User, UserCreate, UserOut
 from arbitrage_os.auth.security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     authenticate_user, # Ensure this is imported from security.py
@@ -13,7 +14,8 @@ from arbitrage_os.auth.security import (
     get_current_active_user,
     get_password_hash, # Ensure this is imported from security.py
 )
-from arbitrage_os.db.database import SessionLocal
+from arbitrage_os.auth.user_cache import user_claims
+from arbitrage_os.db.database import AsyncSessionLocal, SessionLocal
 from arbitrage_os.db.models import User as DBUser # Import the User model
 
 router = APIRouter()
@@ -26,11 +28,16 @@ def get_db():
     finally:
         db.close()
 
+# Dependency for async endpoints, so database I/O does not block the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
-    form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: Session = Depends(get_db)
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,12 +46,12 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me/", response_model=UserOut) # Use UserOut for response
-async def read_users_me(current_user: Annotated[DBUser, Depends(get_current_active_user)]):
+async def read_users_me(current_user: Annotated[User, Depends(get_current_active_user)]):
     return current_user
 
 # Endpoint to create a new user
@@ -1,18 +1,35 @@
+import asyncio
 import httpx
 import logging
 import os
 import json
 import tempfile
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from celery import group
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from arbitrage_os.db import models
-from arbitrage_os.db.database import SessionLocal
+from arbitrage_os.db import database, models
+from arbitrage_os.db.database import AsyncSessionLocal, SessionLocal
 from arbitrage_os.discovery.scraper import scrape_url
 from arbitrage_os.discovery.ai_logic import analyze_description
+from arbitrage_os.discovery.analysis_cache import get_analysis_cache_stats
+from arbitrage_os.discovery.ingestion import (
+    INGEST_CHUNK_SIZE,
+    insert_pending_items,
+    iter_ndjson_lines,
+    normalize_urls,
+    parse_ndjson_url,
+)
+from arbitrage_os.discovery.item_listing import list_items, parse_fields
+from arbitrage_os.discovery.progress import stream_progress
 from arbitrage_os.logistics.geocoding import cleanup_and_geocode
+from arbitrage_os.logistics.spatial import find_nearby_items
 from arbitrage_os.verification.image_analyzer import analyze_image_for_hallmarks
 from arbitrage_os.valuation.dashboard import calculate_roi
 from pydantic import BaseModel
@@ -28,6 +45,11 @@ def get_db():
     finally:
         db.close()
 
+# Dependency for async endpoints, so database I/O does not block the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Pydantic Models / Schemas
 class ItemBase(BaseModel):
     url: str
@@ -37,66 +59,257 @@ class ItemBase(BaseModel):
     score: Optional[int] = None
     latitude: Optional[float] = None
     longitude: Optional[float] = None
-    image_urls: Optional[str] = None # Storing JSON string of image URLs
-    image_analysis_results: Optional[str] = None # Storing JSON string of Ximilar analysis results
-    roi_analysis: Optional[str] = None # Storing JSON string of ROI analysis results
+    weight_grams: Optional[float] = None
+    purity: Optional[float] = None
+    image_urls: Optional[List[str]] = None
+    image_analysis_results: Optional[List[Dict[str, Any]]] = None # Ximilar analysis results per image
+    roi_analysis: Optional[Dict[str, Any]] = None
 
 class ItemCreate(ItemBase):
     pass
 
 class Item(ItemBase):
     id: int
+    roi_percent: Optional[float] = None
+    max_buy_price: Optional[float] = None
+    hallmark_label: Optional[str] = None
+    hallmark_confidence: Optional[float] = None
 
     class Config:
         orm_mode = True
 
+class NearbyItem(Item):
+    distance_km: Optional[float] = None
+
 class MultiDiscoveryRequest(BaseModel):
     urls: List[str]
 
 
-from arbitrage_os.tasks import process_discovery_task
+from arbitrage_os.tasks import discovery_pipeline, process_discovery_batch_task
 
-@router.post("/", response_model=Item)
-async def run_discovery(url: str, db: Session = Depends(get_db)):
+# Number of items whose pages are scraped concurrently by one batch task
+DISCOVERY_BATCH_SIZE = int(os.getenv("DISCOVERY_BATCH_SIZE", "200"))
+
+async def create_pending_item(url: str, db: AsyncSession) -> models.Item:
     """
-    Endpoint to initiate the discovery process for a given URL.
-    This creates an item record and triggers a background task to do the heavy lifting.
+    Creates the initial item record for a URL to get an ID.
     """
-    # Create an initial item in the database to get an ID
     initial_item_data = {
         "url": url,
         "status": "pending",
     }
     db_item = models.Item(**initial_item_data)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
+    return db_item
+
+def dispatch_discovery_batch(item_ids: List[int]) -> None:
+    """
+    Triggers batch tasks that scrape the given items' pages concurrently.
+    The tasks are published together as one group over a single producer connection.
+    """
+    if not item_ids:
+        return
+    group(
+        process_discovery_batch_task.s(item_ids[start:start + DISCOVERY_BATCH_SIZE])
+        for start in range(0, len(item_ids), DISCOVERY_BATCH_SIZE)
+    ).apply_async()
 
-    # Trigger the background task
-    process_discovery_task.delay(db_item.id)
+async def ingest_urls(urls: List[str], db: AsyncSession) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Creates pending items for the URLs that are not known yet and triggers their discovery.
+
+    Returns:
+        The ids of the new items and of the existing items, keyed by URL.
+    """
+    inserted, existing = await db.run_sync(insert_pending_items, urls)
+    # Publishing to the broker is a blocking network call.
+    await asyncio.to_thread(dispatch_discovery_batch, list(inserted.values()))
+    return inserted, existing
+
+@router.post("/", response_model=Item)
+async def run_discovery(url: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Endpoint to initiate the discovery process for a given URL.
+    This creates an item record and triggers a background task to do the heavy lifting.
+    """
+    db_item = await create_pending_item(url, db)
+
+    # Trigger the background pipeline
+    await asyncio.to_thread(discovery_pipeline(db_item.id).apply_async)
 
     return db_item
 
 @router.post("/multiple/", response_model=List[Dict[str, Any]])
-async def run_multiple_discoveries(request: MultiDiscoveryRequest, db: Session = Depends(get_db)):
+async def run_multiple_discoveries(request: MultiDiscoveryRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint to run the discovery process for multiple URLs.
+    All items are created in bulk and the pages are scraped concurrently in batches
+    rather than one task per URL. URLs that already have an item are reported as
+    duplicates with the id of their latest item and are not discovered again.
     """
+    urls = normalize_urls(request.urls)
+    try:
+        inserted, existing = await ingest_urls(urls, db)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Bulk ingestion of {len(urls)} URLs failed: {e}")
+        return [{"url": url, "status": "failed", "detail": str(e)} for url in urls]
     results = []
-    for url in request.urls:
-        try:
-            item = await run_discovery(url, db)
-            results.append({"url": url, "status": "success", "item_id": item.id})
-        except HTTPException as e:
-            results.append({"url": url, "status": "failed", "detail": e.detail})
-        except Exception as e:
-            results.append({"url": url, "status": "failed", "detail": str(e)})
+    for url in urls:
+        if url in inserted:
+            results.append({"url": url, "status": "success", "item_id": inserted[url]})
+        else:
+            results.append({"url": url, "status": "duplicate", "item_id": existing.get(url)})
     return results
 
-@router.get("/items/", response_model=List[Item])
-def get_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.post("/bulk/")
+async def run_bulk_discovery(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Endpoint to run the discovery process for a URL list too large for `/multiple/`.
+
+    The request body is NDJSON, one URL per line as a JSON string or a `{"url": ...}`
+    object. It is read as a stream and ingested every `INGEST_CHUNK_SIZE` URLs, so
+    the list never has to fit in memory.
+    """
+    counts = {"received": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+    pending: List[str] = []
+
+    async def flush() -> None:
+        urls = normalize_urls(pending)
+        inserted, _ = await ingest_urls(urls, db)
+        counts["inserted"] += len(inserted)
+        counts["duplicates"] += len(pending) - len(inserted)
+        pending.clear()
+
+    async for line in iter_ndjson_lines(request.stream()):
+        counts["received"] += 1
+        try:
+            pending.append(parse_ndjson_url(line))
+        except ValueError:
+            counts["invalid"] += 1
+            continue
+        if len(pending) >= INGEST_CHUNK_SIZE:
+            await flush()
+    if pending:
+        await flush()
+    return counts
+
+@router.get("/items/", response_model=List[Dict[str, Any]])
+def get_items(
+    response: Response,
+    request: Request,
+    limit: int = Query(100, gt=0, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_roi_percent: Optional[float] = None,
+    min_max_buy_price: Optional[float] = None,
+    hallmark_label: Optional[str] = None,
+    min_hallmark_confidence: Optional[float] = None,
+    sort: str = Query("created_at", description="One of created_at, roi_percent, max_buy_price, hallmark_confidence"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns, e.g. id,url,score,status"),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve items newest (or highest `sort` key) first, one page at a time.
+
+    The next page's cursor is returned in the `X-Next-Cursor` header (and a `Link` header);
+    it is absent on the last page.
+    """
+    try:
+        page, next_cursor = list_items(
+            db,
+            parse_fields(fields, Item.__fields__),
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            min_score=min_score,
+            max_score=max_score,
+            created_after=created_after,
+            created_before=created_before,
+            min_roi_percent=min_roi_percent,
+            min_max_buy_price=min_max_buy_price,
+            hallmark_label=hallmark_label,
+            min_hallmark_confidence=min_hallmark_confidence,
+            sort=sort,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return page
+
+# Server-Sent Events must not be buffered or cached by proxies.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/items/events")
+async def all_item_events():
+    """
+    Stream the pipeline progress of every item as Server-Sent Events, one event per
+    stage transition, so clients do not have to poll `/items/`.
+    """
+    return StreamingResponse(stream_progress(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/items/{item_id}/events")
+async def item_events(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Stream the pipeline progress of one item as Server-Sent Events. The first event is
+    the item's current status, and the stream ends once the item reaches a final status.
+    """
+    if await db.get(models.Item, item_id) is None:
+        raise HTTPException(status_code=404, detail="Item not found.")
+
+    async def current() -> Dict[str, Any]:
+        async with database.AsyncSessionLocal() as session:
+            status = (await session.execute(
+                select(models.Item.status).where(models.Item.id == item_id)
+            )).scalar_one_or_none()
+        return {"item_id": item_id, "status": status}
+
+    return StreamingResponse(stream_progress(item_id, current), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/items/nearby", response_model=List[NearbyItem])
+def get_nearby_items(
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: Optional[float] = Query(None, gt=0),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    k: Optional[int] = Query(None, gt=0, le=1000),
+    min_score: Optional[int] = None,
+    limit: int = Query(100, gt=0, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve geocoded items within a radius or bounding box, or the k nearest, nearest first.
+    """
+    parsed_bbox = None
+    if bbox is not None:
+        try:
+            parsed_bbox = tuple(float(part) for part in bbox.split(","))
+        except ValueError:
+            parsed_bbox = ()
+        if len(parsed_bbox) != 4:
+            raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat.")
+    try:
+        found = find_nearby_items(
+            db, lat=lat, lng=lng, radius_km=radius_km, bbox=parsed_bbox, k=k, min_score=min_score, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [
+        NearbyItem(distance_km=distance, **{field: getattr(item, field) for field in Item.__fields__})
+        for item, distance in found
+    ]
+
+@router.get("/analysis_cache/stats/")
+def analysis_cache_stats(db: Session = Depends(get_db)):
     """
-    Retrieve all items from the database.
+    Report the hit rate and LLM latency saved by the analysis cache.
     """
-    items = db.query(models.Item).offset(skip).limit(limit).all()
-    return items
+    return get_analysis_cache_stats(db)
@@ -1,12 +1,30 @@
-from fastapi import APIRouter, HTTPException
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db import models
+from arbitrage_os.db.database import SessionLocal
 
-from arbitrage_os.logistics.geocoding import cleanup_and_geocode
-from arbitrage_os.logistics.routing import optimize_route
+from arbitrage_os.logistics.geocoding import cleanup_and_geocode_async, geocode_addresses_stream
+from arbitrage_os.logistics.routing import optimize_route_async
+from arbitrage_os.logistics.scheduler import Stop, item_profit, plan_routes, stop_value
+from arbitrage_os.logistics.geocode_cache import geocode_cache
 
 router = APIRouter()
 
+# Dependency to get DB session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 class GeocodeRequest(BaseModel):
     address: str
 
@@ -17,6 +35,27 @@ class Coordinate(BaseModel):
 class RouteRequest(BaseModel):
     coordinates: List[Coordinate]
 
+class TimeWindow(BaseModel):
+    item_id: int
+    opens: Optional[str] = None  # "HH:MM"
+    closes: Optional[str] = None
+    service_minutes: Optional[float] = None
+
+class PlanDayRequest(BaseModel):
+    depot: Coordinate
+    vehicles: int = 1
+    shift_start: str = "08:00"
+    shift_hours: float = 8.0
+    service_minutes: float = 15.0
+    return_to_depot: bool = True
+    item_ids: Optional[List[int]] = None  # Defaults to every completed, geocoded item
+    min_score: int = 1
+    time_windows: List[TimeWindow] = []
+    time_budget_ms: Optional[float] = None
+
+class MultiGeocodeRequest(BaseModel):
+    addresses: List[str]
+
 class MultiGeocodeAndRouteRequest(BaseModel):
     addresses: List[str]
 
@@ -26,7 +65,25 @@ async def geocode_address_endpoint(request: GeocodeRequest):
     """
     Endpoint to geocode a given address string.
     """
-    return cleanup_and_geocode(request.address)
+    return await cleanup_and_geocode_async(request.address)
+
+@router.get("/geocode/cache_stats/")
+def geocode_cache_stats_endpoint():
+    """
+    Endpoint to inspect the hit/miss counters of the geocode cache.
+    """
+    return geocode_cache.stats()
+
+@router.post("/geocode/batch/")
+async def geocode_batch_endpoint(request: MultiGeocodeRequest):
+    """
+    Endpoint to geocode many addresses, streamed back as NDJSON lines in request order.
+    """
+    async def lines():
+        async for address, result in geocode_addresses_stream(request.addresses):
+            yield json.dumps({"address": address, **result}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @router.post("/geocode_and_optimize_route/")
 async def geocode_and_optimize_route_endpoint(request: MultiGeocodeAndRouteRequest):
@@ -36,17 +93,17 @@ async def geocode_and_optimize_route_endpoint(request: MultiGeocodeAndRouteReque
     geocoded_coords = []
     failed_addresses = []
     
-    for address in request.addresses:
-        geocoded_data = cleanup_and_geocode(address)
-        if geocoded_data and isinstance(geocoded_data, dict) and geocoded_data.get("lat") is not None and geocoded_data.get("lng") is not None:
-            geocoded_coords.append(Coordinate(lat=geocoded_data["lat"], lng=geocoded_data["lng"]))
+    async for address, geocoded_data in geocode_addresses_stream(request.addresses):
+        if geocoded_data.get("latitude") is not None and geocoded_data.get("longitude") is not None:
+            geocoded_coords.append({"lat": geocoded_data["latitude"], "lng": geocoded_data["longitude"]})
         else:
             failed_addresses.append(address)
-            
+
+
     if not geocoded_coords:
         raise HTTPException(status_code=400, detail="No valid coordinates could be geocoded from the provided addresses.")
 
-    optimized_route_result = optimize_route(geocoded_coords)
+    optimized_route_result = await optimize_route_async(geocoded_coords)
     
     return {
         "optimized_route": optimized_route_result,
@@ -59,4 +116,68 @@ async def optimize_route_endpoint(request: RouteRequest):
     Endpoint to optimize a route from a list of coordinates.
     """
     coords_list = [coord.dict() for coord in request.coordinates]
-    return optimize_route(coords_list)
+    return await optimize_route_async(coords_list)
+
+def _clock_seconds(clock: str) -> float:
+    try:
+        parsed = datetime.strptime(clock, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time '{clock}', expected HH:MM.")
+    return parsed.hour * 3600 + parsed.minute * 60
+
+@router.post("/plan_day/")
+def plan_day_endpoint(request: PlanDayRequest, db: Session = Depends(get_db)):
+    """
+    Endpoint to split the day's pickups across vehicles under opening hours and the shift length.
+
+    Stops are weighted by score and expected profit; those that do not fit are returned as unassigned.
+    """
+    query = db.query(models.Item).filter(
+        models.Item.latitude.isnot(None),
+        models.Item.longitude.isnot(None),
+        models.Item.score >= request.min_score,
+    )
+    if request.item_ids is not None:
+        query = query.filter(models.Item.id.in_(request.item_ids))
+    else:
+        query = query.filter(models.Item.status == "completed")
+    items = query.all()
+
+    shift_start = _clock_seconds(request.shift_start)
+    windows = {window.item_id: window for window in request.time_windows}
+    stops = []
+    for item in items:
+        window = windows.get(item.id)
+        opens = _clock_seconds(window.opens) - shift_start if window and window.opens else 0.0
+        closes = _clock_seconds(window.closes) - shift_start if window and window.closes else float("inf")
+        service = window.service_minutes if window and window.service_minutes is not None else request.service_minutes
+        stops.append(Stop(
+            id=item.id,
+            lat=item.latitude,
+            lng=item.longitude,
+            value=stop_value(item.score, item_profit(item)),
+            window_start=max(opens, 0.0),
+            window_end=closes,
+            service=service * 60,
+        ))
+
+    try:
+        plan = plan_routes(
+            stops, request.depot.dict(), request.vehicles, request.shift_hours * 3600,
+            return_to_depot=request.return_to_depot, time_budget_ms=request.time_budget_ms,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    day_start = datetime.combine(datetime.utcnow().date(), datetime.min.time()) + timedelta(seconds=shift_start)
+
+    def clock(seconds: float) -> str:
+        return (day_start + timedelta(seconds=seconds)).strftime("%H:%M")
+
+    for route in plan["routes"]:
+        for stop in route["stops"]:
+            stop["item_id"] = stop.pop("id")
+            for key in ("arrival", "start", "departure"):
+                stop[key] = clock(stop[key])
+        route["end"] = clock(route["end"])
+    return plan
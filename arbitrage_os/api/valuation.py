@@ -1,7 +1,12 @@
-from fastapi import APIRouter
+from typing import List
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from arbitrage_os.valuation.dashboard import calculate_roi
+from arbitrage_os.tasks import revalue_inventory_task
+from arbitrage_os.valuation.dashboard import calculate_roi, calculate_roi_batch, get_silver_spot_price_async
+from arbitrage_os.valuation.spot_price import get_spot_price_cache_stats
 
 router = APIRouter()
 
@@ -10,6 +15,11 @@ class RoiRequest(BaseModel):
     purity: float
     purchase_price: float
 
+class BatchRoiRequest(BaseModel):
+    weight_grams: List[float]
+    purity: List[float]
+    purchase_price: List[float]
+
 @router.post("/calculate_roi/")
 async def calculate_roi_endpoint(request: RoiRequest):
     """
@@ -18,5 +28,49 @@ async def calculate_roi_endpoint(request: RoiRequest):
     return calculate_roi(
         weight_grams=request.weight_grams,
         purity=request.purity,
-        purchase_price=request.purchase_price
+        purchase_price=request.purchase_price,
+        spot_price_data=await get_silver_spot_price_async(),
     )
+
+@router.post("/calculate_roi/batch/")
+async def calculate_roi_batch_endpoint(request: BatchRoiRequest):
+    """
+    Endpoint to calculate ROI for many silver items against one spot-price snapshot.
+    Infinite ROI values (items with a purchase price of 0) are returned as null.
+    """
+    spot_price_data = await get_silver_spot_price_async()
+    try:
+        result = calculate_roi_batch(
+            weight_grams=request.weight_grams,
+            purity=request.purity,
+            purchase_price=request.purchase_price,
+            spot_price_data=spot_price_data,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if "error" in result:
+        return result
+
+    roi = result["roi_percent"]
+    return {
+        "spot_price_per_ounce": result["spot_price_per_ounce"],
+        "item_silver_value": result["item_silver_value"].tolist(),
+        "max_buy_price": result["max_buy_price"].tolist(),
+        "profit": result["profit"].tolist(),
+        "roi_percent": np.where(np.isfinite(roi), roi, None).tolist(),
+    }
+
+@router.post("/revalue_inventory/")
+def revalue_inventory_endpoint():
+    """
+    Endpoint to trigger a background re-valuation of every item with a known weight and purity.
+    """
+    task = revalue_inventory_task.delay()
+    return {"message": "Inventory re-valuation started", "task_id": task.id}
+
+@router.get("/spot_price/cache_stats/")
+def spot_price_cache_stats_endpoint():
+    """
+    Endpoint to inspect the hit/miss counters of the spot-price cache.
+    """
+    return get_spot_price_cache_stats()
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from datetime import datetime, timedelta
 from typing import Annotated
@@ -6,25 +7,23 @@ import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from arbitrage_os.auth.schemas import TokenData, UserInDB
+from arbitrage_os.auth.schemas import TokenData, User
+from arbitrage_os.auth.user_cache import user_cache
+from arbitrage_os.db import database
 from arbitrage_os.db.models import User as DBUser
-from arbitrage_os.db.database import SessionLocal
 from arbitrage_os.config.secrets import get_secret
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Configuration
 SECRET_KEY = get_secret("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Trust the user claims of signed, unexpired tokens instead of loading the user. A user
+# disabled in another process keeps access until their token expires.
+AUTH_CLAIMS_ONLY = os.getenv("AUTH_CLAIMS_ONLY", "true").lower() in ("1", "true", "yes")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
@@ -40,22 +39,30 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_user_from_db(db: Session, username: str):
-    return db.query(DBUser).filter(DBUser.username == username).first()
+async def get_user_from_db(db: AsyncSession, username: str):
+    return (await db.execute(select(DBUser).where(DBUser.username == username))).scalars().first()
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_from_db(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_from_db(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is deliberately slow, hash in a worker thread.
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return False
     return user
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
+    """
+    Returns the principal of a bearer token.
+
+    In claims-only mode the token's own claims are trusted. Otherwise, and for tokens
+    without user claims, the user comes from the in-process cache; only a miss opens a
+    database session.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -69,13 +76,22 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Se
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    user = get_user_from_db(db, token_data.username)
-    if user is None:
+
+    if AUTH_CLAIMS_ONLY:
+        user = user_cache.from_claims(payload)
+        if user is not None:
+            return user
+    user = user_cache.get(token_data.username)
+    if user is not None:
+        return user
+
+    async with database.AsyncSessionLocal() as db:
+        db_user = await get_user_from_db(db, token_data.username)
+    if db_user is None:
         raise credentials_exception
-    return user
+    return user_cache.set(db_user)
 
-async def get_current_active_user(current_user: Annotated[UserInDB, Depends(get_current_user)]):
+async def get_current_active_user(current_user: Annotated[User, Depends(get_current_user)]):
     if current_user.disabled:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
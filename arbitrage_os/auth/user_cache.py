@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+
+from arbitrage_os.auth.schemas import User
+from arbitrage_os.db.models import User as DBUser
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+# Invalidations are remembered as long as a token issued before them may be in use,
+# so this must exceed the access-token lifetime.
+AUTH_INVALIDATION_TTL_SECONDS = float(os.getenv("AUTH_INVALIDATION_TTL_SECONDS", str(24 * 3600)))
+
+class UserCache:
+    """
+    In-process cache of authenticated users, so token checks need no database query.
+
+    - Principals loaded from the database are kept in a bounded LRU for `ttl` seconds.
+    - `from_claims` builds the principal from a token's own claims, without any lookup.
+    - `invalidate` drops a user's entry and distrusts the claims of their tokens issued
+      before it. Changes made through the ORM invalidate the user automatically; other
+      processes see a change once their entry expires (or, for claims, the token does).
+    """
+
+    def __init__(self, max_size: int = AUTH_USER_CACHE_SIZE, ttl: float = AUTH_USER_CACHE_TTL_SECONDS):
+        self._max_size = max_size
+        self.ttl = ttl
+        self._users: "OrderedDict[str, tuple]" = OrderedDict()
+        self._invalidated: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"claims_hits": 0, "hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, username: str) -> Optional[User]:
+        """
+        Returns the cached principal of a user, or None on a miss.
+        """
+        with self._lock:
+            cached = self._users.get(username)
+            if cached is not None:
+                user, stored_at = cached
+                if time.monotonic() - stored_at < self.ttl:
+                    self._users.move_to_end(username)
+                    self._stats["hits"] += 1
+                    return user
+                del self._users[username]
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, db_user: DBUser) -> User:
+        """
+        Caches the principal of a user row.
+
+        Returns:
+            The cached principal.
+        """
+        user = User(
+            username=db_user.username,
+            email=db_user.email,
+            full_name=db_user.full_name,
+            disabled=bool(db_user.disabled),
+        )
+        with self._lock:
+            self._users[user.username] = (user, time.monotonic())
+            self._users.move_to_end(user.username)
+            while len(self._users) > self._max_size:
+                self._users.popitem(last=False)
+        return user
+
+    def from_claims(self, payload: Dict[str, Any]) -> Optional[User]:
+        """
+        Returns the principal carried by a verified token's claims, or None if the token
+        lacks them or was issued before the user was invalidated.
+        """
+        username = payload.get("sub")
+        issued_at = payload.get("iat")
+        if username is None or issued_at is None or "disabled" not in payload:
+            return None
+        with self._lock:
+            invalidated_at = self._invalidated.get(username)
+            # `iat` has a one-second resolution, so a token from the same second is distrusted.
+            if invalidated_at is not None and issued_at <= invalidated_at:
+                return None
+            self._stats["claims_hits"] += 1
+        return User(
+            username=username,
+            email=payload.get("email"),
+            full_name=payload.get("full_name"),
+            disabled=bool(payload["disabled"]),
+        )
+
+    def invalidate(self, username: str) -> None:
+        """
+        Forgets a user, e.g. after they were disabled or changed.
+        """
+        now = time.time()
+        with self._lock:
+            self._users.pop(username, None)
+            self._invalidated[username] = now
+            self._invalidated.move_to_end(username)
+            while self._invalidated and now - next(iter(self._invalidated.values())) > AUTH_INVALIDATION_TTL_SECONDS:
+                self._invalidated.popitem(last=False)
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns a snapshot of the cache counters.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._users)
+        return stats
+
+    def clear(self) -> None:
+        """
+        Drops every entry and invalidation and resets the counters.
+        """
+        with self._lock:
+            self._users.clear()
+            self._invalidated.clear()
+            for key in self._stats:
+                self._stats[key] = 0
+
+def user_claims(user: DBUser) -> Dict[str, Any]:
+    """
+    Returns the claims of an access token for a user.
+    """
+    return {
+        "sub": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "disabled": bool(user.disabled),
+    }
+
+user_cache = UserCache()
+
+@event.listens_for(DBUser, "after_update")
+@event.listens_for(DBUser, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: DBUser) -> None:
+    # A renamed user's tokens carry the previous name, which must not stay valid either.
+    for username in {target.username, *inspect(target).attrs.username.history.deleted}:
+        user_cache.invalidate(username)
@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import httpx
+import redis
+import requests
+from geopy.adapters import RequestsAdapter
+from geopy.geocoders import Nominatim
+from openai import DefaultHttpxClient, OpenAI
+from requests.adapters import HTTPAdapter
+from ximilar.client import RecognitionClient
+
+logger = logging.getLogger(__name__)
+
+# Connection pools of the shared HTTP clients, per process
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+# Default timeouts; calls with tighter budgets pass their own.
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+GEOCODER_TIMEOUT_SECONDS = float(os.getenv("GEOCODER_TIMEOUT_SECONDS", "1"))
+XIMILAR_TIMEOUT_SECONDS = float(os.getenv("XIMILAR_TIMEOUT_SECONDS", "90"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "2"))
+
+GEOCODER_USER_AGENT = "arbitrage_os"
+
+class ClientRegistry:
+    """
+    Process-wide registry of long-lived clients for the external services.
+
+    Clients are created on first use and then shared by every caller in the process,
+    so their keep-alive connections are reused. A client registered with arguments
+    (e.g. credentials) is rebuilt when it is requested with different ones.
+
+    Connections must not be shared across `fork()`: a child process forgets the
+    clients inherited from its parent (without closing the parent's sockets) and
+    builds its own on first use.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[..., Any]] = {}
+        self._clients: Dict[str, Tuple[Tuple[Hashable, ...], Any]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def register(self, name: str, factory: Callable[..., Any]) -> None:
+        self._factories[name] = factory
+
+    def get(self, name: str, *args: Hashable) -> Any:
+        """
+        Returns the shared client `name`, building it with `factory(*args)` if needed.
+        """
+        stale = None
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked without the hook (e.g. os.fork() before the registry existed).
+                self._clients = {}
+                self._pid = os.getpid()
+            entry = self._clients.get(name)
+            if entry is None or entry[0] != args:
+                stale = entry[1] if entry is not None else None
+                entry = (args, self._factories[name](*args))
+                self._clients[name] = entry
+            client = entry[1]
+        if stale is not None:
+            _close_client(name, stale)
+        return client
+
+    def close(self) -> None:
+        """
+        Closes every client and their connection pools. Used on process shutdown.
+        """
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients = {}
+        for name, (_, client) in clients:
+            _close_client(name, client)
+
+    def reset(self) -> None:
+        """
+        Forgets every client without closing it. Used in a freshly forked process, whose
+        inherited connections belong to the parent.
+        """
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+def _close_client(name: str, client: Any) -> None:
+    close = getattr(client, "close", None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.warning(f"Closing the {name} client failed: {e}")
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+def _build_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=_http_limits(),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+    )
+
+def _build_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS, pool_maxsize=HTTP_MAX_KEEPALIVE_CONNECTIONS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _build_openai_client(api_key: Optional[str], base_url: Optional[str]) -> OpenAI:
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=DefaultHttpxClient(limits=_http_limits()),
+    )
+
+def _build_geolocator() -> Nominatim:
+    def adapter_factory(proxies, ssl_context):
+        # Requests are rate limited to a few per second, so a small pool is plenty.
+        return RequestsAdapter(proxies=proxies, ssl_context=ssl_context, pool_connections=1, pool_maxsize=4)
+
+    return Nominatim(user_agent=GEOCODER_USER_AGENT, timeout=GEOCODER_TIMEOUT_SECONDS, adapter_factory=adapter_factory)
+
+def _build_redis_client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(
+        url,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_timeout=REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+    )
+
+def _build_recognition_client(api_token: str, workspace_id: str) -> RecognitionClient:
+    client = RecognitionClient(token=api_token, workspace=workspace_id)
+    client.request_timeout = XIMILAR_TIMEOUT_SECONDS
+    return client
+
+registry = ClientRegistry()
+registry.register("http", _build_http_client)
+registry.register("http_session", _build_http_session)
+registry.register("openai", _build_openai_client)
+registry.register("geocoder", _build_geolocator)
+registry.register("ximilar", _build_recognition_client)
+registry.register("redis", _build_redis_client)
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns the shared `httpx.Client` for JSON APIs (Mapbox, OSRM).
+    """
+    return registry.get("http")
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the shared `requests.Session` for page scraping and the Metals-API.
+    """
+    return registry.get("http_session")
+
+def get_openai_client() -> OpenAI:
+    """
+    Returns the shared OpenAI client for the current `OPENAI_API_KEY` and `OPENAI_BASE_URL`.
+    """
+    return registry.get("openai", os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_BASE_URL"))
+
+def get_geolocator() -> Nominatim:
+    """
+    Returns the shared Nominatim client. Callers must respect the geocoder rate limit.
+    """
+    return registry.get("geocoder")
+
+def get_recognition_client(api_token: str, workspace_id: str) -> RecognitionClient:
+    """
+    Returns the shared Ximilar client for the given credentials.
+    """
+    return registry.get("ximilar", api_token, workspace_id)
+
+def get_redis_client(url: str) -> redis.Redis:
+    """
+    Returns the shared Redis client for `url`, for publishing and short commands.
+    """
+    return registry.get("redis", url)
+
+def init_clients() -> None:
+    """
+    Starts a process with no inherited clients. Called from the FastAPI startup hook
+    and Celery's `worker_process_init`.
+    """
+    registry.reset()
+
+def close_clients() -> None:
+    """
+    Closes the shared clients. Called from the FastAPI shutdown hook and Celery's
+    `worker_process_shutdown`.
+    """
+    registry.close()
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from .database import Base
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 of model, prompt version and text
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    result = Column(Text, nullable=False)  # Storing JSON string of the LLM analysis
+    latency_ms = Column(Float, nullable=True)  # Duration of the LLM call that produced the result
+    hit_count = Column(Integer, default=0)
+    stored_at = Column(DateTime, nullable=False)
+    last_accessed = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint
+from .database import Base
+
+class DistanceCacheEntry(Base):
+    __tablename__ = "distance_cache"
+    __table_args__ = (UniqueConstraint("source", "origin_key", "destination_key", name="uq_distance_cache_pair"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False)  # Road-distance service, e.g. "osrm"
+    origin_key = Column(String, index=True, nullable=False)  # Rounded "lat,lng"
+    destination_key = Column(String, index=True, nullable=False)
+    distance_m = Column(Float, nullable=True)  # None when the service found no route
+    duration_s = Column(Float, nullable=True)
+    stored_at = Column(DateTime, nullable=False)
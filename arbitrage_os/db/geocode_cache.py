@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
+from .database import Base
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = "geocode_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    address_key = Column(String, unique=True, index=True, nullable=False)  # Normalized raw or cleaned address
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    formatted_address = Column(String, nullable=True)
+    found = Column(Boolean, default=True)  # False for cached negative results
+    source = Column(String, nullable=True)  # "nominatim" or "gazetteer"
+    stored_at = Column(DateTime, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from .database import Base
+
+class ImageAnalysisCacheEntry(Base):
+    __tablename__ = "image_analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(String, nullable=False)  # Ximilar task the analysis came from
+    content_hash = Column(String(64), index=True, nullable=False)  # SHA-256 of the image bytes
+    dhash = Column(String(16), nullable=True)  # 64-bit perceptual difference hash, hex
+    # The dhash split into four 16-bit bands; near-duplicates share a band (multi-index hashing).
+    band0 = Column(Integer, index=True, nullable=True)
+    band1 = Column(Integer, index=True, nullable=True)
+    band2 = Column(Integer, index=True, nullable=True)
+    band3 = Column(Integer, index=True, nullable=True)
+    result = Column(Text, nullable=False)  # Storing JSON string of the Ximilar analysis
+    hit_count = Column(Integer, default=0)
+    stored_at = Column(DateTime, nullable=False)
+    last_accessed = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("task_id", "content_hash", name="uq_image_analysis_cache_image"),
+    )
@@ -1,8 +1,39 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func, Float, Boolean
+import math
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, func, Float, Boolean, Index, JSON, Computed
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
 
 from .database import Base
 
 
+def _finite(value):
+    # JSON has no Infinity or NaN, e.g. the ROI of an item without a purchase price.
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+class JSONDocument(TypeDecorator):
+    """
+    JSONB on Postgres, JSON text elsewhere (SQLite). Python None is stored as SQL NULL.
+    """
+    impl = JSON(none_as_null=True)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        return dialect.type_descriptor(JSON(none_as_null=True))
+
+    def process_bind_param(self, value, dialect):
+        return _finite(value)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -28,9 +59,29 @@ class Item(Base):
     score = Column(Integer, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    image_urls = Column(Text, nullable=True) # Storing list of URLs as a JSON string
-    image_analysis_results = Column(Text, nullable=True) # Storing JSON string of Ximilar analysis results
-    roi_analysis = Column(Text, nullable=True) # Storing JSON string of ROI analysis results
+    geohash = Column(String(12), index=True, nullable=True) # Spatial index key, see logistics.geohash
+    weight_grams = Column(Float, nullable=True)
+    purity = Column(Float, nullable=True)
+    image_urls = Column(JSONDocument(), nullable=True) # List of image URLs
+    image_analysis_results = Column(JSONDocument(), nullable=True) # List of Ximilar analysis results per image
+    roi_analysis = Column(JSONDocument(), nullable=True) # ROI analysis results
+    content_hash = Column(String(64), nullable=True) # SHA-256 of the scraped page this item was analyzed from
+
+    # Hot fields, filterable and sortable in SQL
+    roi_percent = Column(Float, Computed(roi_analysis["roi_percent"].as_float(), persisted=True), nullable=True)
+    max_buy_price = Column(Float, Computed(roi_analysis["max_buy_price"].as_float(), persisted=True), nullable=True)
+    hallmark_label = Column(String, index=True, nullable=True) # Most confident label across the images
+    hallmark_confidence = Column(Float, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pagination of the item listing, optionally filtered by status
+        Index("ix_items_created_at_id", "created_at", "id"),
+        Index("ix_items_status_created_at_id", "status", "created_at", "id"),
+        # Sorting and keyset pagination by the hot fields
+        Index("ix_items_roi_percent_id", "roi_percent", "id"),
+        Index("ix_items_max_buy_price_id", "max_buy_price", "id"),
+        Index("ix_items_hallmark_confidence_id", "hallmark_confidence", "id"),
+    )
@@ -1,10 +1,33 @@
+import hashlib
 import logging
 import os
+import io
 import json
+from typing import Dict, List, Optional
 from openai import OpenAI
 
+from arbitrage_os import clients
+
 logger = logging.getLogger(__name__)
 
+ANALYSIS_MODEL = "gpt-4o-mini"
+
+# Packed analysis: how many listings, and how much text, go into one request.
+# Listings longer than LLM_BATCH_MAX_LISTING_CHARS are analyzed on their own.
+LLM_BATCH_MAX_LISTINGS = int(os.getenv("LLM_BATCH_MAX_LISTINGS", "20"))
+LLM_BATCH_MAX_CHARS = int(os.getenv("LLM_BATCH_MAX_CHARS", "24000"))
+LLM_BATCH_MAX_LISTING_CHARS = int(os.getenv("LLM_BATCH_MAX_LISTING_CHARS", "4000"))
+
+SYSTEM_PROMPT = """
+    You are an expert in sourcing precious metals. Your task is to analyze text from online marketplace listings (like Craigslist or Facebook Marketplace) to find potential silver items.
+    Analyze the provided text and return a JSON object with the following keys:
+    1. "score": An integer from 1 to 10, where 10 is the highest likelihood of the listing containing high-purity, valuable silver items. Base your score on keywords like 'tarnish', 'heavy', 'antique', 'collection', 'sterling', 'estate', 'flatware', 'hallmark'. Downgrade the score for keywords like 'plate', 'plated', 'silverware' (when used ambiguously), or 'EPNS'.
+    2. "reasoning": A brief, one-sentence explanation for why you assigned the score.
+    3. "address": The full street address of the sale, if mentioned. If no address is found, return "Not found".
+    4. "weight_grams": The estimated weight of the silver item in grams, if mentioned. Return null if not found.
+    5. "purity": The estimated purity of the silver (e.g., 0.925 for sterling, 0.999 for fine silver), if mentioned. Return null if not found.
+    """
+
 def analyze_description(description: str) -> dict:
     """
     Analyzes a sale description using an LLM to rank it for silver content and extract an address.
@@ -22,23 +45,13 @@ def analyze_description(description: str) -> dict:
         logger.error("OPENAI_API_KEY environment variable not set.")
         raise ValueError("OPENAI_API_KEY environment variable not set.")
 
-    client = OpenAI()
-
-    system_prompt = """
-    You are an expert in sourcing precious metals. Your task is to analyze text from online marketplace listings (like Craigslist or Facebook Marketplace) to find potential silver items.
-    Analyze the provided text and return a JSON object with the following keys:
-    1. "score": An integer from 1 to 10, where 10 is the highest likelihood of the listing containing high-purity, valuable silver items. Base your score on keywords like 'tarnish', 'heavy', 'antique', 'collection', 'sterling', 'estate', 'flatware', 'hallmark'. Downgrade the score for keywords like 'plate', 'plated', 'silverware' (when used ambiguously), or 'EPNS'.
-    2. "reasoning": A brief, one-sentence explanation for why you assigned the score.
-    3. "address": The full street address of the sale, if mentioned. If no address is found, return "Not found".
-    4. "weight_grams": The estimated weight of the silver item in grams, if mentioned. Return null if not found.
-    5. "purity": The estimated purity of the silver (e.g., 0.925 for sterling, 0.999 for fine silver), if mentioned. Return null if not found.
-    """
+    client = get_openai_client()
 
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=ANALYSIS_MODEL,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": description},
             ],
             response_format={"type": "json_object"},
@@ -52,3 +65,187 @@ def analyze_description(description: str) -> dict:
         logger.error(f"An error occurred during LLM analysis: {str(e)}")
         return {"error": f"An error occurred during LLM analysis: {str(e)}"}
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+    You will receive a JSON object {"listings": [{"id": ..., "text": ...}, ...]} containing several independent listings.
+    Analyze each listing on its own and return a JSON object {"results": [...]} with exactly one entry per listing.
+    Each entry must contain the listing's "id" and the keys described above.
+    """
+
+# Part of the analysis cache key: editing either prompt stops cached analyses from being reused.
+PROMPT_VERSION = hashlib.sha256(f"{SYSTEM_PROMPT}\x00{BATCH_SYSTEM_PROMPT}".encode("utf-8")).hexdigest()[:16]
+
+ANALYSIS_RESULTS_SCHEMA = {
+    "name": "listing_analyses",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "score": {"type": "integer"},
+                        "reasoning": {"type": "string"},
+                        "address": {"type": "string"},
+                        "weight_grams": {"type": ["number", "null"]},
+                        "purity": {"type": ["number", "null"]},
+                    },
+                    "required": ["id", "score", "reasoning", "address", "weight_grams", "purity"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+}
+
+def get_openai_client() -> OpenAI:
+    """
+    Returns the process-wide OpenAI client so every request reuses one connection pool.
+
+    The endpoint can be pointed at a local stub server with `OPENAI_BASE_URL`.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        logger.error("OPENAI_API_KEY environment variable not set.")
+        raise ValueError("OPENAI_API_KEY environment variable not set.")
+    return clients.get_openai_client()
+
+def pack_descriptions(descriptions: Dict[str, str]) -> List[Dict[str, str]]:
+    """
+    Splits listings into chunks that fit in one packed request.
+
+    Args:
+        descriptions: A mapping of listing IDs to descriptions.
+
+    Returns:
+        A list of mappings, each small enough for one request.
+    """
+    chunks: List[Dict[str, str]] = []
+    current: Dict[str, str] = {}
+    current_chars = 0
+    for listing_id, text in descriptions.items():
+        if current and (len(current) >= LLM_BATCH_MAX_LISTINGS or current_chars + len(text) > LLM_BATCH_MAX_CHARS):
+            chunks.append(current)
+            current, current_chars = {}, 0
+        current[listing_id] = text
+        current_chars += len(text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _analyze_packed_chunk(client: OpenAI, chunk: Dict[str, str]) -> Dict[str, dict]:
+    listings = [{"id": listing_id, "text": text} for listing_id, text in chunk.items()]
+    response = client.chat.completions.create(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps({"listings": listings})},
+        ],
+        response_format={"type": "json_schema", "json_schema": ANALYSIS_RESULTS_SCHEMA},
+        temperature=0.2,
+    )
+    results = json.loads(response.choices[0].message.content).get("results", [])
+    analyses = {}
+    for result in results:
+        listing_id = str(result.pop("id", ""))
+        if listing_id in chunk:
+            analyses[listing_id] = result
+    return analyses
+
+def analyze_descriptions_batch(descriptions: Dict[str, str]) -> Dict[str, dict]:
+    """
+    Analyzes many listings, packing short ones into shared structured-output requests.
+
+    Listings that are too long to pack, or that a packed response left out, fall
+    back to `analyze_description`.
+
+    Args:
+        descriptions: A mapping of listing IDs (e.g. item IDs as strings) to descriptions.
+
+    Returns:
+        A mapping of the same IDs to the analysis dictionaries returned by `analyze_description`.
+    """
+    client = get_openai_client()
+
+    packable = {k: v for k, v in descriptions.items() if len(v) <= LLM_BATCH_MAX_LISTING_CHARS}
+    analyses: Dict[str, dict] = {}
+    for chunk in pack_descriptions(packable):
+        try:
+            analyses.update(_analyze_packed_chunk(client, chunk))
+        except Exception as e:
+            logger.error(f"An error occurred during packed LLM analysis of {len(chunk)} listings: {str(e)}")
+
+    leftovers = [listing_id for listing_id in descriptions if listing_id not in analyses]
+    if leftovers:
+        logger.info(f"Analyzing {len(leftovers)} listings individually.")
+    for listing_id in leftovers:
+        analyses[listing_id] = analyze_description(descriptions[listing_id])
+    return analyses
+
+def submit_analysis_batch(descriptions: Dict[str, str]) -> str:
+    """
+    Submits listings through the OpenAI Batch API, for runs that can wait up to 24 hours.
+
+    Returns:
+        The ID of the created batch, to be passed to `collect_analysis_batch`.
+    """
+    client = get_openai_client()
+    lines = [
+        json.dumps({
+            "custom_id": listing_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": ANALYSIS_MODEL,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": text},
+                ],
+                "response_format": {"type": "json_object"},
+                "temperature": 0.2,
+            },
+        })
+        for listing_id, text in descriptions.items()
+    ]
+    batch_file = client.files.create(
+        file=("analysis_batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logger.info(f"Submitted analysis batch {batch.id} with {len(lines)} listings.")
+    return batch.id
+
+def collect_analysis_batch(batch_id: str) -> Optional[Dict[str, dict]]:
+    """
+    Collects the results of a batch submitted with `submit_analysis_batch`.
+
+    Returns:
+        None while the batch is still running, otherwise a mapping of listing IDs
+        to analyses. Listings the batch could not analyze map to an error dictionary.
+    """
+    client = get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status in ("validating", "in_progress", "finalizing"):
+        return None
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"Analysis batch {batch_id} ended with status {batch.status}.")
+        return {}
+
+    analyses: Dict[str, dict] = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        try:
+            content = record["response"]["body"]["choices"][0]["message"]["content"]
+            analyses[record["custom_id"]] = json.loads(content)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            analyses[record["custom_id"]] = {"error": f"An error occurred during LLM analysis: {str(e)}"}
+    return analyses
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db.analysis_cache import AnalysisCacheEntry
+from arbitrage_os.discovery.ai_logic import (
+    ANALYSIS_MODEL,
+    PROMPT_VERSION,
+    analyze_description,
+    analyze_descriptions_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "100000"))
+# Eviction counts the whole table, so each process only runs it once every N stores.
+ANALYSIS_CACHE_EVICT_EVERY = int(os.getenv("ANALYSIS_CACHE_EVICT_EVERY", "500"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "latency_saved_ms": 0.0}
+_stores_since_eviction = 0
+
+def normalize_description(description: str) -> str:
+    """
+    Normalizes a description so that reposts differing only in case or whitespace share a cache entry.
+    """
+    return _WHITESPACE.sub(" ", description).strip().lower()
+
+def analysis_cache_key(description: str, model: str = ANALYSIS_MODEL, prompt_version: str = PROMPT_VERSION) -> str:
+    """
+    Builds the cache key from the model, the prompt version and the normalized text.
+    """
+    payload = f"{model}\x00{prompt_version}\x00{normalize_description(description)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _record(hit: bool, latency_saved_ms: float = 0.0) -> None:
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+        _stats["latency_saved_ms"] += latency_saved_ms
+
+def _eviction_due(stored: int = 1) -> bool:
+    global _stores_since_eviction
+    with _stats_lock:
+        _stores_since_eviction += stored
+        if _stores_since_eviction < ANALYSIS_CACHE_EVICT_EVERY:
+            return False
+        _stores_since_eviction = 0
+    return True
+
+def get_cached_analysis(db: Session, description: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the cached LLM analysis for a description, or None on a miss.
+
+    Expired entries are deleted on read. The caller commits.
+    """
+    entry = db.query(AnalysisCacheEntry).filter(
+        AnalysisCacheEntry.cache_key == analysis_cache_key(description)
+    ).first()
+    if entry is None:
+        return None
+
+    now = datetime.utcnow()
+    if entry.stored_at < now - timedelta(seconds=ANALYSIS_CACHE_TTL_SECONDS):
+        db.delete(entry)
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_accessed = now
+    _record(hit=True, latency_saved_ms=entry.latency_ms or 0.0)
+    return json.loads(entry.result)
+
+def store_analysis(
+    db: Session, description: str, result: Dict[str, Any], latency_ms: float, evict: bool = True
+) -> None:
+    """
+    Stores an LLM analysis and, every `ANALYSIS_CACHE_EVICT_EVERY` stores, evicts the least
+    recently used entries beyond the size limit. An existing (e.g. expired) entry for the
+    same key is overwritten. The caller commits.
+    """
+    now = datetime.utcnow()
+    cache_key = analysis_cache_key(description)
+    entry = db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.cache_key == cache_key).first()
+    if entry is None:
+        entry = AnalysisCacheEntry(cache_key=cache_key, hit_count=0)
+    entry.model = ANALYSIS_MODEL
+    entry.prompt_version = PROMPT_VERSION
+    entry.result = json.dumps(result)
+    entry.latency_ms = latency_ms
+    entry.stored_at = now
+    entry.last_accessed = now
+    try:
+        with db.begin_nested():
+            db.add(entry)
+    except IntegrityError:
+        # Another worker stored the same analysis first.
+        logger.debug("Analysis cache entry already stored by another worker.")
+        return
+    if evict and _eviction_due():
+        evict_analysis_cache(db)
+
+def evict_analysis_cache(db: Session, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES) -> int:
+    """
+    Deletes expired entries and the least recently used ones beyond `max_entries`.
+
+    Returns:
+        The number of deleted entries.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=ANALYSIS_CACHE_TTL_SECONDS)
+    deleted = db.query(AnalysisCacheEntry).filter(
+        AnalysisCacheEntry.stored_at < cutoff
+    ).delete(synchronize_session=False)
+
+    overflow = db.query(func.count(AnalysisCacheEntry.id)).scalar() - max_entries
+    if overflow > 0:
+        oldest_ids = (
+            db.query(AnalysisCacheEntry.id)
+            .order_by(AnalysisCacheEntry.last_accessed)
+            .limit(overflow)
+            .subquery()
+        )
+        deleted += db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.id.in_(oldest_ids.select())
+        ).delete(synchronize_session=False)
+    return deleted
+
+def analyze_description_cached(db: Session, description: str) -> Dict[str, Any]:
+    """
+    Analyzes a description with the LLM, serving repeated descriptions from the analysis cache.
+
+    Failed analyses are not cached. The caller commits.
+    """
+    cached = get_cached_analysis(db, description)
+    if cached is not None:
+        return cached
+
+    _record(hit=False)
+    start = time.perf_counter()
+    result = analyze_description(description)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if "error" not in result:
+        store_analysis(db, description, result, latency_ms)
+    return result
+
+def get_uncached_descriptions(db: Session, descriptions: Iterable[str]) -> List[str]:
+    """
+    Returns the distinct descriptions that have no live cache entry, without counting lookups.
+    """
+    by_key = {analysis_cache_key(description): description for description in descriptions if description}
+    if not by_key:
+        return []
+    cutoff = datetime.utcnow() - timedelta(seconds=ANALYSIS_CACHE_TTL_SECONDS)
+    cached_keys = {
+        cache_key
+        for (cache_key,) in db.query(AnalysisCacheEntry.cache_key).filter(
+            AnalysisCacheEntry.cache_key.in_(list(by_key)),
+            AnalysisCacheEntry.stored_at >= cutoff,
+        )
+    }
+    return [description for cache_key, description in by_key.items() if cache_key not in cached_keys]
+
+def store_analyses(db: Session, analyses_by_description: Dict[str, Dict[str, Any]], latency_ms: float) -> int:
+    """
+    Stores the successful analyses of a batch run. The caller commits.
+
+    Returns:
+        The number of stored analyses.
+    """
+    stored = 0
+    for description, result in analyses_by_description.items():
+        if result and "error" not in result:
+            store_analysis(db, description, result, latency_ms, evict=False)
+            stored += 1
+    if stored and _eviction_due(stored):
+        evict_analysis_cache(db)
+    return stored
+
+def prime_analysis_cache(db: Session, descriptions: Iterable[str]) -> int:
+    """
+    Analyzes every uncached description with packed LLM requests and stores the results,
+    so the per-item pipeline is served from the cache. The caller commits.
+
+    Returns:
+        The number of newly cached analyses.
+    """
+    missing = get_uncached_descriptions(db, descriptions)
+    if not missing:
+        return 0
+
+    by_key = {analysis_cache_key(description): description for description in missing}
+    start = time.perf_counter()
+    analyses = analyze_descriptions_batch(by_key)
+    # Attribute the run's latency evenly, this is what a cache hit saves per listing.
+    latency_ms = (time.perf_counter() - start) * 1000 / len(by_key)
+    return store_analyses(
+        db, {by_key[cache_key]: result for cache_key, result in analyses.items() if cache_key in by_key}, latency_ms
+    )
+
+def get_analysis_cache_stats(db: Session) -> Dict[str, Any]:
+    """
+    Returns the hit rate and latency saved by the analysis cache, for this process and overall.
+    """
+    with _stats_lock:
+        process_stats = dict(_stats)
+    lookups = process_stats["hits"] + process_stats["misses"]
+    process_stats["hit_rate"] = process_stats["hits"] / lookups if lookups else 0.0
+
+    entries, total_hits, latency_saved_ms = db.query(
+        func.count(AnalysisCacheEntry.id),
+        func.coalesce(func.sum(AnalysisCacheEntry.hit_count), 0),
+        func.coalesce(func.sum(AnalysisCacheEntry.hit_count * AnalysisCacheEntry.latency_ms), 0.0),
+    ).one()
+    return {
+        "process": process_stats,
+        "persistent": {
+            "entries": entries,
+            "total_hits": total_hits,
+            "latency_saved_ms": latency_saved_ms,
+        },
+    }
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import AsyncIterator, Awaitable, Dict, Any, Iterable, List, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+
+from arbitrage_os.discovery.scraper import USER_AGENT, build_request_headers, process_response
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Pool configuration
+SCRAPER_MAX_CONNECTIONS = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "100"))
+SCRAPER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SCRAPER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+SCRAPER_MAX_CONNECTIONS_PER_HOST = int(os.getenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "6"))
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "50"))
+SCRAPER_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_TIMEOUT_SECONDS", "10"))
+SCRAPER_HTTP2 = os.getenv("SCRAPER_HTTP2", "true").lower() in ("1", "true", "yes")
+
+
+class AsyncScraper:
+    """
+    Scrapes pages over one shared `httpx.AsyncClient` with keep-alive and HTTP/2.
+
+    `concurrency` caps the number of in-flight requests overall and
+    `max_connections_per_host` caps them per host, so a large fan-out does not
+    hammer a single marketplace. An instance is bound to the event loop it is
+    first used on; use `get_async_scraper()` to get the one for the running loop.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SCRAPER_CONCURRENCY,
+        max_connections_per_host: int = SCRAPER_MAX_CONNECTIONS_PER_HOST,
+        timeout: float = SCRAPER_TIMEOUT_SECONDS,
+        http2: bool = SCRAPER_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=timeout,
+            http2=http2,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=SCRAPER_MAX_CONNECTIONS,
+                max_keepalive_connections=SCRAPER_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            transport=transport,
+        )
+        self._concurrency = asyncio.Semaphore(concurrency)
+        self._max_connections_per_host = max_connections_per_host
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self._max_connections_per_host)
+        return self._host_limits[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        Performs a rate-limited GET for `url` and raises for bad status codes.
+        `304 Not Modified` is returned as is.
+        """
+        # Wait for the host first, so requests queued on a busy host hold no global slot.
+        async with self._host_limit(url), self._concurrency:
+            response = await self.client.get(url, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    async def scrape_url(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Scrapes a URL for its textual content and image URLs.
+
+        Returns:
+            The same shape as `scraper.scrape_url`, or an empty string and empty
+            list if scraping fails.
+        """
+        try:
+            response = await self.fetch(url, headers=build_request_headers(cached))
+            # Parsing is CPU-bound, keep it off the event loop.
+            return await asyncio.to_thread(
+                process_response, response.status_code, response.headers, response.content, url, cached
+            )
+        except Exception as e:
+            # Malformed URLs raise ValueError rather than httpx.HTTPError; one bad page
+            # must not abort the rest of a batch.
+            logger.error(f"Error scraping URL {url}: {e}")
+            return {"text": "", "image_urls": []}
+
+    async def scrape_many(
+        self, urls: Iterable[str], cached: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Scrapes many URLs concurrently and yields each result as soon as it finishes.
+
+        Every yielded dictionary carries the source `url` next to `text` and
+        `image_urls`. `cached` maps URLs to the validators of their previous scrape.
+        Pending requests are cancelled if the consumer stops early.
+        """
+        cached = cached or {}
+
+        async def scrape_one(url: str) -> Dict[str, Any]:
+            result = await self.scrape_url(url, cached.get(url))
+            return {"url": url, **result}
+
+        tasks = [asyncio.ensure_future(scrape_one(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# One scraper per event loop: its client and semaphores are bound to the loop they were
+# created on, and threaded workers run one loop per thread.
+_scrapers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncScraper]" = weakref.WeakKeyDictionary()
+_scrapers_lock = threading.Lock()
+# The event loop of each thread running async code from synchronous callers
+_thread_state = threading.local()
+
+
+def _forget_inherited_state() -> None:
+    # A forked child must not use the parent's loops or their connections.
+    global _scrapers, _scrapers_lock, _thread_state
+    _scrapers = weakref.WeakKeyDictionary()
+    _scrapers_lock = threading.Lock()
+    _thread_state = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_state)
+
+
+def get_async_scraper() -> AsyncScraper:
+    """
+    Returns the shared scraper for the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    with _scrapers_lock:
+        scraper = _scrapers.get(loop)
+        if scraper is None:
+            scraper = _scrapers[loop] = AsyncScraper()
+    return scraper
+
+
+async def close_async_scraper() -> None:
+    """
+    Closes the running event loop's scraper and its connection pool, e.g. on application
+    shutdown. Scrapers of other loops are left alone.
+    """
+    with _scrapers_lock:
+        scraper = _scrapers.pop(asyncio.get_running_loop(), None)
+    if scraper is not None:
+        await scraper.aclose()
+
+
+def run_in_thread_loop(coro: Awaitable[T]) -> T:
+    """
+    Runs a coroutine to completion from synchronous code such as a Celery task.
+
+    Unlike `asyncio.run`, every call from the same thread reuses one event loop, so the
+    loop's scraper keeps its keep-alive connections from one task to the next.
+    """
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _thread_state.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coro)
+
+
+def close_thread_loop() -> None:
+    """
+    Closes the current thread's event loop and its scraper, e.g. on worker shutdown.
+    """
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        return
+    try:
+        loop.run_until_complete(close_async_scraper())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+        _thread_state.loop = None
+
+
+async def scrape_url_async(url: str, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Scrapes a single URL over the shared connection pool.
+    """
+    return await get_async_scraper().scrape_url(url, cached)
+
+
+async def scrape_many(
+    urls: Iterable[str], cached: Optional[Dict[str, Dict[str, Any]]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Scrapes many URLs over the shared connection pool, yielding results as they finish.
+    """
+    async for result in get_async_scraper().scrape_many(urls, cached):
+        yield result
+
+
+def scrape_many_blocking(
+    urls: List[str], cached: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs `scrape_many` to completion from synchronous code such as a Celery task.
+
+    Returns:
+        A dictionary mapping each URL to its scrape result.
+    """
+    async def collect() -> Dict[str, Dict[str, Any]]:
+        return {result["url"]: result async for result in scrape_many(urls, cached)}
+
+    return run_in_thread_loop(collect())
@@ -0,0 +1,155 @@
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+logger = logging.getLogger(__name__)
+
+# "auto" picks the fastest installed backend: selectolax, then lxml, then BeautifulSoup.
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "auto").lower()
+
+SKIPPED_TEXT_TAGS = frozenset(("script", "style"))
+
+ParserBackend = Callable[[bytes, str], Dict[str, Any]]
+
+def absolutize_image_url(src: str, url: str) -> str:
+    """
+    Makes an image `src` absolute the same way for every backend.
+    """
+    if src.startswith('//'):
+        return 'http:' + src
+    if src.startswith('/'):
+        return urljoin(url, src)
+    return src
+
+def clean_text(text: str) -> str:
+    """
+    Strips every line, splits on double spaces and drops empty chunks.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def parse_with_bs4(content: bytes, url: str) -> Dict[str, Any]:
+    """
+    Reference backend using BeautifulSoup's pure-Python `html.parser`.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Extract image URLs
+    image_urls = [absolutize_image_url(img['src'], url) for img in soup.find_all('img', src=True)]
+
+    # Remove script and style elements
+    for script_or_style in soup(["script", "style"]):
+        script_or_style.decompose()
+
+    return {"text": clean_text(soup.get_text()), "image_urls": image_urls}
+
+def parse_with_lxml(content: bytes, url: str) -> Dict[str, Any]:
+    """
+    libxml2 backend. Text and images are collected in one walk over the tree.
+    """
+    from lxml import etree, html
+
+    # libxml2 assumes Latin-1 for pages without a charset declaration; decode them as
+    # BeautifulSoup does (declared charset, else UTF-8 when valid), so the backends agree.
+    encoding = UnicodeDammit(content, is_html=True).original_encoding
+    try:
+        root = html.document_fromstring(content, parser=html.HTMLParser(encoding=encoding))
+    except (etree.ParserError, ValueError):
+        return {"text": "", "image_urls": []}
+
+    texts: List[str] = []
+    image_urls: List[str] = []
+    for element in root.iter():
+        tag = element.tag
+        if tag == "img":
+            src = element.get("src")
+            if src is not None:
+                image_urls.append(absolutize_image_url(src, url))
+        # Comments and processing instructions have a non-string tag; only their tail is visible text.
+        if element.text and isinstance(tag, str) and tag not in SKIPPED_TEXT_TAGS:
+            texts.append(element.text)
+        if element.tail and element is not root:
+            texts.append(element.tail)
+
+    return {"text": clean_text("".join(texts)), "image_urls": image_urls}
+
+def parse_with_selectolax(content: bytes, url: str) -> Dict[str, Any]:
+    """
+    Lexbor backend. Text and images are collected in one walk over the tree.
+    """
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(content)
+    if tree.root is None:
+        return {"text": "", "image_urls": []}
+
+    texts: List[str] = []
+    image_urls: List[str] = []
+    for node in tree.root.traverse(include_text=True):
+        tag = node.tag
+        if tag == "-text":
+            if node.parent.tag not in SKIPPED_TEXT_TAGS:
+                texts.append(node.text(deep=False))
+        elif tag == "img":
+            attributes = node.attributes
+            if "src" in attributes:
+                image_urls.append(absolutize_image_url(attributes["src"] or "", url))
+
+    return {"text": clean_text("".join(texts)), "image_urls": image_urls}
+
+PARSER_BACKENDS: Dict[str, ParserBackend] = {
+    "selectolax": parse_with_selectolax,
+    "lxml": parse_with_lxml,
+    "bs4": parse_with_bs4,
+}
+
+_BACKEND_MODULES = {
+    "selectolax": "selectolax.lexbor",
+    "lxml": "lxml.html",
+    "bs4": "bs4",
+}
+
+def is_backend_available(name: str) -> bool:
+    try:
+        __import__(_BACKEND_MODULES[name])
+    except ImportError:
+        return False
+    return True
+
+def select_backend(name: Optional[str] = None) -> str:
+    """
+    Resolves a backend name, falling back to BeautifulSoup when it is not installed.
+    """
+    name = (name or SCRAPER_PARSER).lower()
+    if name == "auto":
+        for candidate in ("selectolax", "lxml"):
+            if is_backend_available(candidate):
+                return candidate
+        return "bs4"
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    if not is_backend_available(name):
+        logger.warning(f"HTML parser backend '{name}' is not installed, falling back to bs4.")
+        return "bs4"
+    return name
+
+ACTIVE_BACKEND = select_backend()
+
+def extract_page(content: bytes, url: str, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extracts the visible text and absolute image URLs from an HTML page.
+
+    Args:
+        content: The raw HTML of the page.
+        url: The URL the page was fetched from, used to resolve relative image URLs.
+        backend: A backend name to use instead of the configured one.
+
+    Returns:
+        A dictionary containing the cleaned text and a list of image URLs.
+    """
+    name = select_backend(backend) if backend else ACTIVE_BACKEND
+    return PARSER_BACKENDS[name](content, url)
@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db import models
+
+logger = logging.getLogger(__name__)
+
+# Number of URLs inserted by one INSERT statement, well below the bind parameter limits
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+
+def normalize_urls(urls: Iterable[str]) -> List[str]:
+    """
+    Strips URLs and drops blanks and repeats, keeping the first occurrence's order.
+    """
+    return list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+
+def parse_ndjson_url(line: bytes) -> str:
+    """
+    Parses one NDJSON line, either a JSON string or an object with a `url` key.
+
+    Raises:
+        ValueError: If the line holds no URL.
+    """
+    try:
+        value = json.loads(line)
+    except ValueError:
+        raise ValueError("Invalid JSON.")
+    if isinstance(value, dict):
+        value = value.get("url")
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("Missing url.")
+    return value.strip()
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Splits a streamed request body into its non-blank lines.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+def insert_pending_items(db: Session, urls: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Creates pending items for the URLs that have none yet, in one `INSERT ... RETURNING`
+    per `INGEST_CHUNK_SIZE` URLs, and commits once.
+
+    Args:
+        db: The database session.
+        urls: Normalized URLs, see `normalize_urls`.
+
+    Returns:
+        The ids of the new items and the ids of the latest existing items, both keyed by URL.
+    """
+    inserted: Dict[str, int] = {}
+    for start in range(0, len(urls), INGEST_CHUNK_SIZE):
+        chunk = urls[start:start + INGEST_CHUNK_SIZE]
+        new_urls = sa.values(sa.column("url", sa.String), name="new_urls").data([(url,) for url in chunk]).cte()
+        statement = (
+            sa.insert(models.Item)
+            .from_select(
+                ["url", "status"],
+                sa.select(new_urls.c.url, sa.literal("pending"))
+                .where(~sa.exists().where(models.Item.url == new_urls.c.url)),
+            )
+            .returning(models.Item.id, models.Item.url)
+        )
+        inserted.update({url: item_id for item_id, url in db.execute(statement)})
+    db.commit()
+
+    duplicates = [url for url in urls if url not in inserted]
+    existing: Dict[str, int] = {}
+    for start in range(0, len(duplicates), INGEST_CHUNK_SIZE):
+        rows = (
+            db.query(models.Item.url, sa.func.max(models.Item.id))
+            .filter(models.Item.url.in_(duplicates[start:start + INGEST_CHUNK_SIZE]))
+            .group_by(models.Item.url)
+        )
+        existing.update(dict(rows.all()))
+    return inserted, existing
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db import models
+
+# Columns that may be requested with `fields=`
+ITEM_COLUMNS = tuple(column.name for column in models.Item.__table__.columns)
+# Columns the listing can be sorted by, newest or highest first. Each has an `(column, id)` index.
+SORT_KEYS = ("created_at", "roi_percent", "max_buy_price", "hallmark_confidence")
+
+def encode_cursor(key: Any, item_id: int, sort: str = "created_at") -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps({"s": sort, "k": key, "i": item_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str = "created_at") -> Tuple[Any, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["s"] != sort:
+            raise ValueError
+        key = payload["k"]
+        if key is not None:
+            key = datetime.fromisoformat(key) if sort == "created_at" else float(key)
+        return key, int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor.")
+
+def parse_fields(fields: Optional[str], default: Iterable[str]) -> List[str]:
+    """
+    Parses a comma-separated `fields=` projection. `id` is always included.
+    """
+    requested = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(default)
+    unknown = sorted(set(requested) - set(ITEM_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+def list_items(
+    db: Session,
+    fields: List[str],
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_roi_percent: Optional[float] = None,
+    min_max_buy_price: Optional[float] = None,
+    hallmark_label: Optional[str] = None,
+    min_hallmark_confidence: Optional[float] = None,
+    sort: str = "created_at",
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Lists items newest (or highest `sort` key) first with keyset pagination on `(sort, id)`.
+
+    Only the requested columns are selected, so the large Text columns stay in the
+    database unless asked for, and every page costs the same index range scan however
+    deep it is. Items without a value for a hot-field `sort` key are left out.
+
+    Returns:
+        The page of items as dictionaries and the cursor of the next page (None on the last page).
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort: {sort}.")
+    # SQLite stores server-default and ORM timestamps as differently formatted text, so
+    # timestamps are compared as Julian days there, in the filters and the keyset alike.
+    sqlite = db.get_bind().dialect.name == "sqlite"
+
+    def timestamp(value):
+        return func.julianday(value) if sqlite else value
+
+    columns = list(dict.fromkeys(fields + [sort]))
+    query = db.query(*[getattr(models.Item, column) for column in columns])
+    if status is not None:
+        query = query.filter(models.Item.status == status)
+    if min_score is not None:
+        query = query.filter(models.Item.score >= min_score)
+    if max_score is not None:
+        query = query.filter(models.Item.score <= max_score)
+    if created_after is not None:
+        query = query.filter(timestamp(models.Item.created_at) >= timestamp(created_after))
+    if created_before is not None:
+        query = query.filter(timestamp(models.Item.created_at) < timestamp(created_before))
+    if min_roi_percent is not None:
+        query = query.filter(models.Item.roi_percent >= min_roi_percent)
+    if min_max_buy_price is not None:
+        query = query.filter(models.Item.max_buy_price >= min_max_buy_price)
+    if hallmark_label is not None:
+        query = query.filter(models.Item.hallmark_label == hallmark_label)
+    if min_hallmark_confidence is not None:
+        query = query.filter(models.Item.hallmark_confidence >= min_hallmark_confidence)
+
+    sort_key = getattr(models.Item, sort)
+    if sort != "created_at":
+        query = query.filter(sort_key.isnot(None))
+    else:
+        sort_key = timestamp(sort_key)
+    if cursor is not None:
+        cursor_key, cursor_id = decode_cursor(cursor, sort)
+        if sort == "created_at":
+            cursor_key = timestamp(cursor_key)
+        query = query.filter(tuple_(sort_key, models.Item.id) < tuple_(cursor_key, cursor_id))
+
+    rows = query.order_by(sort_key.desc(), models.Item.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], sort), rows[-1].id, sort)
+    return [{field: getattr(row, field) for field in fields} for row in rows], next_cursor
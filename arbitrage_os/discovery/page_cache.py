@@ -0,0 +1,103 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db import models
+from arbitrage_os.db.scraped_page import ScrapedPage
+
+logger = logging.getLogger(__name__)
+
+# Fields copied from the previous analysis of a page when it has not changed
+REUSABLE_ITEM_FIELDS = (
+    "description",
+    "analysis",
+    "score",
+    "latitude",
+    "longitude",
+    "geohash",
+    "weight_grams",
+    "purity",
+    "image_urls",
+    "image_analysis_results",
+    "roi_analysis",
+    "hallmark_label",
+    "hallmark_confidence",
+)
+
+def get_cached_page(db: Session, url: str) -> Optional[Tuple[Dict[str, Any], models.Item]]:
+    """
+    Looks up the validators of the last scrape of `url` and the completed item that analyzed it.
+
+    Returns:
+        A `(validators, item)` tuple, or None when there is nothing to reuse. Validators
+        are only returned when a completed item exists for the cached content, so an
+        unchanged page can always be resolved without fetching it again.
+    """
+    return get_cached_pages(db, [url]).get(url)
+
+def get_cached_pages(db: Session, urls: Iterable[str]) -> Dict[str, Tuple[Dict[str, Any], models.Item]]:
+    """
+    Batch version of `get_cached_page`, keyed by URL. Runs one query for the pages and
+    one for the items that analyzed them.
+    """
+    pages = {
+        page.url: page
+        for page in db.query(ScrapedPage).filter(ScrapedPage.url.in_(set(urls)))
+        if page.content_hash
+    }
+    if not pages:
+        return {}
+
+    previous_items = (
+        db.query(models.Item)
+        .filter(
+            models.Item.url.in_(pages),
+            models.Item.content_hash.in_({page.content_hash for page in pages.values()}),
+            models.Item.status == "completed",
+        )
+        .order_by(models.Item.id.desc())
+    )
+    cached = {}
+    for item in previous_items:
+        page = pages[item.url]
+        # Items are newest first, so the first match of a page is its latest analysis.
+        if item.url not in cached and item.content_hash == page.content_hash:
+            validators = {"etag": page.etag, "last_modified": page.last_modified, "content_hash": page.content_hash}
+            cached[item.url] = (validators, item)
+    return cached
+
+def record_scraped_page(db: Session, url: str, scraped_data: Dict[str, Any]) -> None:
+    """
+    Stores the validators and content hash of a successful scrape. The caller commits.
+    """
+    if not scraped_data.get("content_hash"):
+        return
+    fields = {
+        "etag": scraped_data.get("etag"),
+        "last_modified": scraped_data.get("last_modified"),
+        "content_hash": scraped_data["content_hash"],
+        "last_fetched": datetime.now(),
+    }
+    page = db.query(ScrapedPage).filter(ScrapedPage.url == url).first()
+    if page is None:
+        try:
+            with db.begin_nested():
+                db.add(ScrapedPage(url=url, **fields))
+            return
+        except IntegrityError:
+            # Another worker recorded the same page first, update its row instead.
+            logger.debug(f"Scraped page {url} already recorded by another worker.")
+            page = db.query(ScrapedPage).filter(ScrapedPage.url == url).one()
+    for name, value in fields.items():
+        setattr(page, name, value)
+
+def copy_previous_analysis(source_item: models.Item, target_item: models.Item) -> None:
+    """
+    Copies the results of a previous analysis onto a new item for the same unchanged page.
+    """
+    for field in REUSABLE_ITEM_FIELDS:
+        setattr(target_item, field, getattr(source_item, field))
+    target_item.content_hash = source_item.content_hash
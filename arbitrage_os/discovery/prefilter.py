@@ -0,0 +1,95 @@
+import json
+import logging
+import math
+import os
+import re
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Listings scoring below this (1-10 scale) skip the LLM. Set to 0 to disable the pre-filter.
+PREFILTER_MIN_SCORE = float(os.getenv("PREFILTER_MIN_SCORE", "2"))
+# Optional trained linear model, a JSON file {"bias": float, "weights": {"cue": float}}
+# over the cue names below, e.g. exported logistic-regression coefficients.
+PREFILTER_MODEL_PATH = os.getenv("PREFILTER_MODEL_PATH")
+
+# Cues from the analysis prompt, with the default weight of each match.
+# "Strong" cues identify solid silver on their own and are never filtered out.
+CUE_PATTERNS = {
+    "sterling": (r"sterling", 3.0),
+    "purity_mark": (r"\.?925|\.?999|coin\s+silver|fine\s+silver|solid\s+silver|800\s+silver", 3.0),
+    "hallmark": (r"hallmark(?:s|ed)?", 2.0),
+    "heavy": (r"heavy", 1.0),
+    "antique": (r"antique", 1.0),
+    "estate": (r"estate", 1.0),
+    "flatware": (r"flatware", 1.0),
+    "tarnish": (r"tarnish(?:ed)?", 1.0),
+    "collection": (r"collection", 1.0),
+    "plated": (r"silver[\s-]?plated?|silverplate|plated?", -4.0),
+    "epns": (r"e\.?p\.?n\.?s\.?", -4.0),
+    "base_metal": (r"nickel\s+silver|german\s+silver|silver[\s-](?:tone|toned|colou?red)|stainless", -4.0),
+    # Generic mention last, so the more specific patterns above win at the same position.
+    "silver": (r"silver(?:ware)?", 1.0),
+}
+STRONG_CUES = frozenset(("sterling", "purity_mark", "hallmark"))
+
+# One alternation with a named group per cue, so a listing is scanned in a single pass.
+_CUE_REGEX = re.compile(
+    "|".join(rf"(?P<{name}>\b(?:{pattern})\b)" for name, (pattern, _) in CUE_PATTERNS.items()),
+    re.IGNORECASE,
+)
+
+def _load_model(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not path:
+        return None
+    try:
+        with open(path) as model_file:
+            model = json.load(model_file)
+        return {"bias": float(model.get("bias", 0.0)), "weights": {k: float(v) for k, v in model["weights"].items()}}
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load pre-filter model from {path}, using keyword weights: {e}")
+        return None
+
+_model = _load_model(PREFILTER_MODEL_PATH)
+
+def count_cues(description: str) -> Dict[str, int]:
+    """
+    Counts the matches of each cue in a listing in one pass over the text.
+    """
+    counts: Dict[str, int] = {}
+    for match in _CUE_REGEX.finditer(description):
+        counts[match.lastgroup] = counts.get(match.lastgroup, 0) + 1
+    return counts
+
+def score_listing(description: str, min_score: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Scores a listing locally for the likelihood of valuable silver, on the same 1-10 scale as the LLM.
+
+    Args:
+        description: The text description of the sale.
+        min_score: The threshold below which the listing should skip the LLM.
+            Defaults to `PREFILTER_MIN_SCORE`.
+
+    Returns:
+        A dictionary with the local `score`, the matched `cues`, whether the listing
+        `passed` the threshold, and a one-sentence `reasoning`.
+    """
+    threshold = PREFILTER_MIN_SCORE if min_score is None else min_score
+    counts = count_cues(description)
+
+    if _model is not None:
+        logit = _model["bias"] + sum(_model["weights"].get(cue, 0.0) * n for cue, n in counts.items())
+        score = 1 + 9 / (1 + math.exp(-logit))
+    else:
+        # Repeated mentions add little, so only the presence of each cue counts.
+        score = min(10.0, max(1.0, 1 + sum(CUE_PATTERNS[cue][1] for cue in counts)))
+
+    strong = STRONG_CUES.intersection(counts)
+    passed = bool(strong) or score >= threshold
+    if passed:
+        reasoning = f"Local pre-filter passed with cues: {', '.join(sorted(counts)) or 'none'}."
+    elif counts:
+        reasoning = f"Local pre-filter: no solid-silver cues, only {', '.join(sorted(counts))}."
+    else:
+        reasoning = "Local pre-filter: no silver keywords found."
+    return {"score": round(score, 1), "cues": counts, "passed": passed, "reasoning": reasoning}
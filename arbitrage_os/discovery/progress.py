@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+import redis.asyncio as aioredis
+
+from arbitrage_os.clients import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Pipeline progress is published on the Celery broker unless a separate Redis is given.
+PROGRESS_REDIS_URL = os.getenv("PROGRESS_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+PROGRESS_CHANNEL_PREFIX = "arbitrage_os:items:"
+# Idle SSE streams send a comment this often, so proxies keep the connection open.
+PROGRESS_HEARTBEAT_SECONDS = float(os.getenv("PROGRESS_HEARTBEAT_SECONDS", "15"))
+
+# Statuses after which an item's pipeline publishes nothing more
+TERMINAL_STATUSES = ("completed", "filtered", "failed_scraping", "failed")
+
+def item_channel(item_id: int) -> str:
+    return f"{PROGRESS_CHANNEL_PREFIX}{item_id}"
+
+def publish_progress(item_id: int, status: str, **details: Any) -> None:
+    """
+    Publishes a pipeline stage transition of an item. Progress is best-effort: a Redis
+    outage is logged and never fails the pipeline.
+
+    Args:
+        item_id: The item's id.
+        status: The stage the item entered, e.g. "scraping" or "completed".
+        **details: Extra JSON-serializable fields of the event.
+    """
+    event = {"item_id": item_id, "status": status, "at": datetime.utcnow().isoformat(), **details}
+    try:
+        get_redis_client(PROGRESS_REDIS_URL).publish(item_channel(item_id), json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Failed to publish progress of item {item_id}: {e}")
+
+def publish_progress_many(item_ids: Iterable[int], status: str) -> None:
+    """
+    Publishes the same stage transition of many items in one round trip.
+    """
+    at = datetime.utcnow().isoformat()
+    try:
+        pipeline = get_redis_client(PROGRESS_REDIS_URL).pipeline(transaction=False)
+        for item_id in item_ids:
+            pipeline.publish(item_channel(item_id), json.dumps({"item_id": item_id, "status": status, "at": at}))
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Failed to publish progress of a batch of items: {e}")
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+
+async def stream_progress(
+    item_id: Optional[int] = None,
+    current: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None,
+    redis_url: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Streams pipeline progress as Server-Sent Events, of one item or of every item.
+
+    A single item's stream ends after its terminal status; the all-items stream runs
+    until the client disconnects.
+
+    Args:
+        item_id: The item to follow, or None for all items.
+        current: Returns the item's current state as an event. It is sent first, once
+            subscribed, so a transition between the two is never missed.
+        redis_url: The Redis to subscribe to, defaults to `PROGRESS_REDIS_URL`.
+
+    Yields:
+        SSE-formatted events and heartbeat comments.
+    """
+    client = aioredis.from_url(redis_url or PROGRESS_REDIS_URL)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        if item_id is None:
+            await pubsub.psubscribe(f"{PROGRESS_CHANNEL_PREFIX}*")
+        else:
+            await pubsub.subscribe(item_channel(item_id))
+        if current is not None:
+            event = await current()
+            if event is not None:
+                yield format_sse(event)
+                if item_id is not None and event.get("status") in TERMINAL_STATUSES:
+                    return
+        while True:
+            message = await pubsub.get_message(timeout=PROGRESS_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                event = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            yield format_sse(event)
+            if item_id is not None and event.get("status") in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
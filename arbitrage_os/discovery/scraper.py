@@ -1,55 +1,93 @@
+import hashlib
 import logging
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Mapping, Optional
+
+from arbitrage_os.clients import get_http_session
+from arbitrage_os.discovery.html_parser import extract_page
 
 logger = logging.getLogger(__name__)
 
-def scrape_url(url: str) -> Dict[str, Any]:
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def parse_html(content: bytes, url: str) -> Dict[str, Any]:
     """
-    Scrapes a URL for its textual content and image URLs using requests and BeautifulSoup.
+    Extracts the visible text and absolute image URLs from an HTML page using the
+    configured parser backend (see `arbitrage_os.discovery.html_parser`).
 
     Args:
-        url: The URL to scrape.
+        content: The raw HTML of the page.
+        url: The URL the page was fetched from, used to resolve relative image URLs.
 
     Returns:
-        A dictionary containing the scraped content as a string and a list of image URLs,
-        or an empty string and empty list if scraping fails.
+        A dictionary containing the cleaned text and a list of image URLs.
     """
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()  # Raise an exception for bad status codes
+    return extract_page(content, url)
+
+def build_request_headers(cached: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """
+    Builds the request headers, adding conditional-GET validators from a previous scrape.
+    """
+    headers = {
+        'User-Agent': USER_AGENT
+    }
+    if cached:
+        if cached.get("etag"):
+            headers['If-None-Match'] = cached["etag"]
+        if cached.get("last_modified"):
+            headers['If-Modified-Since'] = cached["last_modified"]
+    return headers
+
+def process_response(
+    status_code: int,
+    headers: Mapping[str, str],
+    content: bytes,
+    url: str,
+    cached: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Turns a fetched page into a scrape result, skipping the parse when the page is unchanged.
+
+    A page is unchanged when the server answered `304 Not Modified` or when the body
+    hashes to the same value as the previous scrape. Unchanged results carry
+    `"unchanged": True` and no text or image URLs.
+    """
+    validators = {
+        "etag": headers.get("ETag") or (cached or {}).get("etag"),
+        "last_modified": headers.get("Last-Modified") or (cached or {}).get("last_modified"),
+    }
+    if status_code == 304 and cached:
+        return {"text": "", "image_urls": [], "unchanged": True, "content_hash": cached.get("content_hash"), **validators}
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    if cached and cached.get("content_hash") == content_hash:
+        return {"text": "", "image_urls": [], "unchanged": True, "content_hash": content_hash, **validators}
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+    return {**parse_html(content, url), "unchanged": False, "content_hash": content_hash, **validators}
 
-        # Extract image URLs
-        image_urls = []
-        for img in soup.find_all('img', src=True):
-            src = img['src']
-            # Make sure the URL is absolute
-            if src.startswith('//'):
-                src = 'http:' + src
-            elif src.startswith('/'):
-                src = requests.compat.urljoin(url, src)
-            image_urls.append(src)
+def scrape_url(url: str, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Scrapes a URL for its textual content and image URLs, fetched with requests and parsed
+    by the configured HTML parser backend (see `arbitrage_os.discovery.html_parser`).
 
-        # Remove script and style elements
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.decompose()
+    Args:
+        url: The URL to scrape.
+        cached: The `etag`, `last_modified` and `content_hash` of a previous scrape of
+            this URL. When given, the request is conditional and an unchanged page is
+            not parsed again.
 
-        # Get text and clean it up
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        cleaned_text = '\n'.join(chunk for chunk in chunks if chunk)
+    Returns:
+        A dictionary containing the scraped content as a string and a list of image URLs,
+        or an empty string and empty list if scraping fails. It also carries the page's
+        `content_hash`, `etag` and `last_modified`, and whether it is `unchanged`.
+    """
+    try:
+        headers = build_request_headers(cached)
+        response = get_http_session().get(url, headers=headers, timeout=10)
+        response.raise_for_status()  # Raise an exception for bad status codes
 
-        return {"text": cleaned_text, "image_urls": image_urls}
+        return process_response(response.status_code, response.headers, response.content, url, cached)
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Error scraping URL {url}: {e}")
         return {"text": "", "image_urls": []}
-
-
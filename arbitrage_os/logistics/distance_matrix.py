@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+
+from arbitrage_os.clients import get_http_client
+from arbitrage_os.db import database
+from arbitrage_os.db.distance_cache import DistanceCacheEntry
+from arbitrage_os.logistics.tsp import haversine_block
+
+logger = logging.getLogger(__name__)
+
+# Matrix configuration
+# Coordinates are rounded to this many decimals (5 is about one meter) before caching.
+COORDINATE_PRECISION = int(os.getenv("COORDINATE_PRECISION", "5"))
+DISTANCE_MATRIX_TILE = int(os.getenv("DISTANCE_MATRIX_TILE", "1024"))
+DISTANCE_MATRIX_DIR = os.getenv("DISTANCE_MATRIX_DIR", os.path.join(tempfile.gettempdir(), "arbitrage_os_matrices"))
+DISTANCE_MATRIX_MAX_FILES = int(os.getenv("DISTANCE_MATRIX_MAX_FILES", "256"))
+# Used to turn straight-line distances into duration estimates.
+ROUTING_AVERAGE_SPEED_KMH = float(os.getenv("ROUTING_AVERAGE_SPEED_KMH", "40"))
+# Optional OSRM-compatible table service for road distances, e.g. http://localhost:5000
+OSRM_URL = os.getenv("OSRM_URL")
+OSRM_PROFILE = os.getenv("OSRM_PROFILE", "driving")
+# OSRM's default --max-table-size is 100 coordinates per request.
+OSRM_TABLE_MAX_COORDINATES = int(os.getenv("OSRM_TABLE_MAX_COORDINATES", "100"))
+
+class DistanceMatrix(NamedTuple):
+    distance: np.ndarray  # meters, inf where no route exists
+    duration: np.ndarray  # seconds
+    source: str
+
+def coordinate_key(lat: float, lng: float) -> str:
+    return f"{round(lat, COORDINATE_PRECISION):.{COORDINATE_PRECISION}f},{round(lng, COORDINATE_PRECISION):.{COORDINATE_PRECISION}f}"
+
+def haversine_tiled(lats: np.ndarray, lngs: np.ndarray, tile: int = DISTANCE_MATRIX_TILE,
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Computes the haversine matrix tile by tile, so the temporaries stay at `tile` x `tile`
+    however many points there are. `out` may be a memory-mapped array.
+    """
+    n = len(lats)
+    if out is None:
+        out = np.empty((n, n), dtype=np.float64)
+    for row in range(0, n, tile):
+        rows = slice(row, min(row + tile, n))
+        for col in range(0, n, tile):
+            cols = slice(col, min(col + tile, n))
+            out[rows, cols] = haversine_block(lats[rows], lngs[rows], lats[cols], lngs[cols])
+    return out
+
+def fetch_osrm_table(points: List[Tuple[float, float]], sources: List[int],
+                     destinations: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fetches one block of road distances and durations from an OSRM-compatible table service.
+
+    Args:
+        points: (lat, lng) pairs sent in the request.
+        sources: Indices into `points` for the rows.
+        destinations: Indices into `points` for the columns.
+
+    Returns:
+        The (distance, duration) blocks, with inf where the service found no route.
+    """
+    coords_str = ";".join(f"{lng},{lat}" for lat, lng in points)
+    url = f"{OSRM_URL.rstrip('/')}/table/v1/{OSRM_PROFILE}/{coords_str}"
+    params = {
+        "sources": ";".join(map(str, sources)),
+        "destinations": ";".join(map(str, destinations)),
+        "annotations": "distance,duration",
+    }
+    response = get_http_client().get(url, params=params, timeout=30)
+    response.raise_for_status()
+    result = response.json()
+    if result.get("code") != "Ok":
+        raise RuntimeError(f"OSRM table error: {result.get('message')}")
+    distance = np.array(result["distances"], dtype=float)
+    duration = np.array(result["durations"], dtype=float)
+    # OSRM returns null for unreachable pairs, which NumPy reads as NaN.
+    return np.nan_to_num(distance, nan=np.inf), np.nan_to_num(duration, nan=np.inf)
+
+def _load_cached_pairs(keys: List[str], source: str) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    db = database.SessionLocal()
+    try:
+        rows = db.query(
+            DistanceCacheEntry.origin_key, DistanceCacheEntry.destination_key,
+            DistanceCacheEntry.distance_m, DistanceCacheEntry.duration_s,
+        ).filter(
+            DistanceCacheEntry.source == source,
+            DistanceCacheEntry.origin_key.in_(keys),
+            DistanceCacheEntry.destination_key.in_(keys),
+        ).all()
+    except Exception as e:
+        logger.warning(f"Distance cache lookup failed: {e}")
+        rows = []
+    finally:
+        db.close()
+    return {
+        (origin, destination): (np.inf if distance is None else distance, np.inf if duration is None else duration)
+        for origin, destination, distance, duration in rows
+    }
+
+def _store_pairs(pairs: List[dict]) -> None:
+    if not pairs:
+        return
+    db = database.SessionLocal()
+    try:
+        db.bulk_insert_mappings(DistanceCacheEntry, pairs)
+        db.commit()
+    except IntegrityError:
+        # Another worker cached some of the same pairs concurrently; they will be read next time.
+        db.rollback()
+    except Exception as e:
+        logger.warning(f"Could not persist distance cache entries: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def _request_osrm_block(keys: List[str], points: List[Tuple[float, float]], rows: np.ndarray, cols: np.ndarray,
+                        distance: np.ndarray, duration: np.ndarray) -> None:
+    """
+    Fills the missing (NaN) cells of `rows` x `cols` in place, in requests within the service's size limit.
+    """
+    chunk = max(1, OSRM_TABLE_MAX_COORDINATES // 2)
+    stored_at = datetime.utcnow()
+    for row in range(0, len(rows), chunk):
+        for col in range(0, len(cols), chunk):
+            block = np.ix_(rows[row:row + chunk], cols[col:col + chunk])
+            block_missing = np.isnan(distance[block])
+            if not block_missing.any():
+                continue
+            block_rows = rows[row:row + chunk][block_missing.any(axis=1)]
+            block_cols = cols[col:col + chunk][block_missing.any(axis=0)]
+            needed = sorted(set(block_rows.tolist()) | set(block_cols.tolist()))
+            local = {point: i for i, point in enumerate(needed)}
+            block_distance, block_duration = fetch_osrm_table(
+                [points[i] for i in needed], [local[i] for i in block_rows], [local[i] for i in block_cols]
+            )
+            pairs = []
+            for r, c in zip(*np.nonzero(np.isnan(distance[np.ix_(block_rows, block_cols)]))):
+                origin, destination = block_rows[r], block_cols[c]
+                distance[origin, destination] = block_distance[r, c]
+                duration[origin, destination] = block_duration[r, c]
+                pairs.append({
+                    "source": "osrm",
+                    "origin_key": keys[origin],
+                    "destination_key": keys[destination],
+                    "distance_m": None if np.isinf(block_distance[r, c]) else float(block_distance[r, c]),
+                    "duration_s": None if np.isinf(block_duration[r, c]) else float(block_duration[r, c]),
+                    "stored_at": stored_at,
+                })
+            _store_pairs(pairs)
+
+def _osrm_matrix(keys: List[str], points: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the road matrix from the pairwise cache, requesting only missing pairs in chunks.
+    """
+    n = len(keys)
+    distance = np.full((n, n), np.nan)
+    duration = np.full((n, n), np.nan)
+    np.fill_diagonal(distance, 0.0)
+    np.fill_diagonal(duration, 0.0)
+    index = {key: i for i, key in enumerate(keys)}
+    for (origin, destination), (dist, dur) in _load_cached_pairs(keys, "osrm").items():
+        distance[index[origin], index[destination]] = dist
+        duration[index[origin], index[destination]] = dur
+
+    if np.isnan(distance).any():
+        logger.info(f"Requesting {int(np.isnan(distance).sum())} of {n * n} road distances from OSRM")
+        # New stops are requested as whole rows first; what is left is usually a few columns
+        # of new destinations for known origins. Neither pass re-requests cached pairs.
+        new_rows = np.nonzero(np.isnan(distance).sum(axis=1) * 2 > n - 1)[0]
+        _request_osrm_block(keys, points, new_rows, np.arange(n), distance, duration)
+        missing = np.isnan(distance)
+        _request_osrm_block(
+            keys, points, np.nonzero(missing.any(axis=1))[0], np.nonzero(missing.any(axis=0))[0], distance, duration
+        )
+    return distance, duration
+
+def _matrix_paths(keys: List[str], source: str) -> Tuple[str, str]:
+    digest = hashlib.sha256(f"{source}\x00{';'.join(keys)}".encode("utf-8")).hexdigest()
+    base = os.path.join(DISTANCE_MATRIX_DIR, digest)
+    return f"{base}.distance.npy", f"{base}.duration.npy"
+
+def _save_matrix(path: str, matrix: np.ndarray) -> None:
+    # Write to a temporary file first so concurrent readers never map a partial matrix.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as matrix_file:
+        np.save(matrix_file, matrix)
+    os.replace(tmp_path, path)
+
+def _prune_matrix_files() -> None:
+    try:
+        files = [os.path.join(DISTANCE_MATRIX_DIR, name) for name in os.listdir(DISTANCE_MATRIX_DIR)
+                 if name.endswith(".npy")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[DISTANCE_MATRIX_MAX_FILES * 2:]:
+            os.remove(path)
+    except OSError as e:
+        logger.debug(f"Could not prune distance matrix files: {e}")
+
+def _load_or_build(keys: List[str], points: List[Tuple[float, float]], source: str) -> Tuple[np.ndarray, np.ndarray]:
+    distance_path, duration_path = _matrix_paths(keys, source)
+    try:
+        distance = np.load(distance_path, mmap_mode="r")
+        duration = np.load(duration_path, mmap_mode="r")
+        if distance.shape == duration.shape == (len(keys), len(keys)):
+            os.utime(distance_path)
+            os.utime(duration_path)
+            return distance, duration
+    except (OSError, ValueError):
+        pass
+
+    if source == "osrm":
+        distance, duration = _osrm_matrix(keys, points)
+    else:
+        lats = np.array([lat for lat, _ in points])
+        lngs = np.array([lng for _, lng in points])
+        distance = haversine_tiled(lats, lngs)
+        duration = distance / (ROUTING_AVERAGE_SPEED_KMH / 3.6)
+
+    try:
+        os.makedirs(DISTANCE_MATRIX_DIR, exist_ok=True)
+        _save_matrix(distance_path, distance)
+        _save_matrix(duration_path, duration)
+        _prune_matrix_files()
+    except OSError as e:
+        logger.warning(f"Could not persist distance matrix: {e}")
+    return distance, duration
+
+def build_distance_matrix(coordinates: List[dict], source: Optional[str] = None) -> DistanceMatrix:
+    """
+    Returns the distance and duration matrices for a list of stops.
+
+    Coordinates are rounded and deduplicated. The matrix for a given set of points is stored
+    as .npy files and memory-mapped on reuse, so any worker can load it without recomputing.
+    Road matrices also read and extend the persistent pairwise cache, so a stop set that
+    overlaps an earlier one only requests the new pairs, in chunks, from the OSRM service.
+
+    Args:
+        coordinates: A list of dictionaries, each with "lat" and "lng" keys.
+        source: "osrm" or "haversine". Defaults to "osrm" when `OSRM_URL` is set.
+
+    Returns:
+        A `DistanceMatrix` indexed like `coordinates`.
+    """
+    source = source or ("osrm" if OSRM_URL else "haversine")
+    if source == "osrm" and not OSRM_URL:
+        raise ValueError("OSRM_URL environment variable not set.")
+    if source not in ("osrm", "haversine"):
+        raise ValueError(f"Unknown distance matrix source: {source}")
+
+    stop_keys = [coordinate_key(coord["lat"], coord["lng"]) for coord in coordinates]
+    keys = sorted(set(stop_keys))
+    points = [tuple(float(part) for part in key.split(",")) for key in keys]
+    distance, duration = _load_or_build(keys, points, source)
+
+    # Map the unique sorted points back onto the requested stops.
+    position = {key: i for i, key in enumerate(keys)}
+    index = np.array([position[key] for key in stop_keys], dtype=int)
+    if len(keys) == len(stop_keys) and np.array_equal(index, np.arange(len(keys))):
+        return DistanceMatrix(distance, duration, source)
+    grid = np.ix_(index, index)
+    return DistanceMatrix(np.asarray(distance[grid]), np.asarray(duration[grid]), source)
@@ -0,0 +1,120 @@
+import csv
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional offline address index, a CSV extract in OpenAddresses layout
+# (LON, LAT, NUMBER, STREET, CITY, REGION, POSTCODE columns; extra columns are ignored).
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")
+
+STREET_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "road": "rd",
+    "drive": "dr",
+    "boulevard": "blvd",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "terrace": "ter",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "circle": "cir",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def normalize_address(address: str) -> str:
+    """
+    Normalizes an address for cache and gazetteer lookups: lowercase, no punctuation,
+    single spaces and abbreviated street types and directions.
+    """
+    words = _NON_ALNUM.sub(" ", address.lower()).split()
+    return " ".join(STREET_ABBREVIATIONS.get(word, word) for word in words)
+
+class Gazetteer:
+    """
+    In-memory index from normalized addresses to coordinates.
+
+    Each row is indexed as "number street", "number street city" and
+    "number street city region postcode", so common ways of writing the same
+    address resolve without any network call. A key shared by different addresses
+    (e.g. "123 main st" in two cities) is dropped, so it falls through to the geocoder.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, Tuple[float, float, str]] = {}
+        self._ambiguous: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, number: str, street: str, city: str = "", region: str = "", postcode: str = "",
+            lat: float = 0.0, lng: float = 0.0) -> None:
+        formatted = ", ".join(part for part in (f"{number} {street}".strip(), city, region, postcode) if part)
+        entry = (lat, lng, formatted)
+        base = f"{number} {street}"
+        for key in (base, f"{base} {city}", f"{base} {city} {region}", f"{base} {city} {region} {postcode}"):
+            key = normalize_address(key)
+            if not key or key in self._ambiguous:
+                continue
+            existing = self._index.setdefault(key, entry)
+            # Repeated rows of one address (e.g. units) share a key; different addresses must not.
+            if existing[2] != formatted:
+                del self._index[key]
+                self._ambiguous.add(key)
+
+    def lookup(self, address: str) -> Optional[Dict[str, object]]:
+        """
+        Resolves an address to coordinates, or returns None when it is not indexed.
+        """
+        entry = self._index.get(normalize_address(address))
+        if entry is None:
+            return None
+        lat, lng, formatted = entry
+        return {"latitude": lat, "longitude": lng, "formatted_address": formatted}
+
+    @classmethod
+    def from_csv(cls, path: str) -> "Gazetteer":
+        gazetteer = cls()
+        with open(path, newline="", encoding="utf-8") as csv_file:
+            for row in csv.DictReader(csv_file):
+                row = {key.upper(): (value or "").strip() for key, value in row.items() if key}
+                try:
+                    lat, lng = float(row["LAT"]), float(row["LON"])
+                except (KeyError, ValueError):
+                    continue
+                gazetteer.add(
+                    row.get("NUMBER", ""), row.get("STREET", ""), row.get("CITY", ""),
+                    row.get("REGION", ""), row.get("POSTCODE", ""), lat=lat, lng=lng,
+                )
+        logger.info(f"Loaded {len(gazetteer)} gazetteer keys from {path}")
+        return gazetteer
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """
+    Returns the offline gazetteer configured by `GAZETTEER_PATH`, loading it on first use.
+    """
+    global _gazetteer, _gazetteer_loaded
+    if not _gazetteer_loaded:
+        with _gazetteer_lock:
+            if not _gazetteer_loaded:
+                if GAZETTEER_PATH:
+                    try:
+                        _gazetteer = Gazetteer.from_csv(GAZETTEER_PATH)
+                    except OSError as e:
+                        logger.error(f"Could not load gazetteer from {GAZETTEER_PATH}: {e}")
+                _gazetteer_loaded = True
+    return _gazetteer
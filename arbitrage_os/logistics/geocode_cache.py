@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from arbitrage_os.db import database
+from arbitrage_os.db.geocode_cache import GeocodeCacheEntry
+from arbitrage_os.logistics.gazetteer import normalize_address
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+GEOCODE_CACHE_TTL_SECONDS = int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL_SECONDS = int(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", str(24 * 3600)))
+GEOCODE_MEMORY_CACHE_SIZE = int(os.getenv("GEOCODE_MEMORY_CACHE_SIZE", "10000"))
+
+class GeocodeCache:
+    """
+    Two-tier geocode cache: a bounded in-process LRU in front of the `geocode_cache` table.
+
+    Keys are normalized addresses, so the raw and the LLM-cleaned form of an address
+    can both be stored. Failed lookups are cached as negative results with a shorter TTL.
+    """
+
+    def __init__(self, max_size: int = GEOCODE_MEMORY_CACHE_SIZE):
+        self._max_size = max_size
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    @staticmethod
+    def _is_fresh(result: Dict[str, Any], stored_at: datetime) -> bool:
+        ttl = GEOCODE_CACHE_TTL_SECONDS if result["latitude"] is not None else GEOCODE_NEGATIVE_TTL_SECONDS
+        return stored_at >= datetime.utcnow() - timedelta(seconds=ttl)
+
+    def _remember(self, key: str, result: Dict[str, Any], stored_at: datetime) -> None:
+        with self._lock:
+            self._memory[key] = (result, stored_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._max_size:
+                self._memory.popitem(last=False)
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached result for an address (possibly a negative one), or None on a miss.
+        """
+        key = normalize_address(address)
+        if not key:
+            return None
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if self._is_fresh(*cached):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return cached[0]
+                del self._memory[key]
+
+        db = database.SessionLocal()
+        try:
+            entry = db.query(GeocodeCacheEntry).filter(GeocodeCacheEntry.address_key == key).first()
+        except Exception as e:
+            logger.warning(f"Geocode cache lookup failed: {e}")
+            entry = None
+        finally:
+            db.close()
+
+        if entry is not None:
+            result = {
+                "latitude": entry.latitude if entry.found else None,
+                "longitude": entry.longitude if entry.found else None,
+                "formatted_address": entry.formatted_address if entry.found else None,
+            }
+            if self._is_fresh(result, entry.stored_at):
+                self._remember(key, result, entry.stored_at)
+                with self._lock:
+                    self._stats["db_hits"] += 1
+                return result
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, addresses: Iterable[str], result: Dict[str, Any], source: str = "nominatim") -> None:
+        """
+        Stores one result under every given address form (e.g. raw and cleaned).
+        """
+        keys = {normalize_address(address) for address in addresses if address}
+        keys.discard("")
+        if not keys:
+            return
+        stored_at = datetime.utcnow()
+        for key in keys:
+            self._remember(key, result, stored_at)
+
+        found = result.get("latitude") is not None
+        db = database.SessionLocal()
+        try:
+            for key in keys:
+                entry = db.query(GeocodeCacheEntry).filter(GeocodeCacheEntry.address_key == key).first()
+                if entry is None:
+                    entry = GeocodeCacheEntry(address_key=key)
+                    db.add(entry)
+                entry.latitude = result.get("latitude")
+                entry.longitude = result.get("longitude")
+                entry.formatted_address = result.get("formatted_address")
+                entry.found = found
+                entry.source = source
+                entry.stored_at = stored_at
+            db.commit()
+        except IntegrityError:
+            # Another worker cached the same address concurrently.
+            db.rollback()
+        except Exception as e:
+            logger.warning(f"Could not persist geocode cache entry: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        return stats
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+geocode_cache = GeocodeCache()
@@ -1,31 +1,112 @@
+import asyncio
+import json
 import logging
 import os
-from openai import OpenAI
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
 from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
+
+from arbitrage_os import clients
+from arbitrage_os.logistics.gazetteer import get_gazetteer, normalize_address
+from arbitrage_os.logistics.geocode_cache import geocode_cache
+from arbitrage_os.logistics.rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
-def geocode_address(address: str) -> dict:
+# Request budget for the geocoding service. The public Nominatim policy allows one
+# request per second; raise these only for a self-hosted instance.
+GEOCODER_REQUESTS_PER_SECOND = float(os.getenv("GEOCODER_REQUESTS_PER_SECOND", "1"))
+GEOCODER_BURST = int(os.getenv("GEOCODER_BURST", "1"))
+
+# Shared by every caller in the process, synchronous and async alike.
+geocoder_rate_limit = TokenBucket(GEOCODER_REQUESTS_PER_SECOND, GEOCODER_BURST)
+
+CLEANUP_SYSTEM_PROMPT = """
+    You are a geocoding expert. Your task is to convert a messy, unstructured, or colloquial address into a standard, machine-readable street address format that a geocoding API can understand.
+    For example, if you receive 'Corner of 5th and Main, blue house', you should return something like '5th Street and Main Street'.
+    Return only the cleaned address string and nothing else.
     """
-    Converts a string address into geographic coordinates (latitude and longitude).
 
-    Args:
-        address: The address string to geocode.
+BATCH_CLEANUP_SYSTEM_PROMPT = """
+    You are a geocoding expert. You will receive a JSON object {"addresses": [...]} of messy, unstructured, or colloquial addresses.
+    Convert each one into a standard, machine-readable street address format that a geocoding API can understand.
+    For example, 'Corner of 5th and Main, blue house' becomes something like '5th Street and Main Street'.
+    Return a JSON object {"addresses": [...]} with exactly one cleaned address string per input, in the same order.
+    """
+
+def get_geolocator() -> Nominatim:
+    """
+    Returns the shared Nominatim client. Callers must respect `geocoder_rate_limit`.
+    """
+    return clients.get_geolocator()
+
+def get_rate_limited_geocoder() -> Callable:
+    """
+    Returns a geocode function that waits for the process-wide rate limit before each request.
+    Errors are raised rather than swallowed so they are not cached as "not found".
+    """
+    geolocator = get_geolocator()
+
+    def geocode(address: str):
+        geocoder_rate_limit.acquire()
+        return geolocator.geocode(address)
+
+    return geocode
+
+def lookup_offline(address: str) -> Optional[dict]:
+    """
+    Resolves an address from the geocode cache or the offline gazetteer, without any network call.
 
     Returns:
-        A dictionary containing the latitude and longitude.
+        The geocoding result (possibly a cached negative one), or None when the address is unknown.
     """
-    geolocator = Nominatim(user_agent="arbitrage_os")
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
-    
-    location = geocode(address)
+    cached = geocode_cache.get(address)
+    if cached is not None:
+        return cached
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        return gazetteer.lookup(address)
+    return None
+
+def _lookup_offline_and_alias(address: str, aliases: List[str]) -> Optional[dict]:
+    result = lookup_offline(address)
+    if result is not None and aliases:
+        geocode_cache.set(aliases, result)
+    return result
+
+def _geocode_online(geocode: Callable, address: str, aliases: List[str]) -> dict:
+    try:
+        location = geocode(address)
+    except Exception as e:
+        logger.error(f"Geocoding service error for address {address}: {e}")
+        return {"latitude": None, "longitude": None, "formatted_address": None}
 
     if location:
-        return {"latitude": location.latitude, "longitude": location.longitude, "formatted_address": location.address}
+        result = {"latitude": location.latitude, "longitude": location.longitude, "formatted_address": location.address}
     else:
         logger.warning(f"Geocoding failed for address: {address}")
-        return {"latitude": None, "longitude": None, "formatted_address": None}
+        result = {"latitude": None, "longitude": None, "formatted_address": None}
+    geocode_cache.set([address, *aliases], result)
+    return result
+
+def geocode_address(address: str, aliases: Iterable[str] = ()) -> dict:
+    """
+    Converts a string address into geographic coordinates (latitude and longitude).
+
+    Results, including failed lookups, are cached under the address and its `aliases`.
+
+    Args:
+        address: The address string to geocode.
+        aliases: Other forms of the same address, such as the raw text it was cleaned from.
+
+    Returns:
+        A dictionary containing the latitude and longitude.
+    """
+    aliases = [alias for alias in aliases if alias]
+    result = _lookup_offline_and_alias(address, aliases)
+    if result is not None:
+        return result
+    return _geocode_online(get_rate_limited_geocoder(), address, aliases)
 
 def cleanup_and_geocode(messy_address: str) -> dict:
     """
@@ -39,24 +120,23 @@ def cleanup_and_geocode(messy_address: str) -> dict:
     Returns:
         A dictionary with coordinates.
     """
+    # Repeated addresses are served from the cache without the LLM round trip.
+    cached = lookup_offline(messy_address)
+    if cached is not None:
+        return cached
+
     if not os.getenv("OPENAI_API_KEY"):
         logger.error("OPENAI_API_KEY environment variable not set.")
         raise ValueError("OPENAI_API_KEY environment variable not set.")
 
-    client = OpenAI()
-    
-    system_prompt = """
-    You are a geocoding expert. Your task is to convert a messy, unstructured, or colloquial address into a standard, machine-readable street address format that a geocoding API can understand.
-    For example, if you receive 'Corner of 5th and Main, blue house', you should return something like '5th Street and Main Street'.
-    Return only the cleaned address string and nothing else.
-    """
+    client = clients.get_openai_client()
 
     cleaned_address = messy_address.strip()
     try:
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": CLEANUP_SYSTEM_PROMPT},
                 {"role": "user", "content": messy_address},
             ],
             temperature=0,
@@ -67,4 +147,108 @@ def cleanup_and_geocode(messy_address: str) -> dict:
         # Fallback to the original address if LLM cleaning fails
         pass
 
-    return geocode_address(cleaned_address)
+    return geocode_address(cleaned_address, aliases=[messy_address])
+
+def clean_addresses(messy_addresses: List[str]) -> List[str]:
+    """
+    Cleans many messy address strings with a single LLM call.
+
+    Requires the `OPENAI_API_KEY` environment variable.
+
+    Args:
+        messy_addresses: Potentially unstructured addresses.
+
+    Returns:
+        The cleaned addresses, in input order. The original (stripped) addresses are
+        returned if the LLM call fails or does not answer one address per input.
+    """
+    fallback = [address.strip() for address in messy_addresses]
+    if not messy_addresses:
+        return fallback
+
+    if not os.getenv("OPENAI_API_KEY"):
+        logger.error("OPENAI_API_KEY environment variable not set.")
+        raise ValueError("OPENAI_API_KEY environment variable not set.")
+
+    client = clients.get_openai_client()
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": BATCH_CLEANUP_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({"addresses": messy_addresses})},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0,
+        )
+        cleaned = json.loads(response.choices[0].message.content)["addresses"]
+    except Exception as e:
+        logger.warning(f"LLM batch address cleaning failed: {e}. Falling back to original addresses.")
+        return fallback
+
+    if not isinstance(cleaned, list) or len(cleaned) != len(messy_addresses):
+        logger.warning("LLM batch address cleaning returned a mismatched list. Falling back to original addresses.")
+        return fallback
+    return [
+        address.strip() if isinstance(address, str) and address.strip() else original
+        for address, original in zip(cleaned, fallback)
+    ]
+
+async def _geocode_cleaned_async(address: str, aliases: List[str]) -> dict:
+    # Cache and gazetteer lookups touch the database, so they run in a worker thread too.
+    result = await asyncio.to_thread(_lookup_offline_and_alias, address, aliases)
+    if result is not None:
+        return result
+    await geocoder_rate_limit.acquire_async()
+    return await asyncio.to_thread(_geocode_online, get_geolocator().geocode, address, aliases)
+
+async def geocode_addresses_stream(addresses: List[str]) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Geocodes many messy addresses without blocking the event loop, yielding results in input order.
+
+    Duplicates are resolved once and cached addresses skip the LLM. The remaining addresses
+    are cleaned with one LLM call, and their lookups wait on the shared rate limit concurrently,
+    so each result is yielded as soon as it and every address before it are resolved.
+
+    Args:
+        addresses: Potentially unstructured addresses.
+
+    Yields:
+        Tuples of the input address and its geocoding result.
+    """
+    unique = list(dict.fromkeys(addresses))
+    resolved = await asyncio.to_thread(lambda: {address: lookup_offline(address) for address in unique})
+
+    pending: Dict[str, asyncio.Task] = {}
+    messy = [address for address in unique if resolved[address] is None]
+    if messy:
+        cleaned = await asyncio.to_thread(clean_addresses, messy)
+        # Different raw forms often clean to the same address; look each one up once.
+        groups: Dict[str, Tuple[str, List[str]]] = {}
+        for raw, clean in zip(messy, cleaned):
+            groups.setdefault(normalize_address(clean) or clean, (clean, []))[1].append(raw)
+        for clean, raws in groups.values():
+            task = asyncio.create_task(_geocode_cleaned_async(clean, raws))
+            for raw in raws:
+                pending[raw] = task
+
+    try:
+        for address in addresses:
+            result = resolved[address]
+            if result is None:
+                result = await pending[address]
+            yield address, result
+    finally:
+        for task in pending.values():
+            task.cancel()
+
+async def cleanup_and_geocode_async(messy_address: str) -> dict:
+    """
+    Like `cleanup_and_geocode`, without blocking the event loop: the rate limit is awaited
+    rather than slept on, and the cache, LLM and Nominatim calls run in worker threads.
+
+    Requires the `OPENAI_API_KEY` environment variable for addresses that are not cached.
+    """
+    async with aclosing(geocode_addresses_stream([messy_address])) as results:
+        async for _, result in results:
+            return result
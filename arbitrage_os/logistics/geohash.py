@@ -0,0 +1,100 @@
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Sorts after every geohash character, so `prefix <= geohash < prefix + PREFIX_END` is a prefix match.
+PREFIX_END = "{"
+MAX_PRECISION = 12
+
+def encode(lat: float, lng: float, precision: int = MAX_PRECISION) -> str:
+    """
+    Encodes a coordinate as a geohash. Longer hashes are finer cells; shared prefixes mean nearby points.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Returns the (height, width) in degrees of a geohash cell at the given precision.
+    """
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def radius_bbox(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Returns the (min_lng, min_lat, max_lng, max_lat) box enclosing a circle on the earth.
+    """
+    dlat = math.degrees(radius_km / 6371.0088)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    cos_lat = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+    if cos_lat <= 1e-9 or dlat / cos_lat >= 180:
+        return -180.0, min_lat, 180.0, max_lat
+    dlng = dlat / cos_lat
+    return lng - dlng, min_lat, lng + dlng, max_lat
+
+def split_antimeridian(bbox: Tuple[float, float, float, float]) -> List[Tuple[float, float, float, float]]:
+    """
+    Splits a box whose longitudes run past +/-180 into boxes within [-180, 180].
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    if max_lng - min_lng >= 360:
+        return [(-180.0, min_lat, 180.0, max_lat)]
+    if min_lng < -180:
+        return [(min_lng + 360, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng, max_lat)]
+    if max_lng > 180:
+        return [(min_lng, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng - 360, max_lat)]
+    return [bbox]
+
+def _cells_at(bbox: Tuple[float, float, float, float], precision: int, max_cells: int) -> Optional[List[str]]:
+    min_lng, min_lat, max_lng, max_lat = bbox
+    height, width = cell_size(precision)
+    # Snap to the cell grid so each cell is visited once.
+    lat = math.floor((min_lat + 90) / height) * height - 90
+    first_lng = math.floor((min_lng + 180) / width) * width - 180
+    rows = math.floor((max_lat + 90) / height) - math.floor((min_lat + 90) / height) + 1
+    cols = math.floor((max_lng + 180) / width) - math.floor((min_lng + 180) / width) + 1
+    if rows * cols > max_cells:
+        return None
+    cells = []
+    for row in range(rows):
+        center_lat = min(lat + (row + 0.5) * height, 90.0)
+        for col in range(cols):
+            center_lng = min(first_lng + (col + 0.5) * width, 180.0)
+            cells.append(encode(center_lat, center_lng, precision))
+    return cells
+
+def cover_bbox(bbox: Tuple[float, float, float, float], max_cells: int = 32) -> List[str]:
+    """
+    Returns the geohash prefixes, at the finest precision using at most `max_cells` cells,
+    whose cells together cover the box.
+    """
+    boxes = split_antimeridian(bbox)
+    for precision in range(MAX_PRECISION, 0, -1):
+        cells = []
+        for box in boxes:
+            box_cells = _cells_at(box, precision, max_cells)
+            if box_cells is None:
+                cells = None
+                break
+            cells.extend(box_cells)
+        if cells is not None and len(cells) <= max_cells:
+            return sorted(set(cells))
+    # Very large boxes are covered by whole top-level cells.
+    return sorted(set(cell for box in boxes for cell in _cells_at(box, 1, len(BASE32))))
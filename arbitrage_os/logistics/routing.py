@@ -1,10 +1,135 @@
+import asyncio
 import logging
 import os
+import time
+from typing import Optional
+
 import httpx
+import numpy as np
+
+from arbitrage_os.clients import get_http_client
+from arbitrage_os.logistics.distance_matrix import build_distance_matrix
+from arbitrage_os.logistics.tsp import path_length, solve_open_path
 
 logger = logging.getLogger(__name__)
 
-def optimize_route(coordinates: list[dict]) -> dict:
+# Routing configuration
+# "auto" solves locally when Mapbox is not configured or the stops exceed its waypoint cap.
+ROUTING_BACKEND = os.getenv("ROUTING_BACKEND", "auto")
+ROUTING_TIME_BUDGET_MS = float(os.getenv("ROUTING_TIME_BUDGET_MS", "1000"))
+MAPBOX_OPTIMIZATION_MAX_WAYPOINTS = 12
+MAPBOX_DIRECTIONS_MAX_WAYPOINTS = 25
+
+def optimize_route(coordinates: list[dict], backend: Optional[str] = None) -> dict:
+    """
+    Optimizes an open route from the first to the last coordinate.
+
+    Args:
+        coordinates: A list of dictionaries, each with "lat" and "lng" keys.
+        backend: "mapbox", "local" or "auto". Defaults to `ROUTING_BACKEND`.
+
+    Returns:
+        A dictionary in the Mapbox Optimization API response shape.
+    """
+    backend = backend or ROUTING_BACKEND
+    if backend == "auto":
+        use_mapbox = bool(os.getenv("MAPBOX_API_KEY")) and len(coordinates) <= MAPBOX_OPTIMIZATION_MAX_WAYPOINTS
+        backend = "mapbox" if use_mapbox else "local"
+    if backend == "local":
+        return optimize_route_local(coordinates)
+    if backend == "mapbox":
+        return optimize_route_mapbox(coordinates)
+    raise ValueError(f"Unknown routing backend: {backend}")
+
+async def optimize_route_async(coordinates: list[dict], backend: Optional[str] = None) -> dict:
+    """
+    Like `optimize_route`, without blocking the event loop. Both backends block (the
+    local solver computes for up to `ROUTING_TIME_BUDGET_MS`, Mapbox is a network call),
+    so the route is optimized in a worker thread.
+    """
+    return await asyncio.to_thread(optimize_route, coordinates, backend)
+
+def optimize_route_local(coordinates: list[dict], time_budget_ms: Optional[float] = None) -> dict:
+    """
+    Optimizes a route in-process with a cached distance matrix and a 2-opt/Or-opt TSP solver.
+
+    Like the Mapbox backend, the route starts at the first and ends at the last coordinate.
+    When `MAPBOX_API_KEY` is set, Mapbox Directions is only called for the geometry of the
+    solved order; otherwise the geometry connects the stops with straight lines.
+
+    Args:
+        coordinates: A list of dictionaries, each with "lat" and "lng" keys.
+        time_budget_ms: The solver's improvement budget. Defaults to `ROUTING_TIME_BUDGET_MS`.
+
+    Returns:
+        A dictionary in the Mapbox Optimization API response shape, with `waypoints` in input
+        order (each with its `waypoint_index` in the trip) and a single entry in `trips`.
+    """
+    if len(coordinates) < 2:
+        raise ValueError("At least two coordinates are required for route optimization.")
+
+    budget_ms = ROUTING_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    start = time.perf_counter()
+    lats = [coord["lat"] for coord in coordinates]
+    lngs = [coord["lng"] for coord in coordinates]
+    matrix = build_distance_matrix(coordinates)
+    # Road matrices are optimized for time, like Mapbox; the solver needs finite, symmetric costs.
+    cost = np.asarray(matrix.duration if matrix.source == "osrm" else matrix.distance, dtype=float)
+    finite = np.isfinite(cost)
+    cost = np.where(finite, cost, cost[finite].max() * 10 if finite.any() else 0.0)
+    order = solve_open_path((cost + cost.T) / 2, time_budget_s=budget_ms / 1000)
+    solve_ms = (time.perf_counter() - start) * 1000
+
+    distance = path_length(order, matrix.distance)
+    duration = path_length(order, matrix.duration)
+    trip = {
+        "distance": distance,
+        "duration": duration,
+        "weight": duration if matrix.source == "osrm" else distance,
+        "weight_name": "duration" if matrix.source == "osrm" else "distance",
+        "geometry": {"type": "LineString", "coordinates": [[lngs[i], lats[i]] for i in order]},
+        "legs": [],
+    }
+    directions = _fetch_directions([coordinates[i] for i in order])
+    if directions is not None:
+        trip.update({key: directions[key] for key in ("distance", "duration", "geometry", "legs") if key in directions})
+
+    position = np.empty(len(order), dtype=int)
+    position[order] = np.arange(len(order))
+    return {
+        "code": "Ok",
+        "solver": {"backend": "local", "matrix_source": matrix.source, "solve_ms": solve_ms},
+        "waypoints": [
+            {"waypoint_index": int(position[i]), "trips_index": 0, "location": [lngs[i], lats[i]], "name": ""}
+            for i in range(len(coordinates))
+        ],
+        "trips": [trip],
+    }
+
+def _fetch_directions(ordered: list[dict]) -> Optional[dict]:
+    """
+    Fetches road geometry for stops already in visiting order, or returns None if unavailable.
+    """
+    api_key = os.getenv("MAPBOX_API_KEY")
+    if not api_key or len(ordered) > MAPBOX_DIRECTIONS_MAX_WAYPOINTS:
+        return None
+
+    coords_str = ";".join([f"{coord['lng']},{coord['lat']}" for coord in ordered])
+    url = f"https://api.mapbox.com/directions/v5/mapbox/driving/{coords_str}"
+    params = {"access_token": api_key, "overview": "full", "steps": "true", "geometries": "geojson"}
+    try:
+        response = get_http_client().get(url, params=params, timeout=10)
+        response.raise_for_status()
+        result = response.json()
+    except httpx.HTTPError as e:
+        logger.warning(f"Mapbox Directions request failed, using straight-line geometry: {e}")
+        return None
+    if result.get("code") != "Ok" or not result.get("routes"):
+        logger.warning(f"Mapbox Directions returned no route: {result.get('message')}")
+        return None
+    return result["routes"][0]
+
+def optimize_route_mapbox(coordinates: list[dict]) -> dict:
     """
     Optimizes a route based on a list of geographic coordinates using the Mapbox Optimization API.
 
@@ -43,18 +168,17 @@ def optimize_route(coordinates: list[dict]) -> dict:
     }
 
     try:
-        with httpx.Client() as client:
-            response = client.get(url, params=params)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            
-            result = response.json()
-            if result.get("code") != "Ok":
-                logger.error(f"Mapbox API returned an error: {result.get('message')}")
-                raise Exception(f"Mapbox API error: {result.get('message')}")
-
-            # The 'trips' object contains the optimized route. We return the first trip.
-            # The 'waypoints' object shows the original and optimized order of the coordinates.
-            return result
+        response = get_http_client().get(url, params=params)
+        response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
+        
+        result = response.json()
+        if result.get("code") != "Ok":
+            logger.error(f"Mapbox API returned an error: {result.get('message')}")
+            raise Exception(f"Mapbox API error: {result.get('message')}")
+
+        # The 'trips' object contains the optimized route. We return the first trip.
+        # The 'waypoints' object shows the original and optimized order of the coordinates.
+        return result
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error occurred while calling Mapbox API: {e.response.text}")
@@ -0,0 +1,262 @@
+import logging
+import math
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from arbitrage_os.logistics.distance_matrix import build_distance_matrix
+
+logger = logging.getLogger(__name__)
+
+# Scheduling configuration
+PLAN_DAY_TIME_BUDGET_MS = float(os.getenv("PLAN_DAY_TIME_BUDGET_MS", "2000"))
+# Value assigned to each score point (1-10) of a stop whose profit is unknown.
+PLAN_DAY_SCORE_VALUE = float(os.getenv("PLAN_DAY_SCORE_VALUE", "10"))
+
+_EPSILON = 1e-6
+
+class Stop(NamedTuple):
+    id: int
+    lat: float
+    lng: float
+    value: float
+    window_start: float = 0.0  # Seconds after shift start
+    window_end: float = math.inf
+    service: float = 0.0  # Seconds spent at the stop
+
+def item_profit(item) -> Optional[float]:
+    """
+    Returns the expected profit from an item's stored ROI analysis, if any.
+    """
+    if not isinstance(item.roi_analysis, dict):
+        return None
+    return item.roi_analysis.get("profit")
+
+def stop_value(score: Optional[float], profit: Optional[float]) -> float:
+    """
+    Weights a stop by its expected profit, discounted by the LLM's confidence score (1-10).
+    Stops without a positive profit estimate are valued by their score alone.
+    """
+    confidence = max(score or 0, 0) / 10
+    if profit is not None and profit > 0:
+        return profit * max(confidence, 0.1)
+    return confidence * 10 * PLAN_DAY_SCORE_VALUE
+
+class _Planner:
+    """
+    Team orienteering with time windows: every vehicle leaves the depot at shift start and must
+    finish within the shift. Stops that do not fit are left unassigned, lowest value first.
+    Matrix node 0 is the depot and node i + 1 is stop i.
+    """
+
+    def __init__(self, stops: List[Stop], travel: np.ndarray, vehicles: int, shift: float, return_to_depot: bool):
+        self.stops = stops
+        self.travel = travel
+        self.shift = shift
+        self.return_to_depot = return_to_depot
+        self.routes: List[List[int]] = [[] for _ in range(vehicles)]
+        self.unassigned = set(range(len(stops)))
+
+    def _to_end(self, node: int) -> float:
+        return self.travel[node, 0] if self.return_to_depot else 0.0
+
+    def timing(self, route: List[int]) -> Optional[Tuple[List[float], List[float]]]:
+        """
+        Returns the departure time from every position (depot first) and the latest feasible
+        arrival at every position after the depot (end last), or None if the route is infeasible.
+        """
+        departs = [0.0]
+        node = 0
+        for i in route:
+            stop = self.stops[i]
+            start = max(departs[-1] + self.travel[node, i + 1], stop.window_start)
+            if start > stop.window_end + _EPSILON:
+                return None
+            departs.append(start + stop.service)
+            node = i + 1
+        if departs[-1] + self._to_end(node) > self.shift + _EPSILON:
+            return None
+
+        latest = [self.shift]
+        next_node = None
+        for i in reversed(route):
+            stop = self.stops[i]
+            to_next = self._to_end(i + 1) if next_node is None else self.travel[i + 1, next_node]
+            latest.append(min(stop.window_end, latest[-1] - to_next - stop.service))
+            next_node = i + 1
+        latest.reverse()
+        return departs, latest
+
+    def best_insertion(self, i: int) -> Optional[Tuple[float, int, int]]:
+        """
+        Finds the cheapest feasible (added travel time, vehicle, position) for stop `i`.
+        """
+        stop = self.stops[i]
+        node = i + 1
+        best = None
+        for vehicle, route in enumerate(self.routes):
+            timing = self.timing(route)
+            if timing is None:
+                continue
+            departs, latest = timing
+            previous = 0
+            for position in range(len(route) + 1):
+                following = route[position] + 1 if position < len(route) else None
+                start = max(departs[position] + self.travel[previous, node], stop.window_start)
+                if start <= stop.window_end + _EPSILON:
+                    if following is None:
+                        to_next, direct = self._to_end(node), self._to_end(previous)
+                    else:
+                        to_next, direct = self.travel[node, following], self.travel[previous, following]
+                    if start + stop.service + to_next <= latest[position] + _EPSILON:
+                        cost = self.travel[previous, node] + to_next - direct
+                        if best is None or cost < best[0]:
+                            best = (cost, vehicle, position)
+                if following is not None:
+                    previous = following
+        return best
+
+    def insert(self, i: int) -> bool:
+        best = self.best_insertion(i)
+        if best is None:
+            return False
+        _, vehicle, position = best
+        self.routes[vehicle].insert(position, i)
+        self.unassigned.discard(i)
+        return True
+
+    def _removal_saving(self, route: List[int], position: int) -> float:
+        previous = route[position - 1] + 1 if position > 0 else 0
+        node = route[position] + 1
+        if position + 1 < len(route):
+            following = route[position + 1] + 1
+            return self.travel[previous, node] + self.travel[node, following] - self.travel[previous, following]
+        return self.travel[previous, node] + self._to_end(node) - self._to_end(previous)
+
+    def relocate_pass(self, deadline: float) -> bool:
+        """
+        Moves stops to cheaper positions, in the same or another vehicle, to free up shift time.
+        """
+        improved = False
+        for vehicle, route in enumerate(self.routes):
+            position = 0
+            while position < len(route):
+                if time.perf_counter() > deadline:
+                    return improved
+                i = route[position]
+                saving = self._removal_saving(route, position)
+                del route[position]
+                best = self.best_insertion(i) if self.timing(route) is not None else None
+                if best is not None and best[0] < saving - _EPSILON:
+                    _, target, target_position = best
+                    self.routes[target].insert(target_position, i)
+                    # Every move shortens the plan, so revisiting this position terminates.
+                    improved = True
+                    continue
+                route.insert(position, i)
+                position += 1
+        return improved
+
+    def exchange_pass(self, deadline: float) -> bool:
+        """
+        Replaces a lower-value scheduled stop with a higher-value unassigned one where that fits.
+        """
+        improved = False
+        for u in sorted(self.unassigned, key=lambda i: -self.stops[i].value):
+            if time.perf_counter() > deadline:
+                break
+            candidates = [
+                (vehicle, position, v)
+                for vehicle, route in enumerate(self.routes)
+                for position, v in enumerate(route)
+                if self.stops[v].value < self.stops[u].value - _EPSILON
+            ]
+            for vehicle, position, v in sorted(candidates, key=lambda c: self.stops[c[2]].value):
+                route = self.routes[vehicle]
+                del route[position]
+                if self.insert(u):
+                    self.unassigned.add(v)
+                    improved = True
+                    break
+                route.insert(position, v)
+        return improved
+
+    def solve(self, time_budget_s: float) -> None:
+        deadline = time.perf_counter() + time_budget_s
+        # Highest-value stops claim shift time first.
+        for i in sorted(self.unassigned, key=lambda i: -self.stops[i].value):
+            if time.perf_counter() > deadline:
+                break
+            self.insert(i)
+
+        improved = True
+        while improved and time.perf_counter() <= deadline:
+            improved = self.relocate_pass(deadline)
+            for i in sorted(self.unassigned, key=lambda i: -self.stops[i].value):
+                improved = self.insert(i) or improved
+            improved = self.exchange_pass(deadline) or improved
+
+def plan_routes(stops: List[Stop], depot: Dict[str, float], vehicles: int, shift_seconds: float,
+                return_to_depot: bool = True, time_budget_ms: Optional[float] = None) -> Dict[str, object]:
+    """
+    Splits stops across vehicles under time windows and a shift length, maximizing collected value.
+
+    Args:
+        stops: The candidate stops, with their value, time window and service time.
+        depot: A dictionary with "lat" and "lng" keys where every vehicle starts.
+        vehicles: The number of vehicles (buyers) available.
+        shift_seconds: The length of every vehicle's shift.
+        return_to_depot: Whether the shift must include driving back to the depot.
+        time_budget_ms: The solver's time budget. Defaults to `PLAN_DAY_TIME_BUDGET_MS`.
+
+    Returns:
+        A dictionary with per-vehicle `routes` (stops with arrival, start and departure times
+        in seconds after shift start), the `unassigned` stop ids and the `total_value`.
+    """
+    if vehicles < 1:
+        raise ValueError("At least one vehicle is required.")
+    budget_ms = PLAN_DAY_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    start = time.perf_counter()
+
+    if not stops:
+        return {"routes": [{"vehicle": v, "stops": [], "end": 0.0, "value": 0.0} for v in range(vehicles)],
+                "unassigned": [], "total_value": 0.0, "solve_ms": 0.0}
+
+    matrix = build_distance_matrix([depot] + [{"lat": stop.lat, "lng": stop.lng} for stop in stops])
+    travel = np.asarray(matrix.duration, dtype=float)
+    planner = _Planner(stops, travel, vehicles, shift_seconds, return_to_depot)
+    planner.solve(budget_ms / 1000)
+
+    routes = []
+    for vehicle, route in enumerate(planner.routes):
+        departs, _ = planner.timing(route)
+        node = 0
+        scheduled = []
+        for position, i in enumerate(route):
+            stop = planner.stops[i]
+            arrival = float(departs[position] + travel[node, i + 1])
+            scheduled.append({
+                "id": stop.id,
+                "lat": stop.lat,
+                "lng": stop.lng,
+                "value": stop.value,
+                "arrival": arrival,
+                "start": max(arrival, stop.window_start),
+                "departure": float(departs[position + 1]),
+            })
+            node = i + 1
+        routes.append({
+            "vehicle": vehicle,
+            "stops": scheduled,
+            "end": float(departs[-1] + planner._to_end(node)),
+            "value": sum(stop["value"] for stop in scheduled),
+        })
+
+    return {
+        "routes": routes,
+        "unassigned": sorted(stops[i].id for i in planner.unassigned),
+        "total_value": sum(route["value"] for route in routes),
+        "solve_ms": (time.perf_counter() - start) * 1000,
+    }
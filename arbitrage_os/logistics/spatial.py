@@ -0,0 +1,293 @@
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Row, and_, or_
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db import models
+from arbitrage_os.logistics.geohash import PREFIX_END, cover_bbox, radius_bbox, split_antimeridian
+from arbitrage_os.logistics.tsp import EARTH_RADIUS_M, haversine_block
+
+logger = logging.getLogger(__name__)
+
+# Spatial query configuration
+# "geohash" runs prefix-range scans on the indexed `items.geohash` column; "kdtree" answers
+# from an in-memory KD-tree snapshot of the geocoded items (e.g. for SQLite development).
+SPATIAL_INDEX_BACKEND = os.getenv("SPATIAL_INDEX_BACKEND", "geohash")
+SPATIAL_MAX_CELLS = int(os.getenv("SPATIAL_MAX_CELLS", "32"))
+SPATIAL_KDTREE_TTL_SECONDS = float(os.getenv("SPATIAL_KDTREE_TTL_SECONDS", "60"))
+# First radius tried by k-nearest searches on the geohash backend; doubled until k items are found.
+SPATIAL_KNN_START_KM = float(os.getenv("SPATIAL_KNN_START_KM", "2"))
+EARTH_HALF_CIRCUMFERENCE_KM = 20016.0
+
+def _unit_vectors(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat, lng = np.radians(lats), np.radians(lngs)
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+def _chord(radius_km: float) -> float:
+    # Straight-line distance through the unit sphere, monotonic in great-circle distance.
+    return 2 * np.sin(min(radius_km * 1000 / EARTH_RADIUS_M, np.pi) / 2)
+
+def _great_circle_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * np.arcsin(np.clip(chord / 2, 0.0, 1.0)) * EARTH_RADIUS_M / 1000
+
+class KDTree:
+    """
+    Static KD-tree over points on the unit sphere, supporting radius and k-nearest queries.
+    """
+
+    LEAF_SIZE = 32
+
+    def __init__(self, lats: np.ndarray, lngs: np.ndarray):
+        self.points = _unit_vectors(np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float))
+        self.index = np.arange(len(self.points))
+        # Nodes are (start, end, axis, split, left, right); leaves have axis -1.
+        self.nodes: List[Tuple[int, int, int, float, int, int]] = []
+        if len(self.points):
+            self._build(0, len(self.points))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _build(self, start: int, end: int) -> int:
+        node_id = len(self.nodes)
+        self.nodes.append((start, end, -1, 0.0, -1, -1))
+        if end - start <= self.LEAF_SIZE:
+            return node_id
+        block = self.points[self.index[start:end]]
+        axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        mid = (end - start) // 2
+        order = np.argpartition(block[:, axis], mid)
+        self.index[start:end] = self.index[start:end][order]
+        split = float(self.points[self.index[start + mid], axis])
+        left = self._build(start, start + mid)
+        right = self._build(start + mid, end)
+        self.nodes[node_id] = (start, end, axis, split, left, right)
+        return node_id
+
+    def query_radius(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (indices, distances in km) of all points within `radius_km`, nearest first.
+        """
+        if not self.nodes:
+            return np.empty(0, dtype=int), np.empty(0)
+        query = _unit_vectors(np.array([lat]), np.array([lng]))[0]
+        limit = _chord(radius_km)
+        found, chords = [], []
+        stack = [0]
+        while stack:
+            start, end, axis, split, left, right = self.nodes[stack.pop()]
+            if axis < 0:
+                members = self.index[start:end]
+                chord = np.linalg.norm(self.points[members] - query, axis=1)
+                within = chord <= limit
+                found.append(members[within])
+                chords.append(chord[within])
+                continue
+            diff = query[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append(near)
+            if abs(diff) <= limit:
+                stack.append(far)
+        found, chords = np.concatenate(found), np.concatenate(chords)
+        order = np.argsort(chords)
+        return found[order], _great_circle_km(chords[order])
+
+    def query_knn(self, lat: float, lng: float, k: int,
+                  mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the (indices, distances in km) of the `k` nearest points allowed by `mask`, nearest first.
+        """
+        if not self.nodes or k <= 0:
+            return np.empty(0, dtype=int), np.empty(0)
+        query = _unit_vectors(np.array([lat]), np.array([lng]))[0]
+        best, best_chords = np.empty(0, dtype=int), np.empty(0)
+        stack = [(0, 0.0)]
+        while stack:
+            node_id, bound = stack.pop()
+            if len(best) == k and bound > best_chords[-1]:
+                continue
+            start, end, axis, split, left, right = self.nodes[node_id]
+            if axis < 0:
+                members = self.index[start:end]
+                if mask is not None:
+                    members = members[mask[members]]
+                chord = np.linalg.norm(self.points[members] - query, axis=1)
+                best = np.concatenate((best, members))
+                best_chords = np.concatenate((best_chords, chord))
+                order = np.argsort(best_chords)[:k]
+                best, best_chords = best[order], best_chords[order]
+                continue
+            diff = query[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Push the far side first so the near side is searched first.
+            stack.append((far, max(bound, abs(diff))))
+            stack.append((near, bound))
+        return best, _great_circle_km(best_chords)
+
+class _ItemTreeSnapshot:
+    def __init__(self, ids: np.ndarray, lats: np.ndarray, lngs: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.lats = lats
+        self.lngs = lngs
+        self.scores = scores
+        self.tree = KDTree(lats, lngs)
+        self.built_at = time.monotonic()
+
+_snapshot: Optional[_ItemTreeSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+def get_item_tree(db: Session, refresh: bool = False) -> _ItemTreeSnapshot:
+    """
+    Returns the KD-tree snapshot of geocoded items, rebuilt every `SPATIAL_KDTREE_TTL_SECONDS`.
+    """
+    global _snapshot
+    with _snapshot_lock:
+        if refresh or _snapshot is None or time.monotonic() - _snapshot.built_at > SPATIAL_KDTREE_TTL_SECONDS:
+            rows = db.query(models.Item.id, models.Item.latitude, models.Item.longitude, models.Item.score).filter(
+                models.Item.latitude.isnot(None), models.Item.longitude.isnot(None)
+            ).all()
+            ids, lats, lngs, scores = (np.array(column) for column in zip(*rows)) if rows else ([],) * 4
+            _snapshot = _ItemTreeSnapshot(
+                np.asarray(ids, dtype=int), np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float),
+                np.array([np.nan if s is None else s for s in scores], dtype=float),
+            )
+        return _snapshot
+
+def _in_bbox(lats: np.ndarray, lngs: np.ndarray, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+    inside = np.zeros(len(lats), dtype=bool)
+    for min_lng, min_lat, max_lng, max_lat in split_antimeridian(bbox):
+        inside |= (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+    return inside
+
+def _point_in_bbox(lat: float, lng: float, bbox: Tuple[float, float, float, float]) -> bool:
+    return bool(_in_bbox(np.array([lat]), np.array([lng]), bbox)[0])
+
+def _geohash_candidates(db: Session, bbox: Tuple[float, float, float, float],
+                        min_score: Optional[int], limit: Optional[int] = None) -> List[Row]:
+    # Only the `(id, latitude, longitude)` of candidates are read; full rows are loaded
+    # for the final results alone.
+    cells = cover_bbox(bbox, SPATIAL_MAX_CELLS)
+    boxes = split_antimeridian(bbox)
+    query = db.query(models.Item.id, models.Item.latitude, models.Item.longitude).filter(
+        or_(*[and_(models.Item.geohash >= cell, models.Item.geohash < cell + PREFIX_END) for cell in cells]),
+        or_(*[
+            and_(
+                models.Item.latitude.between(min_lat, max_lat),
+                models.Item.longitude.between(min_lng, max_lng),
+            )
+            for min_lng, min_lat, max_lng, max_lat in boxes
+        ]),
+    )
+    if min_score is not None:
+        query = query.filter(models.Item.score >= min_score)
+    if limit is not None:
+        query = query.order_by(models.Item.id).limit(limit)
+    return query.all()
+
+def _with_distances(candidates: List[Row], lat: float, lng: float) -> List[Tuple[int, float]]:
+    if not candidates:
+        return []
+    distances = haversine_block(
+        [lat], [lng], [row.latitude for row in candidates], [row.longitude for row in candidates]
+    )[0] / 1000
+    order = np.argsort(distances, kind="stable")
+    return [(candidates[i].id, float(distances[i])) for i in order]
+
+def _load_items(db: Session, found: List[Tuple[int, Optional[float]]]) -> List[Tuple[models.Item, Optional[float]]]:
+    ids = [item_id for item_id, _ in found]
+    items = {item.id: item for item in db.query(models.Item).filter(models.Item.id.in_(ids))} if ids else {}
+    return [
+        (items[item_id], None if distance is None else float(distance))
+        for item_id, distance in found if item_id in items
+    ]
+
+def find_nearby_items(db: Session, lat: Optional[float] = None, lng: Optional[float] = None,
+                      radius_km: Optional[float] = None, bbox: Optional[Tuple[float, float, float, float]] = None,
+                      k: Optional[int] = None, min_score: Optional[int] = None, limit: int = 100,
+                      backend: Optional[str] = None) -> List[Tuple[models.Item, Optional[float]]]:
+    """
+    Finds geocoded items by radius, bounding box or k-nearest, optionally above a minimum score.
+
+    Args:
+        db: The database session.
+        lat, lng: The query point, required for radius and k-nearest queries.
+        radius_km: Return items within this distance. With `k`, caps the k-nearest search.
+        bbox: Return items inside (min_lng, min_lat, max_lng, max_lat).
+        k: Return the k nearest items.
+        min_score: Skip items scored below this.
+        limit: The maximum number of items returned.
+        backend: "geohash" or "kdtree". Defaults to `SPATIAL_INDEX_BACKEND`.
+
+    Returns:
+        `(item, distance_km)` pairs, nearest first. The distance is None for bbox queries without a point.
+    """
+    backend = backend or SPATIAL_INDEX_BACKEND
+    has_point = lat is not None and lng is not None
+    if (radius_km is not None or k is not None) and not has_point:
+        raise ValueError("lat and lng are required for radius and k-nearest queries.")
+    if radius_km is None and bbox is None and k is None:
+        raise ValueError("One of radius_km, bbox or k is required.")
+    if backend not in ("geohash", "kdtree"):
+        raise ValueError(f"Unknown spatial index backend: {backend}")
+    limit = min(limit, k) if k is not None else limit
+
+    if backend == "kdtree":
+        return _find_with_kdtree(db, lat, lng, radius_km, bbox, k, min_score, limit)
+
+    def matching(search_bbox, within_km):
+        if not has_point:
+            # Without a point there is nothing to rank by, so the database applies the limit.
+            return [(row.id, None) for row in _geohash_candidates(db, search_bbox, min_score, limit)]
+        candidates = _geohash_candidates(db, search_bbox, min_score)
+        if bbox is not None and search_bbox is not bbox:
+            candidates = [row for row in candidates if _point_in_bbox(row.latitude, row.longitude, bbox)]
+        found = _with_distances(candidates, lat, lng)
+        if within_km is not None:
+            found = [(item_id, distance) for item_id, distance in found if distance <= within_km]
+        return found
+
+    if k is None:
+        found = matching(bbox if bbox is not None else radius_bbox(lat, lng, radius_km), radius_km)
+        return _load_items(db, found[:limit])
+
+    # Every item within the searched radius is found, so once k of them are, they are the k nearest.
+    max_km = radius_km if radius_km is not None else EARTH_HALF_CIRCUMFERENCE_KM
+    search_km = min(SPATIAL_KNN_START_KM, max_km)
+    while True:
+        found = matching(radius_bbox(lat, lng, search_km), search_km)
+        if len(found) >= limit or search_km >= max_km:
+            return _load_items(db, found[:limit])
+        search_km = min(search_km * 2, max_km)
+
+def _find_with_kdtree(db: Session, lat, lng, radius_km, bbox, k, min_score, limit):
+    snapshot = get_item_tree(db)
+    mask = np.ones(len(snapshot.ids), dtype=bool)
+    if min_score is not None:
+        mask &= snapshot.scores >= min_score
+    if bbox is not None:
+        mask &= _in_bbox(snapshot.lats, snapshot.lngs, bbox)
+
+    if lat is None or lng is None:
+        indices = np.nonzero(mask)[0][:limit]
+        distances = [None] * len(indices)
+    elif k is not None:
+        indices, distances = snapshot.tree.query_knn(lat, lng, limit, mask)
+        if radius_km is not None:
+            within = distances <= radius_km
+            indices, distances = indices[within], distances[within]
+    elif radius_km is not None:
+        indices, distances = snapshot.tree.query_radius(lat, lng, radius_km)
+        keep = mask[indices]
+        indices, distances = indices[keep][:limit], distances[keep][:limit]
+    else:
+        indices = np.nonzero(mask)[0]
+        distances = haversine_block([lat], [lng], snapshot.lats[indices], snapshot.lngs[indices])[0] / 1000
+        order = np.argsort(distances, kind="stable")[:limit]
+        indices, distances = indices[order], distances[order]
+
+    return _load_items(db, [(int(snapshot.ids[i]), distance) for i, distance in zip(indices, distances)])
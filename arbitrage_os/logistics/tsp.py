@@ -0,0 +1,126 @@
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+# Improvements smaller than this (in matrix units) are treated as noise, which guarantees termination.
+_EPSILON = 1e-7
+
+def haversine_block(
+    lats_a: Sequence[float], lngs_a: Sequence[float], lats_b: Sequence[float], lngs_b: Sequence[float]
+) -> np.ndarray:
+    """
+    Computes the great-circle distances, in meters, from every point in `a` to every point in `b`.
+    """
+    lat_a = np.radians(np.asarray(lats_a, dtype=float))[:, None]
+    lng_a = np.radians(np.asarray(lngs_a, dtype=float))[:, None]
+    lat_b = np.radians(np.asarray(lats_b, dtype=float))[None, :]
+    lng_b = np.radians(np.asarray(lngs_b, dtype=float))[None, :]
+    a = np.sin((lat_a - lat_b) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lng_a - lng_b) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_matrix(lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """
+    Computes the pairwise great-circle distances, in meters, between the given points.
+    """
+    return haversine_block(lats, lngs, lats, lngs)
+
+def path_length(path: Sequence[int], dist: np.ndarray) -> float:
+    path = np.asarray(path)
+    return float(dist[path[:-1], path[1:]].sum())
+
+def nearest_neighbour_path(dist: np.ndarray) -> List[int]:
+    """
+    Builds an open path from the first to the last point, always visiting the nearest unvisited point next.
+    """
+    n = len(dist)
+    if n <= 2:
+        return list(range(n))
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[[0, n - 1]] = False
+    path = [0]
+    for _ in range(n - 2):
+        row = np.where(unvisited, dist[path[-1]], np.inf)
+        nearest = int(np.argmin(row))
+        unvisited[nearest] = False
+        path.append(nearest)
+    path.append(n - 1)
+    return path
+
+def _two_opt_pass(path: np.ndarray, dist: np.ndarray, deadline: float) -> bool:
+    """
+    Reverses inner segments while that shortens the path. The endpoints stay fixed.
+    """
+    n = len(path)
+    improved = False
+    for i in range(1, n - 2):
+        if time.perf_counter() > deadline:
+            break
+        a, b = path[i - 1], path[i]
+        c = path[i + 1:n - 1]
+        e = path[i + 2:n]
+        # Reversing path[i..j] replaces edges (a, b) and (c, e) with (a, c) and (b, e).
+        delta = dist[a, c] + dist[b, e] - dist[a, b] - dist[c, e]
+        k = int(np.argmin(delta))
+        if delta[k] < -_EPSILON:
+            j = i + 1 + k
+            path[i:j + 1] = path[i:j + 1][::-1]
+            improved = True
+    return improved
+
+def _or_opt_pass(path: np.ndarray, dist: np.ndarray, deadline: float, max_segment: int = 3) -> bool:
+    """
+    Moves segments of up to `max_segment` points, forwards or reversed, to a cheaper position.
+    """
+    n = len(path)
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length <= n - 1:
+            if time.perf_counter() > deadline:
+                return improved
+            prev, first, last, nxt = path[i - 1], path[i], path[i + length - 1], path[i + length]
+            removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+            rest = np.concatenate((path[:i], path[i + length:]))
+            p, q = rest[:-1], rest[1:]
+            forward = dist[p, first] + dist[last, q] - dist[p, q]
+            reverse = dist[p, last] + dist[first, q] - dist[p, q]
+            insertion = np.minimum(forward, reverse)
+            # Re-inserting where the segment came from is not a move.
+            insertion[i - 1] = np.inf
+            k = int(np.argmin(insertion))
+            if insertion[k] - removal_gain < -_EPSILON:
+                segment = path[i:i + length]
+                if reverse[k] < forward[k]:
+                    segment = segment[::-1]
+                path[:] = np.concatenate((rest[:k + 1], segment, rest[k + 1:]))
+                improved = True
+            else:
+                i += 1
+    return improved
+
+def solve_open_path(dist: np.ndarray, time_budget_s: Optional[float] = None) -> List[int]:
+    """
+    Solves the open-path TSP from the first to the last point of a distance matrix.
+
+    Nearest-neighbour construction is followed by alternating 2-opt and Or-opt passes
+    until neither improves the path or the time budget runs out.
+
+    Args:
+        dist: A square, symmetric cost matrix (distances or durations).
+        time_budget_s: The wall-clock budget for the improvement phase, unlimited if None.
+
+    Returns:
+        The visiting order as indices into the matrix, starting at 0 and ending at n - 1.
+    """
+    dist = np.asarray(dist, dtype=float)
+    path = np.array(nearest_neighbour_path(dist), dtype=int)
+    if len(path) <= 3:
+        return path.tolist()
+    deadline = time.perf_counter() + time_budget_s if time_budget_s is not None else float("inf")
+    improved = True
+    while improved and time.perf_counter() <= deadline:
+        improved = _two_opt_pass(path, dist, deadline)
+        improved = _or_opt_pass(path, dist, deadline) or improved
+    return path.tolist()
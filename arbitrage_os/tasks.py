@@ -1,23 +1,55 @@
-from celery import Celery
+from celery import Celery, chain, chord, group
+from celery.canvas import Signature
+from celery.signals import worker_process_init, worker_process_shutdown
 import logging
 import os
-import json
-import tempfile
-import httpx
+import numpy as np
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from arbitrage_os.db.database import SessionLocal
+from arbitrage_os.clients import close_clients, init_clients
+from arbitrage_os.db.database import SessionLocal, engine
 from arbitrage_os.db import models
 from arbitrage_os.discovery.scraper import scrape_url
-from arbitrage_os.discovery.ai_logic import analyze_description
+from arbitrage_os.discovery.async_scraper import close_thread_loop, scrape_many_blocking
+from arbitrage_os.discovery.page_cache import (
+    copy_previous_analysis,
+    get_cached_page,
+    get_cached_pages,
+    record_scraped_page,
+)
+from arbitrage_os.discovery.prefilter import score_listing
+from arbitrage_os.discovery.progress import publish_progress, publish_progress_many
+from arbitrage_os.discovery.ai_logic import collect_analysis_batch, submit_analysis_batch
+from arbitrage_os.discovery.analysis_cache import (
+    analysis_cache_key,
+    analyze_description_cached,
+    get_uncached_descriptions,
+    prime_analysis_cache,
+    store_analyses,
+)
 from arbitrage_os.logistics.geocoding import cleanup_and_geocode
-from arbitrage_os.verification.image_analyzer import analyze_image_for_hallmarks
-from arbitrage_os.valuation.dashboard import calculate_roi
+from arbitrage_os.logistics.geohash import encode as encode_geohash
+from arbitrage_os.verification.image_analyzer import XIMILAR_BATCH_SIZE, analyze_listing_images, top_hallmark
+from arbitrage_os.valuation.dashboard import calculate_roi, calculate_roi_batch, get_silver_spot_price
 
 logger = logging.getLogger(__name__)
 
 # Configure Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+REVALUATION_BATCH_SIZE = int(os.getenv("REVALUATION_BATCH_SIZE", "5000"))
+# How batch discovery analyzes listings before the per-item pipeline runs:
+# "packed" packs many listings into each LLM request, "batch_api" submits them
+# through the OpenAI Batch API, "single" leaves it to one request per item.
+DISCOVERY_LLM_MODE = os.getenv("DISCOVERY_LLM_MODE", "packed").lower()
+LLM_BATCH_POLL_SECONDS = int(os.getenv("LLM_BATCH_POLL_SECONDS", "300"))
+# Failed polls of a batch (e.g. OpenAI outages) before its items are analyzed individually
+LLM_BATCH_MAX_POLL_ERRORS = int(os.getenv("LLM_BATCH_MAX_POLL_ERRORS", "5"))
+# Queues of the discovery pipeline stages, so each kind of worker scales separately:
+# network-bound scraping, rate-limited external APIs (LLM, geocoding, Ximilar) and local CPU work.
+DISCOVERY_IO_QUEUE = os.getenv("DISCOVERY_IO_QUEUE", "discovery.io")
+DISCOVERY_API_QUEUE = os.getenv("DISCOVERY_API_QUEUE", "discovery.api")
+DISCOVERY_CPU_QUEUE = os.getenv("DISCOVERY_CPU_QUEUE", "discovery.cpu")
 
 celery_app = Celery(
     "tasks",
@@ -31,100 +63,459 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Long network-bound tasks should not be hoarded by one worker process.
+    worker_prefetch_multiplier=1,
+    task_routes={
+        "tasks.process_discovery": {"queue": DISCOVERY_CPU_QUEUE},
+        "tasks.process_discovery_batch": {"queue": DISCOVERY_IO_QUEUE},
+        "tasks.collect_analysis_batch": {"queue": DISCOVERY_API_QUEUE},
+        "tasks.discovery.scrape": {"queue": DISCOVERY_IO_QUEUE},
+        "tasks.discovery.prefilter": {"queue": DISCOVERY_CPU_QUEUE},
+        "tasks.discovery.analyze_text": {"queue": DISCOVERY_API_QUEUE},
+        "tasks.discovery.geocode": {"queue": DISCOVERY_API_QUEUE},
+        "tasks.discovery.analyze_images": {"queue": DISCOVERY_API_QUEUE},
+        "tasks.discovery.finalize": {"queue": DISCOVERY_CPU_QUEUE},
+        "tasks.revalue_inventory": {"queue": DISCOVERY_CPU_QUEUE},
+    },
 )
 
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):
+    # Prefork children must not reuse the parent's connections.
+    init_clients()
+    engine.dispose(close=False)
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(**kwargs):
+    close_thread_loop()
+    close_clients()
+
+def _load_item(db: Session, item_id: int) -> Optional[models.Item]:
+    item = db.query(models.Item).filter(models.Item.id == item_id).first()
+    if not item:
+        logger.error(f"Item with id {item_id} not found.")
+    return item
+
+def _mark_failed(item_id: int, error: Exception) -> None:
+    logger.error(f"An error occurred while processing item {item_id}: {error}")
+    db: Session = SessionLocal()
+    try:
+        db.query(models.Item).filter(models.Item.id == item_id).update({"status": "failed"})
+        db.commit()
+    finally:
+        db.close()
+    publish_progress(item_id, "failed")
+
+def _unpriced_roi_analysis(roi: dict) -> dict:
+    """
+    Returns the ROI analysis stored for an item, which carries no purchase price.
+
+    Only the price-independent fields are kept; profit and ROI are stored as null
+    instead of the values of a zero purchase price, so discovery and re-valuation
+    store the same analysis for the same item.
+    """
+    if "error" in roi:
+        return roi
+    return {**roi, "profit": None, "roi_percent": None}
+
+def discovery_pipeline(item_id: int, prescraped: bool = False) -> Signature:
+    """
+    Builds the chain that discovers one item, one task per stage on the stage's queue:
+    scrape (io) -> pre-filter (cpu) -> text analysis (api), which then fans out into a
+    chord of geocoding and batched image analysis (api) whose results `finalize_item`
+    (cpu) writes back together with the ROI.
+
+    Every stage passes the item id on, or None once the item needs no further work.
+    Stage transitions are published as progress events (see `discovery.progress`);
+    the item row is only written when a stage produces data and at the final status.
+    """
+    return chain(
+        scrape_item_task.si(item_id, prescraped),
+        prefilter_item_task.s(),
+        analyze_item_text_task.s(),
+    )
+
 @celery_app.task(name="tasks.process_discovery")
-def process_discovery_task(item_id: int):
+def process_discovery_task(item_id: int, prescraped: bool = False):
+    """
+    Celery task that starts the discovery pipeline of an item, see `discovery_pipeline`.
+
+    When `prescraped` is set, the item's description and image URLs were already
+    filled in by `process_discovery_batch_task` and the scrape step is skipped.
+    """
+    discovery_pipeline(item_id, prescraped).apply_async()
+
+@celery_app.task(name="tasks.discovery.scrape")
+def scrape_item_task(item_id: int, prescraped: bool = False) -> Optional[int]:
     """
-    Celery task to perform the heavy lifting of the discovery process.
+    Pipeline stage that scrapes an item's page, or reuses the previous analysis of an unchanged page.
     """
+    if prescraped:
+        return item_id
     db: Session = SessionLocal()
     try:
-        item = db.query(models.Item).filter(models.Item.id == item_id).first()
+        item = _load_item(db, item_id)
         if not item:
-            logger.error(f"Item with id {item_id} not found.")
-            return
-
-        # 1. Scrape URL
-        item.status = "scraping"
+            return None
+        publish_progress(item_id, "scraping")
+        validators, previous_item = get_cached_page(db, item.url) or (None, None)
+        scraped_data = scrape_url(item.url, cached=validators)
+        record_scraped_page(db, item.url, scraped_data)
+        if scraped_data.get("unchanged") and previous_item is not None:
+            # Same bytes as the last completed analysis, skip parsing, LLM and image analysis.
+            copy_previous_analysis(previous_item, item)
+            item.status = "completed"
+            db.commit()
+            publish_progress(item_id, "completed")
+            logger.info(f"Content unchanged for {item.url}, reused analysis of item {previous_item.id}")
+            return None
+        item.description = scraped_data.get("text", "")
+        item.image_urls = scraped_data.get("image_urls", []) or None
+        item.content_hash = scraped_data.get("content_hash")
         db.commit()
-        scraped_data = scrape_url(item.url)
-        description = scraped_data.get("text", "")
-        image_urls = scraped_data.get("image_urls", [])
-        item.description = description
-        item.image_urls = json.dumps(image_urls) if image_urls else None
-        if not description:
+        return item_id
+    except Exception as e:
+        db.rollback()
+        _mark_failed(item_id, e)
+        return None
+    finally:
+        db.close()
+
+@celery_app.task(name="tasks.discovery.prefilter")
+def prefilter_item_task(item_id: Optional[int]) -> Optional[int]:
+    """
+    Pipeline stage that applies the cheap local pre-filter, so obvious junk never reaches the LLM.
+    """
+    if item_id is None:
+        return None
+    db: Session = SessionLocal()
+    try:
+        item = _load_item(db, item_id)
+        if not item:
+            return None
+        if not item.description:
             item.status = "failed_scraping"
             db.commit()
+            publish_progress(item_id, "failed_scraping")
             logger.error(f"Failed to scrape content from URL: {item.url}")
-            return
+            return None
+        prefilter_result = score_listing(item.description)
+        if not prefilter_result["passed"]:
+            item.score = int(round(prefilter_result["score"]))
+            item.analysis = prefilter_result["reasoning"]
+            item.status = "filtered"
+            db.commit()
+            publish_progress(item_id, "filtered", score=item.score)
+            logger.info(f"Item {item_id} filtered out locally with score {prefilter_result['score']}")
+            return None
+        return item_id
+    except Exception as e:
+        db.rollback()
+        _mark_failed(item_id, e)
+        return None
+    finally:
+        db.close()
 
-        # 2. Analyze Description with AI
-        item.status = "analyzing_text"
-        db.commit()
-        analysis_result = analyze_description(description)
+@celery_app.task(name="tasks.discovery.analyze_text")
+def analyze_item_text_task(item_id: Optional[int]) -> Optional[int]:
+    """
+    Pipeline stage that analyzes an item's description with the LLM, then starts geocoding
+    and the analysis of every image in parallel, followed by `finalize_item_task`.
+    """
+    if item_id is None:
+        return None
+    db: Session = SessionLocal()
+    try:
+        item = _load_item(db, item_id)
+        if not item:
+            return None
+        publish_progress(item_id, "analyzing_text")
+        analysis_result = analyze_description_cached(db, item.description)
         item.analysis = analysis_result.get("reasoning")
         item.score = analysis_result.get("score")
+        item.weight_grams = analysis_result.get("weight_grams")
+        item.purity = analysis_result.get("purity")
         raw_address = analysis_result.get("address")
-        extracted_weight_grams = analysis_result.get("weight_grams")
-        extracted_purity = analysis_result.get("purity")
 
-        # 3. Geocode Address
+        image_urls = item.image_urls or []
+        header = [
+            analyze_images_task.si(image_urls[start:start + XIMILAR_BATCH_SIZE])
+            for start in range(0, len(image_urls), XIMILAR_BATCH_SIZE)
+        ]
         if raw_address and raw_address != "Not found":
-            item.status = "geocoding"
-            db.commit()
-            geocoded_data = cleanup_and_geocode(raw_address)
-            if geocoded_data and isinstance(geocoded_data, dict):
-                item.latitude = geocoded_data.get("lat")
-                item.longitude = geocoded_data.get("lng")
-            else:
-                logger.warning(f"Geocoding failed for address: {raw_address}")
-
-        # 4. Analyze Images
-        if image_urls:
-            item.status = "analyzing_images"
-            db.commit()
-            all_image_analysis_results = []
-            # Note: This part is still synchronous within the task.
-            # For true async image fetching, one would use libraries like aiohttp within the task.
-            for img_url in image_urls:
-                temp_img_path = None
-                try:
-                    response = httpx.get(img_url, timeout=10)
-                    response.raise_for_status()
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_img_file:
-                        temp_img_file.write(response.content)
-                        temp_img_path = temp_img_file.name
-                    analysis = analyze_image_for_hallmarks(temp_img_path)
-                    all_image_analysis_results.append({"image_url": img_url, "analysis": analysis})
-                except Exception as e:
-                    logger.error(f"Error analyzing image {img_url}: {e}")
-                finally:
-                    if temp_img_path and os.path.exists(temp_img_path):
-                        os.remove(temp_img_path)
-            item.image_analysis_results = json.dumps(all_image_analysis_results)
-
-        # 5. Calculate ROI
-        if extracted_weight_grams is not None and extracted_purity is not None:
-            item.status = "calculating_roi"
-            db.commit()
+            header.insert(0, geocode_item_task.si(raw_address))
+        # Checkpoint: the LLM analysis is kept even if a later stage fails.
+        db.commit()
+        publish_progress(item_id, "analyzing_images" if item.image_urls else "geocoding", score=item.score)
+    except Exception as e:
+        db.rollback()
+        _mark_failed(item_id, e)
+        return None
+    finally:
+        db.close()
+
+    if header:
+        chord(header)(finalize_item_task.s(item_id))
+    else:
+        finalize_item_task.delay([], item_id)
+    return item_id
+
+@celery_app.task(name="tasks.discovery.geocode")
+def geocode_item_task(raw_address: str) -> dict:
+    """
+    Pipeline stage that geocodes an item's address. Failures are reported rather than
+    raised, so the other stages' results still reach `finalize_item_task`.
+    """
+    try:
+        geocoded_data = cleanup_and_geocode(raw_address)
+    except Exception as e:
+        logger.error(f"Error geocoding address {raw_address}: {e}")
+        geocoded_data = None
+    if not geocoded_data or not isinstance(geocoded_data, dict):
+        logger.warning(f"Geocoding failed for address: {raw_address}")
+        return {"stage": "geocode", "latitude": None, "longitude": None}
+    return {"stage": "geocode", "latitude": geocoded_data.get("latitude"), "longitude": geocoded_data.get("longitude")}
+
+@celery_app.task(name="tasks.discovery.analyze_images")
+def analyze_images_task(image_urls: List[str]) -> dict:
+    """
+    Pipeline stage that downloads a batch of images concurrently and analyzes them for
+    hallmarks in memory. Failures are reported rather than raised, so the other stages'
+    results still reach `finalize_item_task`.
+    """
+    try:
+        return {"stage": "images", "results": analyze_listing_images(image_urls)}
+    except Exception as e:
+        logger.error(f"Error analyzing images {image_urls}: {e}")
+        return {"stage": "images", "results": []}
+
+@celery_app.task(name="tasks.discovery.finalize")
+def finalize_item_task(results: List[dict], item_id: int) -> None:
+    """
+    Pipeline stage that writes the geocoding and image results back, calculates the ROI
+    and completes the item in a single commit.
+    """
+    db: Session = SessionLocal()
+    try:
+        item = _load_item(db, item_id)
+        if not item:
+            return
+        for result in results:
+            if result.get("stage") == "geocode":
+                item.latitude = result["latitude"]
+                item.longitude = result["longitude"]
+                if item.latitude is not None and item.longitude is not None:
+                    item.geohash = encode_geohash(item.latitude, item.longitude)
+        if item.image_urls:
+            # In image order, leaving out the images that could not be analyzed.
+            image_results = [
+                image_result
+                for result in results
+                if result.get("stage") == "images"
+                for image_result in result["results"]
+            ]
+            item.image_analysis_results = image_results
+            item.hallmark_label, item.hallmark_confidence = top_hallmark(image_results)
+
+        if item.weight_grams is not None and item.purity is not None:
+            publish_progress(item_id, "calculating_roi")
             try:
-                roi_analysis_result = calculate_roi(
-                    weight_grams=extracted_weight_grams,
-                    purity=extracted_purity,
+                item.roi_analysis = _unpriced_roi_analysis(calculate_roi(
+                    weight_grams=item.weight_grams,
+                    purity=item.purity,
                     purchase_price=0  # Placeholder
-                )
-                item.roi_analysis = json.dumps(roi_analysis_result)
+                ))
             except Exception as e:
                 logger.error(f"Error calculating ROI: {e}")
 
         item.status = "completed"
         db.commit()
+        publish_progress(item_id, "completed", score=item.score, roi_percent=item.roi_percent)
         logger.info(f"Successfully processed item {item_id}")
+    except Exception as e:
+        db.rollback()
+        _mark_failed(item_id, e)
+    finally:
+        db.close()
+
+@celery_app.task(name="tasks.process_discovery_batch")
+def process_discovery_batch_task(item_ids: List[int]):
+    """
+    Celery task that scrapes the pages of many items concurrently over the pooled
+    async client, then hands each item to the discovery pipeline for the
+    remaining stages. Items whose page is unchanged since its last completed
+    analysis reuse that analysis and are not handed on.
+
+    The new descriptions are analyzed together first (see `DISCOVERY_LLM_MODE`)
+    so the per-item tasks find their analysis in the analysis cache.
+    """
+    db: Session = SessionLocal()
+    reused_ids = set()
+    batch_id = None
+    try:
+        items = db.query(models.Item).filter(models.Item.id.in_(item_ids)).all()
+        publish_progress_many([item.id for item in items], "scraping")
+
+        cached_pages = get_cached_pages(db, [item.url for item in items])
+        validators = {url: page_validators for url, (page_validators, _) in cached_pages.items()}
+        scraped = scrape_many_blocking([item.url for item in items], validators)
+        for url, scraped_data in scraped.items():
+            record_scraped_page(db, url, scraped_data)
+
+        for item in items:
+            scraped_data = scraped.get(item.url, {})
+            if scraped_data.get("unchanged") and item.url in cached_pages:
+                copy_previous_analysis(cached_pages[item.url][1], item)
+                item.status = "completed"
+                reused_ids.add(item.id)
+                continue
+            image_urls = scraped_data.get("image_urls", [])
+            item.description = scraped_data.get("text", "")
+            item.image_urls = image_urls or None
+            item.content_hash = scraped_data.get("content_hash")
+        db.commit()
+        publish_progress_many(reused_ids, "completed")
+        found_ids = {item.id for item in items}
+
+        descriptions = [
+            item.description
+            for item in items
+            if item.id not in reused_ids and item.description and score_listing(item.description)["passed"]
+        ]
+        try:
+            if DISCOVERY_LLM_MODE == "packed":
+                prime_analysis_cache(db, descriptions)
+                db.commit()
+            elif DISCOVERY_LLM_MODE == "batch_api":
+                missing = get_uncached_descriptions(db, descriptions)
+                if missing:
+                    batch_id = submit_analysis_batch({analysis_cache_key(d): d for d in missing})
+        except Exception as e:
+            logger.error(f"Batch LLM analysis failed, items will be analyzed individually: {e}")
+            db.rollback()
+    except Exception as e:
+        logger.error(f"An error occurred while scraping batch of {len(item_ids)} items: {e}")
+        db.rollback()
+        found_ids = set()
+        reused_ids = set()
+    finally:
+        db.close()
+
+    if reused_ids:
+        logger.info(f"Reused previous analysis for {len(reused_ids)} unchanged pages")
+
+    pending_ids = [item_id for item_id in item_ids if item_id not in reused_ids]
+    prescraped_ids = [item_id for item_id in pending_ids if item_id in found_ids]
+    if batch_id is not None:
+        collect_analysis_batch_task.apply_async((batch_id, pending_ids, prescraped_ids), countdown=LLM_BATCH_POLL_SECONDS)
+        return
+    dispatch_discovery_items(pending_ids, prescraped_ids)
 
+def dispatch_discovery_items(item_ids: List[int], prescraped_ids: List[int]) -> None:
+    # Fall back to per-item scraping for anything the batch did not cover.
+    # Published together as one group over a single producer connection.
+    prescraped = set(prescraped_ids)
+    if item_ids:
+        group(discovery_pipeline(item_id, prescraped=item_id in prescraped) for item_id in item_ids).apply_async()
+
+@celery_app.task(name="tasks.collect_analysis_batch", bind=True, max_retries=None)
+def collect_analysis_batch_task(self, batch_id: str, item_ids: List[int], prescraped_ids: List[int], poll_errors: int = 0):
+    """
+    Celery task that polls an OpenAI Batch API run, stores its analyses in the
+    analysis cache and then hands the items to the discovery pipeline.
+
+    A failing poll is retried; after `LLM_BATCH_MAX_POLL_ERRORS` failures the items
+    go to the pipeline without the batch's analyses and are analyzed one by one.
+    """
+    try:
+        analyses = collect_analysis_batch(batch_id)
     except Exception as e:
-        logger.error(f"An error occurred while processing item {item_id}: {e}")
-        item.status = "failed"
+        if poll_errors < LLM_BATCH_MAX_POLL_ERRORS:
+            logger.warning(f"Polling analysis batch {batch_id} failed, retrying: {e}")
+            raise self.retry(countdown=LLM_BATCH_POLL_SECONDS, kwargs={"poll_errors": poll_errors + 1})
+        logger.error(f"Giving up on analysis batch {batch_id}, items will be analyzed individually: {e}")
+        dispatch_discovery_items(item_ids, prescraped_ids)
+        return
+    if analyses is None:
+        raise self.retry(countdown=LLM_BATCH_POLL_SECONDS)
+
+    db: Session = SessionLocal()
+    try:
+        descriptions = [
+            description
+            for (description,) in db.query(models.Item.description).filter(models.Item.id.in_(prescraped_ids))
+            if description
+        ]
+        by_key = {analysis_cache_key(description): description for description in descriptions}
+        stored = store_analyses(
+            db, {by_key[key]: result for key, result in analyses.items() if key in by_key}, latency_ms=0.0
+        )
         db.commit()
+        logger.info(f"Stored {stored} analyses from batch {batch_id}")
+    except Exception as e:
+        logger.error(f"An error occurred while storing analyses of batch {batch_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+    dispatch_discovery_items(item_ids, prescraped_ids)
+
+
+@celery_app.task(name="tasks.revalue_inventory")
+def revalue_inventory_task(batch_size: int = REVALUATION_BATCH_SIZE) -> dict:
+    """
+    Celery task to rewrite `roi_analysis` for every item with a known weight and purity.
+
+    Items are read in primary-key order in batches of `batch_size` and priced with
+    `calculate_roi_batch` against a single spot-price snapshot for the whole run.
+    """
+    spot_price_data = get_silver_spot_price()
+    if "error" in spot_price_data or not spot_price_data.get("rates"):
+        logger.error("Could not retrieve silver spot price for inventory re-valuation.")
+        return {"error": "Could not retrieve silver spot price.", "updated": 0}
+
+    db: Session = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                db.query(models.Item.id, models.Item.weight_grams, models.Item.purity)
+                .filter(
+                    models.Item.id > last_id,
+                    models.Item.weight_grams.isnot(None),
+                    models.Item.purity.isnot(None),
+                )
+                .order_by(models.Item.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            item_ids, weights, purities = zip(*rows)
+            result = calculate_roi_batch(
+                weights, purities, np.zeros(len(item_ids)), spot_price_data=spot_price_data,
+            )
+            columns = zip(result["item_silver_value"].tolist(), result["max_buy_price"].tolist())
+            mappings = [
+                {
+                    "id": item_id,
+                    "roi_analysis": _unpriced_roi_analysis({
+                        "spot_price_per_ounce": result["spot_price_per_ounce"],
+                        "item_silver_value": silver_value,
+                        "max_buy_price": max_buy_price,
+                    }),
+                }
+                for item_id, (silver_value, max_buy_price) in zip(item_ids, columns)
+            ]
+            db.bulk_update_mappings(models.Item, mappings)
+            db.commit()
+
+            updated += len(item_ids)
+            last_id = item_ids[-1]
+
+        logger.info(f"Re-valued {updated} items at spot price {spot_price_data['rates']['XAG']}")
+        return {"updated": updated}
     finally:
         db.close()
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from anyio import to_thread
+
+logger = logging.getLogger(__name__)
+
+# Threads for blocking calls made from async code (`asyncio.to_thread`), per API process.
+# Size it to the blocking upstream calls that may be in flight at once.
+BLOCKING_THREADPOOL_SIZE = int(os.getenv("BLOCKING_THREADPOOL_SIZE", "32"))
+# Threads running the plain `def` endpoints (Starlette's threadpool), per API process.
+SYNC_ENDPOINT_THREADS = int(os.getenv("SYNC_ENDPOINT_THREADS", "40"))
+
+def install_threadpools() -> ThreadPoolExecutor:
+    """
+    Bounds the running event loop's threadpools: the default executor, which runs every
+    `asyncio.to_thread` call, and the limiter of the sync endpoints. Must be called from
+    the event loop, e.g. in the FastAPI startup hook.
+
+    Returns:
+        The new default executor, to be shut down with the loop.
+    """
+    executor = ThreadPoolExecutor(max_workers=BLOCKING_THREADPOOL_SIZE, thread_name_prefix="blocking")
+    asyncio.get_running_loop().set_default_executor(executor)
+    to_thread.current_default_thread_limiter().total_tokens = SYNC_ENDPOINT_THREADS
+    logger.info(
+        f"Blocking threadpool: {BLOCKING_THREADPOOL_SIZE} threads, sync endpoints: {SYNC_ENDPOINT_THREADS} threads"
+    )
+    return executor
@@ -1,40 +1,39 @@
 import logging
-import os
-import requests
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from arbitrage_os.valuation.spot_price import spot_price_cache
 
 logger = logging.getLogger(__name__)
 
+# The API returns the price per ounce, so we need to convert grams to ounces
+# 1 gram = 0.0321507 troy ounces
+GRAMS_TO_TROY_OUNCE = 0.0321507
+# Assume a refining fee of 15%
+REFINING_FEE_RATE = 0.15
+
 def get_silver_spot_price() -> dict:
     """
-    Fetches the current spot price of silver (XAG) from the Metals-API.
+    Returns the current spot price of silver (XAG).
 
-    This function requires a Metals-API key to be set in the environment
-    as `METALS_API_KEY`.
+    Quotes are served from the process-wide spot-price cache, so the Metals-API
+    is only called once per TTL window. See `arbitrage_os.valuation.spot_price`.
 
     Returns:
         A dictionary containing the spot price data or an error message.
     """
-    api_key = os.getenv("METALS_API_KEY")
-    if not api_key:
-        logger.error("METALS_API_KEY environment variable not set.")
-        raise ValueError("METALS_API_KEY environment variable not set.")
-
-    base_url = "https://www.metals-api.com/api/latest"
-    params = {
-        "access_key": api_key,
-        "base": "USD",
-        "symbols": "XAG"  # Silver
-    }
+    return spot_price_cache.get()
 
-    try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching silver spot price: {e}")
-        return {"error": str(e)}
+async def get_silver_spot_price_async() -> dict:
+    """
+    Like `get_silver_spot_price`, without blocking the event loop.
+    """
+    return await spot_price_cache.get_async()
 
-def calculate_roi(weight_grams: float, purity: float, purchase_price: float) -> dict:
+def calculate_roi(
+    weight_grams: float, purity: float, purchase_price: float, spot_price_data: Optional[dict] = None
+) -> dict:
     """
     Calculates the potential ROI for a silver item.
 
@@ -42,25 +41,23 @@ def calculate_roi(weight_grams: float, purity: float, purchase_price: float) ->
         weight_grams: The weight of the item in grams.
         purity: The purity of the silver (e.g., 0.925 for sterling).
         purchase_price: The price the item was purchased for.
+        spot_price_data: An already fetched spot-price quote. Fetched from the cache if not given.
 
     Returns:
         A dictionary with the calculated ROI details.
     """
-    spot_price_data = get_silver_spot_price()
+    if spot_price_data is None:
+        spot_price_data = get_silver_spot_price()
     if "error" in spot_price_data or not spot_price_data.get("rates"):
         logger.error("Could not retrieve silver spot price for ROI calculation.")
         return {"error": "Could not retrieve silver spot price."}
 
-    # The API returns the price per ounce, so we need to convert grams to ounces
-    # 1 gram = 0.0321507 troy ounces
-    grams_to_troy_ounce = 0.0321507
-    price_per_gram = spot_price_data["rates"]["XAG"] * grams_to_troy_ounce
+    price_per_gram = spot_price_data["rates"]["XAG"] * GRAMS_TO_TROY_OUNCE
 
     # Calculate the value of the silver content
     silver_value = weight_grams * purity * price_per_gram
     
-    # Assume a refining fee of 15%
-    refining_fee = silver_value * 0.15
+    refining_fee = silver_value * REFINING_FEE_RATE
     max_buy_price = silver_value - refining_fee
     
     profit = max_buy_price - purchase_price
@@ -73,3 +70,55 @@ def calculate_roi(weight_grams: float, purity: float, purchase_price: float) ->
         "profit": profit,
         "roi_percent": roi
     }
+
+def calculate_roi_batch(
+    weight_grams: Sequence[float],
+    purity: Sequence[float],
+    purchase_price: Sequence[float],
+    spot_price_data: Optional[dict] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculates the potential ROI for many silver items in a single vectorized pass.
+
+    All items are priced against one spot-price snapshot. Items with a purchase
+    price of 0 get an ROI of `inf`, matching `calculate_roi`.
+
+    Args:
+        weight_grams: The weights of the items in grams.
+        purity: The purities of the silver (e.g., 0.925 for sterling).
+        purchase_price: The prices the items were purchased for.
+        spot_price_data: An already fetched spot-price quote, so that several batches
+            can be priced against the same snapshot. Fetched when omitted.
+
+    Returns:
+        A dictionary with the spot price and one array per ROI field, or an error message.
+    """
+    weights = np.asarray(weight_grams, dtype=np.float64)
+    purities = np.asarray(purity, dtype=np.float64)
+    prices = np.asarray(purchase_price, dtype=np.float64)
+    if not (weights.shape == purities.shape == prices.shape) or weights.ndim != 1:
+        raise ValueError("weight_grams, purity and purchase_price must be flat arrays of the same length.")
+
+    if spot_price_data is None:
+        spot_price_data = get_silver_spot_price()
+    if "error" in spot_price_data or not spot_price_data.get("rates"):
+        logger.error("Could not retrieve silver spot price for batch ROI calculation.")
+        return {"error": "Could not retrieve silver spot price."}
+
+    spot_price_per_ounce = spot_price_data["rates"]["XAG"]
+    price_per_gram = spot_price_per_ounce * GRAMS_TO_TROY_OUNCE
+
+    silver_value = weights * purities * price_per_gram
+    max_buy_price = silver_value - silver_value * REFINING_FEE_RATE
+    profit = max_buy_price - prices
+
+    # Rows without a purchase price keep the `inf` fill value instead of dividing by zero.
+    roi = np.divide(profit, prices, out=np.full(prices.shape, np.inf), where=prices > 0) * 100
+
+    return {
+        "spot_price_per_ounce": spot_price_per_ounce,
+        "item_silver_value": silver_value,
+        "max_buy_price": max_buy_price,
+        "profit": profit,
+        "roi_percent": roi,
+    }
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from arbitrage_os.clients import get_http_session
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+SPOT_PRICE_TTL_SECONDS = float(os.getenv("SPOT_PRICE_TTL_SECONDS", "300"))
+SPOT_PRICE_STALE_SECONDS = float(os.getenv("SPOT_PRICE_STALE_SECONDS", "900"))
+# The shared tier reuses the Celery broker so API and worker processes see the same quote.
+SPOT_PRICE_SHARED_CACHE = os.getenv("SPOT_PRICE_SHARED_CACHE", "false").lower() in ("1", "true", "yes")
+SPOT_PRICE_REDIS_URL = os.getenv("SPOT_PRICE_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+SPOT_PRICE_REDIS_KEY = "arbitrage_os:spot_price:XAG"
+
+
+def fetch_silver_spot_price() -> dict:
+    """
+    Fetches the current spot price of silver (XAG) from the Metals-API.
+
+    This function requires a Metals-API key to be set in the environment
+    as `METALS_API_KEY`.
+
+    Returns:
+        A dictionary containing the spot price data or an error message.
+    """
+    api_key = os.getenv("METALS_API_KEY")
+    if not api_key:
+        logger.error("METALS_API_KEY environment variable not set.")
+        raise ValueError("METALS_API_KEY environment variable not set.")
+
+    base_url = "https://www.metals-api.com/api/latest"
+    params = {
+        "access_key": api_key,
+        "base": "USD",
+        "symbols": "XAG"  # Silver
+    }
+
+    try:
+        response = get_http_session().get(base_url, params=params, timeout=10)
+        response.raise_for_status()  # Raise an exception for bad status codes
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching silver spot price: {e}")
+        return {"error": str(e)}
+
+
+def _is_valid_quote(data: Optional[dict]) -> bool:
+    return bool(data) and "error" not in data and bool(data.get("rates", {}).get("XAG"))
+
+
+class SpotPriceCache:
+    """
+    In-process TTL cache in front of the spot-price upstream.
+
+    - Fresh entries (younger than `ttl`) are served directly.
+    - Stale entries (younger than `ttl + stale_ttl`) are served immediately while a
+      single background refresh is started (stale-while-revalidate).
+    - On a miss, concurrent callers share one upstream request (single-flight).
+    - When `redis_url` is set, quotes are also read from and written to Redis so
+      that every API and worker process shares one upstream call per TTL.
+    """
+
+    def __init__(
+        self,
+        fetcher: Callable[[], dict],
+        ttl: float = SPOT_PRICE_TTL_SECONDS,
+        stale_ttl: float = SPOT_PRICE_STALE_SECONDS,
+        redis_url: Optional[str] = None,
+    ):
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._redis_url = redis_url
+        self._redis = None
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._value: Optional[dict] = None
+        self._fetched_at = 0.0  # wall-clock time, so it is comparable with the shared tier
+
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "shared_hits": 0,
+            "upstream_calls": 0,
+            "upstream_errors": 0,
+        }
+
+    def get(self) -> dict:
+        """
+        Returns the current spot-price quote, refreshing it from the upstream only when needed.
+        """
+        with self._lock:
+            value, age = self._value, time.time() - self._fetched_at
+            if value is not None and age < self.ttl:
+                self._stats["hits"] += 1
+                return value
+            if value is not None and age < self.ttl + self.stale_ttl:
+                self._stats["stale_hits"] += 1
+                start_refresh = not self._refreshing
+                self._refreshing = True
+            else:
+                self._stats["misses"] += 1
+                start_refresh = None
+
+        if start_refresh is None:
+            return self._refresh()
+        if start_refresh:
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+        return value
+
+    async def get_async(self) -> dict:
+        """
+        Like `get`, for async callers. A fresh quote is served inline; anything that may
+        wait on the upstream (or the shared tier) runs in a worker thread.
+        """
+        with self._lock:
+            if self._value is not None and time.time() - self._fetched_at < self.ttl:
+                self._stats["hits"] += 1
+                return self._value
+        return await asyncio.to_thread(self.get)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns a snapshot of the cache counters.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["age_seconds"] = time.time() - self._fetched_at if self._value is not None else None
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """
+        Drops the cached quote and resets the counters.
+        """
+        with self._lock:
+            self._value = None
+            self._fetched_at = 0.0
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def _background_refresh(self) -> None:
+        try:
+            self._refresh()
+        except Exception as e:
+            logger.error(f"Background spot price refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh(self) -> dict:
+        with self._refresh_lock:
+            # Another caller may have refreshed while we were waiting for the lock.
+            with self._lock:
+                if self._value is not None and time.time() - self._fetched_at < self.ttl:
+                    return self._value
+
+            shared = self._read_shared()
+            if shared is not None:
+                data, fetched_at = shared
+                if time.time() - fetched_at < self.ttl:
+                    self._store(data, fetched_at)
+                    with self._lock:
+                        self._stats["shared_hits"] += 1
+                    return data
+
+            with self._lock:
+                self._stats["upstream_calls"] += 1
+            data = self._fetcher()
+            if not _is_valid_quote(data):
+                with self._lock:
+                    self._stats["upstream_errors"] += 1
+                    stale = self._value
+                    within_window = time.time() - self._fetched_at < self.ttl + self.stale_ttl
+                if stale is not None and within_window:
+                    logger.warning("Spot price refresh failed, serving last known quote.")
+                    return stale
+                return data
+
+            fetched_at = time.time()
+            self._store(data, fetched_at)
+            self._write_shared(data, fetched_at)
+            return data
+
+    def _store(self, data: dict, fetched_at: float) -> None:
+        with self._lock:
+            self._value = data
+            self._fetched_at = fetched_at
+
+    def _get_redis(self):
+        if self._redis is None and self._redis_url:
+            import redis
+
+            self._redis = redis.Redis.from_url(self._redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._redis
+
+    def _read_shared(self) -> Optional[tuple]:
+        if not self._redis_url:
+            return None
+        try:
+            raw = self._get_redis().get(SPOT_PRICE_REDIS_KEY)
+            if raw is None:
+                return None
+            payload = json.loads(raw)
+            return payload["data"], float(payload["fetched_at"])
+        except Exception as e:
+            logger.warning(f"Could not read spot price from shared cache: {e}")
+            return None
+
+    def _write_shared(self, data: dict, fetched_at: float) -> None:
+        if not self._redis_url:
+            return
+        try:
+            payload = json.dumps({"data": data, "fetched_at": fetched_at})
+            expiry = max(1, int(self.ttl + self.stale_ttl))
+            self._get_redis().set(SPOT_PRICE_REDIS_KEY, payload, ex=expiry)
+        except Exception as e:
+            logger.warning(f"Could not write spot price to shared cache: {e}")
+
+
+spot_price_cache = SpotPriceCache(
+    fetcher=fetch_silver_spot_price,
+    redis_url=SPOT_PRICE_REDIS_URL if SPOT_PRICE_SHARED_CACHE else None,
+)
+
+
+def get_spot_price_cache_stats() -> Dict[str, Any]:
+    """
+    Returns hit/miss counters for the process-wide spot-price cache.
+    """
+    return spot_price_cache.stats()
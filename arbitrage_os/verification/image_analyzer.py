@@ -1,12 +1,50 @@
+import asyncio
+import base64
 import logging
 import os
+from typing import Any, Dict, List, Optional, Tuple, Union
 from ximilar.client import RecognitionClient
 
+from arbitrage_os import clients
+from arbitrage_os.db import database
+from arbitrage_os.discovery.async_scraper import get_async_scraper, run_in_thread_loop
+from arbitrage_os.verification.image_cache import (
+    get_cached_image_analyses,
+    group_near_duplicates,
+    image_key,
+    store_image_analyses,
+)
+
 logger = logging.getLogger(__name__)
 
-def analyze_image_for_hallmarks(image_path: str) -> dict:
+# Images sent to Ximilar in one recognition call
+XIMILAR_BATCH_SIZE = int(os.getenv("XIMILAR_BATCH_SIZE", "10"))
+
+def _ximilar_config() -> Tuple[str, str, str]:
+    api_token = os.getenv("XIMILAR_API_TOKEN")
+    workspace_id = os.getenv("XIMILAR_WORKSPACE_ID")
+    task_id = os.getenv("XIMILAR_TASK_ID")
+
+    if not all([api_token, workspace_id, task_id]):
+        error_msg = (
+            "One or more Ximilar environment variables are not set: "
+            "XIMILAR_API_TOKEN, XIMILAR_WORKSPACE_ID, XIMILAR_TASK_ID"
+        )
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    return api_token, workspace_id, task_id
+
+def get_recognition_client() -> RecognitionClient:
+    """
+    Returns the process-wide Ximilar client, creating it on first use.
     """
-    Analyzes an image to identify silver hallmarks using the Ximilar AI API.
+    api_token, workspace_id, _ = _ximilar_config()
+    return clients.get_recognition_client(api_token, workspace_id)
+
+def recognize_images(images: List[bytes]) -> List[Optional[dict]]:
+    """
+    Analyzes images for silver hallmarks with the Ximilar AI API, `XIMILAR_BATCH_SIZE`
+    images per request. The images are sent base64-encoded, never written to disk.
 
     This function requires the following environment variables to be set:
     - `XIMILAR_API_TOKEN`
@@ -14,26 +52,151 @@ def analyze_image_for_hallmarks(image_path: str) -> dict:
     - `XIMILAR_TASK_ID`
 
     Args:
-        image_path: The local path to the image file.
+        images: The image contents.
+
+    Returns:
+        One analysis per image, in the same shape as a single-image Ximilar response,
+        or None for the images Ximilar could not process.
+    """
+    _, _, task_id = _ximilar_config()
+    client = get_recognition_client()
+    analyses: List[Optional[dict]] = []
+    for start in range(0, len(images), XIMILAR_BATCH_SIZE):
+        batch = images[start:start + XIMILAR_BATCH_SIZE]
+        records = [{"_base64": base64.b64encode(image).decode("ascii")} for image in batch]
+        try:
+            result = client.recognize(task_id=task_id, records=records)
+        except Exception as e:
+            logger.error(f"Ximilar recognition of {len(batch)} images failed: {e}")
+            analyses.extend([None] * len(batch))
+            continue
+        returned = result.get("records") or []
+        for i in range(len(batch)):
+            record = returned[i] if i < len(returned) else None
+            if record is None or record.get("_status", {}).get("code", 200) != 200:
+                analyses.append(None)
+                continue
+            record.pop("_base64", None)
+            analyses.append({"records": [record], "status": result.get("status")})
+    return analyses
+
+def recognize_images_cached(images: List[bytes]) -> List[Optional[dict]]:
+    """
+    Same as `recognize_images`, but images seen before (byte-identical, or a near-duplicate
+    by perceptual hash, e.g. a relisted photo) reuse their stored analysis, and repeats
+    within `images` are sent to Ximilar once.
+    """
+    _, _, task_id = _ximilar_config()
+    keys = [image_key(image) for image in images]
+    db = database.SessionLocal()
+    try:
+        try:
+            analyses = get_cached_image_analyses(db, task_id, keys)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Image analysis cache lookup failed: {e}")
+            db.rollback()
+            analyses = [None] * len(images)
+
+        missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+        representatives = group_near_duplicates([keys[i] for i in missing])
+        unique = sorted(set(representatives))
+        recognized = dict(zip(unique, recognize_images([images[missing[j]] for j in unique])))
+        for i, representative in zip(missing, representatives):
+            analyses[i] = recognized[representative]
+        logger.info(f"Analyzed {len(images)} images with {len(unique)} Ximilar lookups")
+
+        try:
+            store_image_analyses(db, task_id, [(keys[i], analyses[i]) for i in missing if analyses[i] is not None])
+            db.commit()
+        except Exception as e:
+            logger.error(f"Storing image analyses failed: {e}")
+            db.rollback()
+    finally:
+        db.close()
+    return analyses
+
+def analyze_image_for_hallmarks(image: Union[bytes, str]) -> dict:
+    """
+    Analyzes one image to identify silver hallmarks using the Ximilar AI API.
+
+    Args:
+        image: The image contents, or the local path to the image file.
 
     Returns:
         A dictionary containing the analysis from the Ximilar API.
     """
-    api_token = os.getenv("XIMILAR_API_TOKEN")
-    workspace_id = os.getenv("XIMILAR_WORKSPACE_ID")
-    task_id = os.getenv("XIMILAR_TASK_ID")
+    if isinstance(image, str):
+        _, _, task_id = _ximilar_config()
+        return get_recognition_client().recognize(task_id=task_id, records=[{"_file": image}])
+    analysis = recognize_images_cached([image])[0]
+    if analysis is None:
+        raise ValueError("Ximilar could not analyze the image.")
+    return analysis
 
-    if not all([api_token, workspace_id, task_id]):
-        error_msg = (
-            "One or more Ximilar environment variables are not set: "
-            "XIMILAR_API_TOKEN, XIMILAR_WORKSPACE_ID, XIMILAR_TASK_ID"
-        )
-        logger.error(error_msg)
-        raise ValueError(error_msg)
+async def analyze_image_for_hallmarks_async(image: Union[bytes, str]) -> dict:
+    """
+    Like `analyze_image_for_hallmarks`, without blocking the event loop. The Ximilar SDK
+    only makes blocking calls, so the analysis runs in a worker thread.
+    """
+    return await asyncio.to_thread(analyze_image_for_hallmarks, image)
+
+async def download_images(image_urls: List[str]) -> Dict[str, Optional[bytes]]:
+    """
+    Downloads images concurrently over the shared scraper connection pool.
 
-    client = RecognitionClient(token=api_token, workspace=workspace_id)
-    
-    result = client.recognize(task_id=task_id, records=[{"_file": image_path}])
+    Returns:
+        A dictionary mapping each URL to its contents, or None if the download failed.
+    """
+    scraper = get_async_scraper()
+
+    async def download(url: str) -> Optional[bytes]:
+        try:
+            return (await scraper.fetch(url)).content
+        except Exception as e:
+            logger.error(f"Error downloading image {url}: {e}")
+            return None
+
+    urls = list(dict.fromkeys(image_urls))
+    return dict(zip(urls, await asyncio.gather(*(download(url) for url in urls))))
+
+def analyze_listing_images(image_urls: List[str]) -> List[Dict[str, Any]]:
+    """
+    Downloads a listing's images concurrently and analyzes the ones not seen before in
+    batches, from synchronous code such as a Celery task.
+
+    Returns:
+        The `{"image_url", "analysis"}` entries of the images that could be analyzed, in order.
+    """
+    downloaded = run_in_thread_loop(download_images(image_urls))
+    found = [(url, content) for url, content in downloaded.items() if content]
+    analyses = recognize_images_cached([content for _, content in found]) if found else []
+    return [
+        {"image_url": url, "analysis": analysis}
+        for (url, _), analysis in zip(found, analyses)
+        if analysis is not None
+    ]
 
-    return result
+def top_hallmark(image_analysis_results: Optional[List[Dict[str, Any]]]) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Finds the most confident label across the Ximilar analyses of an item's images.
 
+    Args:
+        image_analysis_results: The stored `{"image_url", "analysis"}` entries of an item.
+
+    Returns:
+        A `(label, confidence)` tuple, or `(None, None)` when no image was labelled.
+    """
+    best_name, best_prob = None, None
+    for entry in image_analysis_results or []:
+        analysis = entry.get("analysis") if isinstance(entry, dict) else None
+        records = analysis.get("records", []) if isinstance(analysis, dict) else []
+        for record in records:
+            labels = list(record.get("best_labels") or []) + list(record.get("labels") or [])
+            if record.get("best_label"):
+                labels.append(record["best_label"])
+            for label in labels:
+                prob = label.get("prob")
+                if label.get("name") and prob is not None and (best_prob is None or prob > best_prob):
+                    best_name, best_prob = label["name"], float(prob)
+    return best_name, best_prob
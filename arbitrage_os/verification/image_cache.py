@@ -0,0 +1,168 @@
+import hashlib
+import io
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from arbitrage_os.db.image_analysis_cache import ImageAnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv("IMAGE_CACHE_TTL_SECONDS", str(180 * 24 * 3600)))
+# Images whose dhashes differ in at most this many of 64 bits are treated as the same photo.
+# Lookups find every match up to 7 bits (a band at most one bit apart).
+IMAGE_HASH_MAX_DISTANCE = min(int(os.getenv("IMAGE_HASH_MAX_DISTANCE", "4")), 7)
+
+BAND_BITS = 16
+BAND_COUNT = 4
+
+# An image key is its SHA-256 and its dhash (None if the image could not be decoded).
+ImageKey = Tuple[str, Optional[int]]
+
+def dhash(image: bytes) -> Optional[int]:
+    """
+    Computes the 64-bit difference hash of an image: whether each pixel of a 9x8 grayscale
+    thumbnail is brighter than its left neighbour. Resizing, recompression and small edits
+    flip few bits, so relisted photos hash close together.
+
+    Returns:
+        The hash, or None if the bytes are not a decodable image.
+    """
+    try:
+        with Image.open(io.BytesIO(image)) as img:
+            img.draft("L", (64, 64))  # JPEGs decode straight to a small grayscale image
+            pixels = np.asarray(img.convert("L").resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def image_key(image: bytes) -> ImageKey:
+    return hashlib.sha256(image).hexdigest(), dhash(image)
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+def hash_bands(value: int) -> List[int]:
+    """
+    Splits a dhash into its 16-bit bands. Two hashes at most `BAND_COUNT - 1` bits apart
+    share a band exactly, and at most `2 * BAND_COUNT - 1` bits apart share a band up to one bit.
+    """
+    return [(value >> (BAND_BITS * i)) & ((1 << BAND_BITS) - 1) for i in range(BAND_COUNT)]
+
+def _band_values(band: int, max_distance: int) -> List[int]:
+    if max_distance < BAND_COUNT:
+        return [band]
+    return [band] + [band ^ (1 << bit) for bit in range(BAND_BITS)]
+
+def get_cached_image_analyses(
+    db: Session, task_id: str, keys: Sequence[ImageKey], max_distance: int = IMAGE_HASH_MAX_DISTANCE
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Looks up the cached analyses of images, first by exact content and then by the nearest
+    dhash within `max_distance` bits. The caller commits.
+
+    Returns:
+        One analysis per key, or None on a miss.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=IMAGE_CACHE_TTL_SECONDS)
+    live = db.query(ImageAnalysisCacheEntry).filter(
+        ImageAnalysisCacheEntry.task_id == task_id, ImageAnalysisCacheEntry.stored_at >= cutoff
+    )
+    exact = {
+        entry.content_hash: entry
+        for entry in live.filter(ImageAnalysisCacheEntry.content_hash.in_({content_hash for content_hash, _ in keys}))
+    }
+
+    found: List[Optional[ImageAnalysisCacheEntry]] = []
+    for content_hash, image_dhash in keys:
+        entry = exact.get(content_hash)
+        if entry is None and image_dhash is not None:
+            bands = hash_bands(image_dhash)
+            columns = [getattr(ImageAnalysisCacheEntry, f"band{i}") for i in range(BAND_COUNT)]
+            candidates = live.filter(or_(*(
+                column.in_(_band_values(band, max_distance)) for column, band in zip(columns, bands)
+            )))
+            distances = [
+                (hamming(image_dhash, int(candidate.dhash, 16)), candidate.id, candidate)
+                for candidate in candidates
+                if candidate.dhash
+            ]
+            nearest = min(distances, default=None, key=lambda match: match[:2])
+            if nearest is not None and nearest[0] <= max_distance:
+                entry = nearest[2]
+        found.append(entry)
+
+    now = datetime.utcnow()
+    for entry in {entry.id: entry for entry in found if entry is not None}.values():
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_accessed = now
+    return [json.loads(entry.result) if entry is not None else None for entry in found]
+
+def store_image_analyses(db: Session, task_id: str, analyses: Sequence[Tuple[ImageKey, Dict[str, Any]]]) -> int:
+    """
+    Stores image analyses under their image keys. The caller commits.
+
+    Returns:
+        The number of stored analyses.
+    """
+    now = datetime.utcnow()
+    analyses = dict(analyses)
+    # Expired entries are replaced.
+    db.query(ImageAnalysisCacheEntry).filter(
+        ImageAnalysisCacheEntry.task_id == task_id,
+        ImageAnalysisCacheEntry.content_hash.in_({content_hash for content_hash, _ in analyses}),
+        ImageAnalysisCacheEntry.stored_at < now - timedelta(seconds=IMAGE_CACHE_TTL_SECONDS),
+    ).delete(synchronize_session=False)
+    stored = 0
+    for (content_hash, image_dhash), analysis in analyses.items():
+        bands = hash_bands(image_dhash) if image_dhash is not None else [None] * BAND_COUNT
+        entry = ImageAnalysisCacheEntry(
+            task_id=task_id,
+            content_hash=content_hash,
+            dhash=f"{image_dhash:016x}" if image_dhash is not None else None,
+            **{f"band{i}": band for i, band in enumerate(bands)},
+            result=json.dumps(analysis),
+            hit_count=0,
+            stored_at=now,
+            last_accessed=now,
+        )
+        try:
+            with db.begin_nested():
+                db.add(entry)
+            stored += 1
+        except IntegrityError:
+            # Another worker stored the same image first.
+            logger.debug("Image analysis cache entry already stored by another worker.")
+    return stored
+
+def group_near_duplicates(keys: Sequence[ImageKey], max_distance: int = IMAGE_HASH_MAX_DISTANCE) -> List[int]:
+    """
+    Maps every image to the first earlier image it duplicates, so a batch sends each photo once.
+
+    Returns:
+        For each key, the index of its representative (its own index if it is the first).
+    """
+    representatives: List[int] = []
+    groups = []
+    for i, (content_hash, image_dhash) in enumerate(keys):
+        for j in groups:
+            other_hash, other_dhash = keys[j]
+            if content_hash == other_hash or (
+                image_dhash is not None and other_dhash is not None and hamming(image_dhash, other_dhash) <= max_distance
+            ):
+                representatives.append(j)
+                break
+        else:
+            groups.append(i)
+            representatives.append(i)
+    return representatives
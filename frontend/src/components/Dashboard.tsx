@@ -1,32 +1,48 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
-import { Container, Alert, Spinner, Card, Row, Col, Badge } from 'react-bootstrap';
+import { Container, Alert, Spinner, Card, Row, Col, Badge, Button } from 'react-bootstrap';
 
 const API_URL = 'http://localhost:8000';
+const PAGE_SIZE = 60;
+// Only the columns the cards render; the large description and analysis JSON stay on the server.
+const CARD_FIELDS = 'id,url,analysis,status,score,latitude,longitude,image_urls';
+// Event names of the progress stream, one per pipeline status
+const PROGRESS_STATUSES = [
+    'scraping', 'analyzing_text', 'geocoding', 'analyzing_images', 'calculating_roi',
+    'completed', 'filtered', 'failed_scraping', 'failed',
+];
 
 interface Item {
     id: number;
     url: string;
-    description: string;
     analysis: string; // Now stores only AI reasoning
     status: string;
     score: number | null;
     latitude: number | null;
     longitude: number | null;
-    image_urls: string | null; // JSON string of image URLs
+    image_urls: string[] | null;
 }
 
 const Dashboard: React.FC = () => {
     const [items, setItems] = useState<Item[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    const fetchPage = async (cursor: string | null) => {
+        // Items come newest first; the cursor for the next page is in the X-Next-Cursor header.
+        const response = await axios.get<Item[]>(`${API_URL}/discover/items/`, {
+            params: { limit: PAGE_SIZE, fields: CARD_FIELDS, ...(cursor ? { cursor } : {}) },
+        });
+        setNextCursor(response.headers['x-next-cursor'] ?? null);
+        return response.data;
+    };
 
     const fetchItems = async () => {
         try {
             setLoading(true);
-            const response = await axios.get<Item[]>(`${API_URL}/items/`);
-            // Sort items by ID descending to show newest first
-            setItems(response.data.sort((a, b) => b.id - a.id));
+            setItems(await fetchPage(null));
             setError(null);
         } catch (err) {
             setError('Failed to fetch items.');
@@ -36,10 +52,38 @@ const Dashboard: React.FC = () => {
         }
     };
 
+    const loadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const page = await fetchPage(nextCursor);
+            setItems((current) => [...current, ...page]);
+        } catch (err) {
+            setError('Failed to fetch items.');
+            console.error(err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         fetchItems();
     }, []);
 
+    useEffect(() => {
+        // Live pipeline progress of every item, instead of polling /discover/items/.
+        const events = new EventSource(`${API_URL}/discover/items/events`);
+        const onProgress = (event: MessageEvent) => {
+            const progress: { item_id: number; status: string; score?: number | null } = JSON.parse(event.data);
+            setItems((current) => current.map((item) => item.id !== progress.item_id ? item : {
+                ...item,
+                status: progress.status,
+                score: progress.score !== undefined ? progress.score : item.score,
+            }));
+        };
+        PROGRESS_STATUSES.forEach((status) => events.addEventListener(status, onProgress as EventListener));
+        return () => events.close();
+    }, []);
+
     const getScoreBadgeVariant = (score: number | null) => {
         if (score === null) return 'secondary';
         if (score >= 8) return 'success';
@@ -47,15 +91,6 @@ const Dashboard: React.FC = () => {
         return 'danger';
     };
 
-    const parseImageUrls = (imageUrlsJson: string | null): string[] => {
-        try {
-            return imageUrlsJson ? JSON.parse(imageUrlsJson) : [];
-        } catch (e) {
-            console.error("Error parsing image URLs:", e);
-            return [];
-        }
-    };
-
     if (loading) {
         return (
             <Container className="text-center mt-5">
@@ -80,7 +115,7 @@ const Dashboard: React.FC = () => {
             {items.length > 0 ? (
                 <Row xs={1} md={2} lg={3} className="g-4">
                     {items.map((item) => {
-                        const imageUrls = parseImageUrls(item.image_urls);
+                        const imageUrls = item.image_urls || [];
                         const firstImageUrl = imageUrls.length > 0 ? imageUrls[0] : null;
                         const googleMapsLink = (item.latitude && item.longitude) 
                             ? `https://www.google.com/maps/search/?api=1&query=${item.latitude},${item.longitude}`
@@ -127,6 +162,13 @@ const Dashboard: React.FC = () => {
             ) : (
                 <Alert variant="info">No items discovered yet. Use the "Discovery" page to add some.</Alert>
             )}
+            {nextCursor && (
+                <div className="text-center my-4">
+                    <Button onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </Button>
+                </div>
+            )}
         </Container>
     );
 };
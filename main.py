@@ -12,10 +12,13 @@ logger = logging.getLogger(__name__)
 
 # Database imports
 from arbitrage_os.db import models
-from arbitrage_os.db.database import engine
+from arbitrage_os.db.database import async_engine, engine
 
 # API Router imports
 from arbitrage_os.api import admin, auth, discovery, logistics, valuation, verification
+from arbitrage_os.clients import close_clients, init_clients
+from arbitrage_os.discovery.async_scraper import close_async_scraper
+from arbitrage_os.threadpool import install_threadpools
 
 # CORS configuration
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:3001").split(",")
@@ -37,12 +40,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link"],
 )
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
+    install_threadpools()
+    init_clients()
     create_db_and_tables()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await close_async_scraper()
+    close_clients()
+    await async_engine.dispose()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Arbitrage OS"}
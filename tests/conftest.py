@@ -1,35 +1,51 @@
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from arbitrage_os.clients import registry
 from arbitrage_os.db.database import Base
 
 @pytest.fixture(scope="function", autouse=True)
-def test_db_setup_and_teardown(monkeypatch):
+def test_db_setup_and_teardown(monkeypatch, tmp_path):
     """
     Central fixture to set up and tear down a test database for each test function.
     This fixture will automatically apply to all tests.
     """
-    # 1. Define the test database URL (in-memory SQLite)
-    TEST_SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+    # 1. Define the test database URL (a temporary SQLite file, shared by the sync and async engines)
+    TEST_SQLALCHEMY_DATABASE_URL = f"sqlite:///{tmp_path / 'test.db'}"
 
     # 2. Create the test engine
     test_engine = create_engine(
         TEST_SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
     )
     
-    # 3. Create a test session maker
+    # Each test runs its coroutines in a new event loop, so async connections are not pooled.
+    test_async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool
+    )
+
+    # 3. Create the test session makers
     TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    TestAsyncSessionLocal = async_sessionmaker(test_async_engine, autoflush=False, expire_on_commit=False)
 
-    # 4. Monkeypatch the original engine and SessionLocal in the database module
+    # 4. Monkeypatch the original engines and session makers in the database module
     monkeypatch.setattr("arbitrage_os.db.database.engine", test_engine)
     monkeypatch.setattr("arbitrage_os.db.database.SessionLocal", TestSessionLocal)
+    monkeypatch.setattr("arbitrage_os.db.database.async_engine", test_async_engine)
+    monkeypatch.setattr("arbitrage_os.db.database.AsyncSessionLocal", TestAsyncSessionLocal)
 
     # 5. Create all tables on the test engine
-    from arbitrage_os.db import models
+    from arbitrage_os.db import models, scraping_source, scraped_page, analysis_cache, geocode_cache, distance_cache, image_analysis_cache
     Base.metadata.create_all(bind=test_engine)
 
-    # 6. Yield control to the test function
+    # 6. Start without shared clients, so mocks and env changes are picked up
+    registry.reset()
+
+    # 7. Yield control to the test function
     yield
 
-    # 7. Drop all tables after the test function completes
+    # 8. Close the clients and drop all tables after the test function completes
+    registry.close()
     Base.metadata.drop_all(bind=test_engine)
+    test_engine.dispose()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark for the HTML extraction backends in `arbitrage_os.discovery.html_parser`.
+
+Usage:
+    python tests/performance/bench_html_parser.py [CORPUS_DIR] [--repeat N]
+
+CORPUS_DIR should contain saved listing pages (`*.html`). Without it, a synthetic
+corpus of marketplace-style listing pages is generated so the backends can still
+be compared. Every backend's output is checked against the BeautifulSoup
+reference before it is timed.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from arbitrage_os.discovery.html_parser import PARSER_BACKENDS, is_backend_available  # noqa: E402
+
+WORDS = (
+    "sterling silver antique estate sale flatware hallmark heavy tarnish collection "
+    "pickup cash only vintage tea set plated candlesticks serving tray pieces great condition"
+).split()
+
+
+def synthetic_listing(rng: random.Random, listings: int = 300) -> bytes:
+    rows = []
+    for i in range(listings):
+        title = " ".join(rng.choice(WORDS) for _ in range(8))
+        body = " ".join(rng.choice(WORDS) for _ in range(60))
+        rows.append(
+            f'<li class="result-row" data-pid="{i}"><a href="/listing/{i}.html">'
+            f'<img src="//images.example.com/{i}_300x300.jpg" alt="{title}"></a>'
+            f'<div class="result-info"><h3>{title}</h3><span class="price">${rng.randint(5, 900)}</span>'
+            f'<p>{body}</p><!-- tracking {i} --></div></li>'
+        )
+    scripts = "".join(f"<script>window.__data{i} = {{\"k\": {i}}};</script>" for i in range(40))
+    return (
+        "<!DOCTYPE html><html><head><title>Marketplace listings</title>"
+        f"<style>.result-row {{ color: #333; }}</style>{scripts}</head>"
+        f"<body><header><nav><a href='/'>Home</a></nav></header><ul class='rows'>{''.join(rows)}</ul>"
+        "<footer>All listings are provided by their sellers.</footer></body></html>"
+    ).encode("utf-8")
+
+
+def load_corpus(corpus_dir: str):
+    if corpus_dir:
+        paths = sorted(Path(corpus_dir).glob("*.html"))
+        if not paths:
+            raise SystemExit(f"No *.html files found in {corpus_dir}")
+        return [(path.read_bytes(), f"http://example.com/{path.name}") for path in paths]
+    rng = random.Random(42)
+    return [(synthetic_listing(rng), f"http://example.com/search/{i}") for i in range(20)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", default=os.getenv("HTML_CORPUS_DIR"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus_dir)
+    size_kb = sum(len(content) for content, _ in corpus) / 1024
+    print(f"Corpus: {len(corpus)} pages, {size_kb:.0f} KiB")
+
+    reference = [PARSER_BACKENDS["bs4"](content, url) for content, url in corpus]
+    timings = {}
+    for name, backend in PARSER_BACKENDS.items():
+        if not is_backend_available(name):
+            print(f"{name:>10}: not installed")
+            continue
+        mismatches = sum(
+            backend(content, url) != expected for (content, url), expected in zip(corpus, reference)
+        )
+        runs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for content, url in corpus:
+                backend(content, url)
+            runs.append(time.perf_counter() - start)
+        timings[name] = statistics.median(runs)
+        per_page_ms = timings[name] / len(corpus) * 1000
+        print(f"{name:>10}: {per_page_ms:8.2f} ms/page  mismatches vs bs4: {mismatches}/{len(corpus)}")
+
+    for name, elapsed in timings.items():
+        if name != "bs4":
+            print(f"{name} speedup over bs4: {timings['bs4'] / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import io
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from arbitrage_os.api import admin, auth, discovery, logistics, valuation, verification
+from arbitrage_os.db import database, models
+from arbitrage_os.logistics import geocoding
+from arbitrage_os.logistics.geocode_cache import geocode_cache
+from arbitrage_os.logistics.rate_limit import TokenBucket
+from arbitrage_os.valuation.spot_price import spot_price_cache
+
+# Every mocked upstream call blocks this long; an endpoint that makes it on the event
+# loop stalls the loop by as much.
+BLOCKING_SECONDS = 0.3
+MAX_LOOP_STALL_SECONDS = 0.1
+
+blocked_calls = []
+
+
+def blocking(return_value=None):
+    def call(*args, **kwargs):
+        blocked_calls.append(args)
+        time.sleep(BLOCKING_SECONDS)
+        return return_value
+    return MagicMock(side_effect=call)
+
+
+async def max_loop_stall(awaitable):
+    """
+    Awaits `awaitable` while a heartbeat measures how long the event loop goes without running it.
+
+    Returns:
+        The result and the longest gap between two heartbeats, in seconds.
+    """
+    gaps = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    try:
+        result = await awaitable
+    finally:
+        done.set()
+        await task
+    return result, max(gaps, default=0.0)
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_caches(monkeypatch):
+    blocked_calls.clear()
+    spot_price_cache.clear()
+    geocode_cache.clear_memory()
+    monkeypatch.setattr(geocoding, "get_gazetteer", lambda: None)
+    yield
+    spot_price_cache.clear()
+    geocode_cache.clear_memory()
+
+
+def calculate_roi(mocker):
+    mocker.patch.object(spot_price_cache, "_fetcher", blocking({"rates": {"XAG": 30.0}}))
+    return valuation.calculate_roi_endpoint(valuation.RoiRequest(weight_grams=100, purity=0.925, purchase_price=50))
+
+
+def calculate_roi_batch(mocker):
+    mocker.patch.object(spot_price_cache, "_fetcher", blocking({"rates": {"XAG": 30.0}}))
+    request = valuation.BatchRoiRequest(weight_grams=[100], purity=[0.925], purchase_price=[50])
+    return valuation.calculate_roi_batch_endpoint(request)
+
+
+def geocode(mocker):
+    mocker.patch.object(geocoding, "clean_addresses", blocking(["1 Oak Street"]))
+    location = SimpleNamespace(latitude=1.0, longitude=1.0, address="1 Oak St")
+    mocker.patch.object(geocoding, "get_geolocator", return_value=MagicMock(geocode=blocking(location)))
+    mocker.patch.object(geocoding, "geocoder_rate_limit", TokenBucket(rate=1000, capacity=10))
+    return logistics.geocode_address_endpoint(logistics.GeocodeRequest(address="oak st #1"))
+
+
+def optimize_route(mocker):
+    mocker.patch("arbitrage_os.logistics.routing.optimize_route", blocking({"route": []}))
+    coordinates = [logistics.Coordinate(lat=1.0, lng=1.0), logistics.Coordinate(lat=2.0, lng=2.0)]
+    return logistics.optimize_route_endpoint(logistics.RouteRequest(coordinates=coordinates))
+
+
+def analyze_image(mocker):
+    mocker.patch("arbitrage_os.verification.image_analyzer.recognize_images_cached", blocking([{"records": []}]))
+    return verification.analyze_image_endpoint(UploadFile(file=io.BytesIO(b"image"), filename="item.jpg"))
+
+
+async def run_discovery(mocker):
+    pipeline = MagicMock()
+    pipeline.return_value.apply_async = blocking()
+    mocker.patch.object(discovery, "discovery_pipeline", pipeline)
+    async with database.AsyncSessionLocal() as db:
+        return await discovery.run_discovery("http://example.com/item", db)
+
+
+async def run_scheduled_scrape(mocker):
+    mocker.patch.object(admin, "dispatch_discovery_batch", blocking())
+    async with database.AsyncSessionLocal() as db:
+        return await admin.run_scheduled_scrape(db)
+
+
+async def login(mocker):
+    mocker.patch("arbitrage_os.auth.security.verify_password", blocking(True))
+    with database.SessionLocal() as db:
+        db.add(models.User(username="alice", email="alice@example.com", hashed_password="hash"))
+        db.commit()
+    form_data = SimpleNamespace(username="alice", password="secret")
+    async with database.AsyncSessionLocal() as db:
+        return await auth.login_for_access_token(form_data, db)
+
+
+@pytest.mark.parametrize(
+    "call_endpoint",
+    [calculate_roi, calculate_roi_batch, geocode, optimize_route, analyze_image, run_discovery, run_scheduled_scrape, login],
+)
+def test_async_endpoints_do_not_block_the_event_loop(call_endpoint, mocker):
+    # Arrange
+    async def run():
+        return await max_loop_stall(call_endpoint(mocker))
+
+    # Act
+    _, stall = asyncio.run(run())
+
+    # Assert
+    assert blocked_calls  # The blocking upstream was actually called
+    assert stall < MAX_LOOP_STALL_SECONDS
+
+
+def test_max_loop_stall_detects_blocking_calls():
+    # Arrange
+    async def blocking_endpoint():
+        time.sleep(BLOCKING_SECONDS)
+
+    # Act
+    _, stall = asyncio.run(max_loop_stall(blocking_endpoint()))
+
+    # Assert
+    assert stall >= BLOCKING_SECONDS
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+
+import httpx
+
+from arbitrage_os.discovery import async_scraper
+from arbitrage_os.discovery.async_scraper import AsyncScraper
+
+PAGE_HTML = b"""
+<html>
+    <body>
+        <p>Sterling tea set</p>
+        <img src="/images/set.jpg">
+    </body>
+</html>
+"""
+
+
+def test_scrape_many_yields_every_url_once():
+    # Arrange
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200, content=PAGE_HTML)
+
+    urls = [f"http://example.com/listing/{i}" for i in range(20)] + ["http://example.com/missing"]
+
+    async def run():
+        scraper = AsyncScraper(http2=False, transport=httpx.MockTransport(handler))
+        try:
+            return [result async for result in scraper.scrape_many(urls + urls[:5])]
+        finally:
+            await scraper.aclose()
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    by_url = {result["url"]: result for result in results}
+    assert len(results) == len(urls)
+    assert set(by_url) == set(urls)
+    assert sorted(requested) == sorted(urls)
+    assert by_url["http://example.com/listing/0"]["text"] == "Sterling tea set"
+    assert by_url["http://example.com/listing/0"]["image_urls"] == ["http://example.com/images/set.jpg"]
+    assert by_url["http://example.com/missing"] == {"url": "http://example.com/missing", "text": "", "image_urls": []}
+
+
+def test_scrape_many_respects_per_host_limit():
+    # Arrange
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, content=PAGE_HTML)
+
+    async def run():
+        scraper = AsyncScraper(
+            concurrency=50, max_connections_per_host=3, http2=False, transport=httpx.MockTransport(handler)
+        )
+        try:
+            return [result async for result in scraper.scrape_many(f"http://example.com/{i}" for i in range(30))]
+        finally:
+            await scraper.aclose()
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    assert len(results) == 30
+    assert peak <= 3
+
+
+def test_threads_keep_their_own_scraper_across_tasks(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(async_scraper, "AsyncScraper", lambda: AsyncScraper(http2=False))
+    in_step = threading.Barrier(2)
+    seen = {}
+
+    async def current_scraper():
+        return async_scraper.get_async_scraper()
+
+    def worker(name):
+        first = async_scraper.run_in_thread_loop(current_scraper())
+        in_step.wait()
+        second = async_scraper.run_in_thread_loop(current_scraper())
+        in_step.wait()
+        if name == "a":
+            async_scraper.close_thread_loop()
+        in_step.wait()
+        seen[name] = (first, second, second.client.is_closed)
+        if name == "b":
+            async_scraper.close_thread_loop()
+
+    # Act
+    threads = [threading.Thread(target=worker, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    (a_first, a_second, _), (b_first, b_second, b_closed_by_a) = seen["a"], seen["b"]
+    # Each thread reuses its scraper (and connection pool) from one task to the next.
+    assert a_first is a_second
+    assert b_first is b_second
+    assert a_first is not b_first
+    assert not b_closed_by_a
+    assert a_first.client.is_closed and b_first.client.is_closed
+
+
+def test_busy_host_does_not_hold_back_other_hosts():
+    # Arrange
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "busy.example.com":
+            await asyncio.sleep(0.2)
+        return httpx.Response(200, content=PAGE_HTML)
+
+    urls = [f"http://busy.example.com/{i}" for i in range(4)] + ["http://other.example.com/item"]
+
+    async def run():
+        scraper = AsyncScraper(
+            concurrency=2, max_connections_per_host=1, http2=False, transport=httpx.MockTransport(handler)
+        )
+        try:
+            return [result["url"] async for result in scraper.scrape_many(urls)]
+        finally:
+            await scraper.aclose()
+
+    # Act
+    finished = asyncio.run(run())
+
+    # Assert
+    assert finished[0] == "http://other.example.com/item"
+
+
+def test_scrape_many_isolates_malformed_urls():
+    # Arrange
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=PAGE_HTML)
+
+    urls = ["http://example.com/a", "http://", "http://[::1", "http://example.com/b"]
+
+    async def run():
+        scraper = AsyncScraper(http2=False, transport=httpx.MockTransport(handler))
+        try:
+            return [result async for result in scraper.scrape_many(urls)]
+        finally:
+            await scraper.aclose()
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    by_url = {result["url"]: result for result in results}
+    assert set(by_url) == set(urls)
+    assert by_url["http://example.com/a"]["text"] == "Sterling tea set"
+    assert by_url["http://example.com/b"]["text"] == "Sterling tea set"
+    assert by_url["http://"] == {"url": "http://", "text": "", "image_urls": []}
+    assert by_url["http://[::1"] == {"url": "http://[::1", "text": "", "image_urls": []}
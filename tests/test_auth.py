@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import HTTPException
+
+from arbitrage_os.auth import security
+from arbitrage_os.auth.user_cache import UserCache, user_cache, user_claims
+from arbitrage_os.db import database, models
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture
+def alice():
+    with database.SessionLocal() as db:
+        user = models.User(username="alice", email="alice@example.com", full_name="Alice", hashed_password="hash")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+    return user
+
+
+def update_user(username, **changes):
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.username == username).one()
+        for name, value in changes.items():
+            setattr(user, name, value)
+        db.commit()
+
+
+def test_claims_only_tokens_skip_the_database_until_the_user_changes(alice, mocker):
+    # Arrange
+    mocker.patch.object(security, "AUTH_CLAIMS_ONLY", True)
+    token = security.create_access_token(user_claims(alice))
+    lookup = mocker.spy(security, "get_user_from_db")
+
+    # Act
+    principal = asyncio.run(security.get_current_user(token))
+    update_user("alice", disabled=True)
+    after_change = asyncio.run(security.get_current_user(token))
+
+    # Assert
+    assert principal.username == "alice"
+    assert principal.email == "alice@example.com"
+    assert principal.disabled is False
+    # The token predates the change, so its claims are no longer trusted.
+    assert after_change.disabled is True
+    assert lookup.call_count == 1
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(security.get_current_active_user(after_change))
+    assert excinfo.value.status_code == 400
+
+
+def test_users_are_cached_between_requests_and_invalidated_on_change(alice, mocker):
+    # Arrange
+    mocker.patch.object(security, "AUTH_CLAIMS_ONLY", False)
+    token = security.create_access_token({"sub": "alice"})
+    lookup = mocker.spy(security, "get_user_from_db")
+
+    # Act
+    first = asyncio.run(security.get_current_user(token))
+    second = asyncio.run(security.get_current_user(token))
+    update_user("alice", full_name="Alice Smith")
+    after_change = asyncio.run(security.get_current_user(token))
+
+    # Assert
+    assert first.full_name == second.full_name == "Alice"
+    assert after_change.full_name == "Alice Smith"
+    assert lookup.call_count == 2
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_user_cache_is_bounded_and_expires_entries(mocker):
+    # Arrange
+    cache = UserCache(max_size=2, ttl=60)
+    now = mocker.patch("arbitrage_os.auth.user_cache.time.monotonic", return_value=100.0)
+    for username in ("a", "b", "c"):
+        cache.set(SimpleNamespace(username=username, email=None, full_name=None, disabled=False))
+
+    # Act
+    evicted = cache.get("a")
+    fresh = cache.get("c")
+    now.return_value = 161.0
+    expired = cache.get("c")
+
+    # Assert
+    assert evicted is None
+    assert fresh.username == "c"
+    assert expired is None
+
+
+def test_unknown_users_are_rejected(mocker):
+    # Arrange
+    mocker.patch.object(security, "get_user_from_db", AsyncMock(return_value=None))
+    token = security.create_access_token({"sub": "mallory"})
+
+    # Act
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(security.get_current_user(token))
+
+    # Assert
+    assert excinfo.value.status_code == 401
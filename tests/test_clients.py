@@ -0,0 +1,30 @@
+import os
+from unittest.mock import MagicMock
+
+from arbitrage_os.clients import ClientRegistry
+
+
+def test_registry_shares_clients_and_rebuilds_them_per_process(monkeypatch):
+    # Arrange
+    registry = ClientRegistry()
+    factory = MagicMock(side_effect=lambda *args: MagicMock(name=f"client{args}"))
+    registry.register("api", factory)
+
+    # Act
+    first = registry.get("api", "token")
+    again = registry.get("api", "token")
+    rotated = registry.get("api", "new-token")
+    parent_pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: parent_pid + 1)  # As seen from a forked child
+    in_child = registry.get("api", "new-token")
+    registry.close()
+
+    # Assert
+    assert first is again
+    assert rotated is not first
+    first.close.assert_called_once()
+    # The child builds its own client and leaves the parent's connections alone.
+    assert in_child is not rotated
+    rotated.close.assert_not_called()
+    in_child.close.assert_called_once()
+    assert factory.call_count == 3
@@ -2,6 +2,7 @@ import pytest
 import json
 from unittest.mock import patch, MagicMock
 from arbitrage_os.discovery import ai_logic
+from arbitrage_os.clients import registry
 
 @pytest.fixture
 def mock_openai_client(mocker):
@@ -24,7 +25,7 @@ def mock_openai_client(mocker):
     mock_client_instance.chat.completions.create.return_value = mock_response
     
     # Patch the OpenAI class to return our mocked client instance
-    return mocker.patch('arbitrage_os.discovery.ai_logic.OpenAI', return_value=mock_client_instance)
+    return mocker.patch('arbitrage_os.clients.OpenAI', return_value=mock_client_instance)
 
 def test_analyze_description_positive_scenario(mock_openai_client, mocker):
     """
@@ -49,3 +50,542 @@ def test_analyze_description_positive_scenario(mock_openai_client, mocker):
 
     # Verify that the OpenAI client was called correctly
     mock_openai_client().chat.completions.create.assert_called_once()
+
+def test_analyze_description_cached_skips_llm_on_repeat(mocker):
+    """
+    Tests that a repeated description (differing only in whitespace and case)
+    is served from the analysis cache without a second LLM call.
+    """
+    # Arrange
+    from arbitrage_os.db.database import SessionLocal
+    from arbitrage_os.discovery import analysis_cache
+
+    llm_result = {"score": 7, "reasoning": "Mentions sterling.", "address": "Not found", "weight_grams": None, "purity": 0.925}
+    mock_analyze = mocker.patch('arbitrage_os.discovery.analysis_cache.analyze_description', return_value=llm_result)
+    db = SessionLocal()
+
+    # Act
+    first = analysis_cache.analyze_description_cached(db, "Sterling  tea set, 925 hallmark")
+    db.commit()
+    second = analysis_cache.analyze_description_cached(db, "sterling tea set,\n925 HALLMARK ")
+    db.commit()
+    stats = analysis_cache.get_analysis_cache_stats(db)
+
+    # Assert
+    assert first == llm_result
+    assert second == llm_result
+    mock_analyze.assert_called_once()
+    assert stats["persistent"]["entries"] == 1
+    assert stats["persistent"]["total_hits"] == 1
+    db.close()
+
+def test_analysis_cache_evicts_least_recently_used(mocker):
+    # Arrange
+    from arbitrage_os.db.database import SessionLocal
+    from arbitrage_os.db.analysis_cache import AnalysisCacheEntry
+    from arbitrage_os.discovery import analysis_cache
+
+    db = SessionLocal()
+    for i in range(5):
+        analysis_cache.store_analysis(db, f"listing {i}", {"score": i}, latency_ms=100.0)
+    db.commit()
+    assert analysis_cache.get_cached_analysis(db, "listing 0") == {"score": 0}
+    db.commit()
+
+    # Act
+    deleted = analysis_cache.evict_analysis_cache(db, max_entries=2)
+    db.commit()
+
+    # Assert
+    assert deleted == 3
+    remaining = {entry.cache_key for entry in db.query(AnalysisCacheEntry).all()}
+    assert analysis_cache.analysis_cache_key("listing 0") in remaining
+    assert analysis_cache.analysis_cache_key("listing 4") in remaining
+    db.close()
+
+def test_analysis_cache_evicts_every_n_stores(mocker, monkeypatch):
+    # Arrange
+    from arbitrage_os.db.database import SessionLocal
+    from arbitrage_os.discovery import analysis_cache
+
+    monkeypatch.setattr(analysis_cache, "ANALYSIS_CACHE_EVICT_EVERY", 3)
+    monkeypatch.setattr(analysis_cache, "_stores_since_eviction", 0)
+    mock_evict = mocker.patch("arbitrage_os.discovery.analysis_cache.evict_analysis_cache", return_value=0)
+    db = SessionLocal()
+
+    # Act
+    for i in range(7):
+        analysis_cache.store_analysis(db, f"listing {i}", {"score": i}, latency_ms=100.0)
+    db.commit()
+
+    # Assert
+    assert mock_evict.call_count == 2
+    db.close()
+
+@pytest.fixture
+def openai_stub_server(monkeypatch):
+    """
+    Local stand-in for the OpenAI chat completions endpoint. Packed requests are
+    answered with one result per listing, except for listings whose text contains
+    "skip-me", which are left out to exercise the individual fallback.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append(body)
+            user_content = body["messages"][-1]["content"]
+            if body["response_format"]["type"] == "json_schema":
+                listings = json.loads(user_content)["listings"]
+                content = {"results": [
+                    {"id": listing["id"], "score": len(listing["text"]) % 10, "reasoning": "stub",
+                     "address": "Not found", "weight_grams": None, "purity": None}
+                    for listing in listings if "skip-me" not in listing["text"]
+                ]}
+            else:
+                content = {"score": 1, "reasoning": "individual", "address": "Not found",
+                           "weight_grams": None, "purity": None}
+            payload = json.dumps({
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(content)}}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test_key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    yield requests_seen
+    registry.close()
+    server.shutdown()
+
+def test_analyze_descriptions_batch_packs_listings(openai_stub_server, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(ai_logic, "LLM_BATCH_MAX_LISTINGS", 4)
+    descriptions = {str(i): f"sterling listing number {i}" for i in range(10)}
+    descriptions["10"] = "plated tray skip-me"
+
+    # Act
+    results = ai_logic.analyze_descriptions_batch(descriptions)
+
+    # Assert
+    assert set(results) == set(descriptions)
+    assert results["3"]["reasoning"] == "stub"
+    assert results["10"]["reasoning"] == "individual"
+    packed_requests = [body for body in openai_stub_server if body["response_format"]["type"] == "json_schema"]
+    assert len(packed_requests) == 3
+    assert len(openai_stub_server) == 4
+
+@pytest.mark.parametrize("text, passed", [
+    ("Heavy sterling silver tea set, hallmarked", True),
+    ("Antique silverware collection from an estate", True),
+    ("Set of 925 rings", True),
+    ("Sterling flatware, a few silver plated spoons", True),
+    ("Silver plated serving tray, EPNS marked", False),
+    ("Silver-tone costume jewelry lot", False),
+    ("Old bicycle, needs new tires", False),
+])
+def test_prefilter_scores_listings(text, passed):
+    from arbitrage_os.discovery.prefilter import score_listing
+
+    result = score_listing(text)
+
+    assert result["passed"] is passed
+    assert 1 <= result["score"] <= 10
+
+
+def test_list_items_pages_with_keyset_cursor_and_projection():
+    # Arrange
+    from datetime import datetime, timedelta
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+    from arbitrage_os.discovery.item_listing import list_items, parse_fields
+
+    db = database.SessionLocal()
+    base = datetime(2026, 1, 1)
+    for i in range(25):
+        # Pairs of items share a creation time, so the id tie-breaker matters.
+        db.add(Item(url=f"http://example.com/{i}", status="completed" if i % 3 else "failed",
+                    score=i % 10, description="x" * 1000, created_at=base + timedelta(minutes=i // 2)))
+    db.commit()
+    expected = [item.id for item in sorted(db.query(Item).all(), key=lambda item: (item.created_at, item.id), reverse=True)]
+
+    # Act
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_items(db, parse_fields("id,score", []), limit=10, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    filtered, _ = list_items(db, parse_fields("status,score", []), status="completed", min_score=5)
+
+    # Assert
+    assert [row["id"] for row in seen] == expected
+    assert set(seen[0]) == {"id", "score"}
+    assert all(row["status"] == "completed" and row["score"] >= 5 for row in filtered)
+    assert len(filtered) == len([i for i in range(25) if i % 3 and i % 10 >= 5])
+    with pytest.raises(ValueError):
+        parse_fields("id,password", [])
+    db.close()
+
+
+def test_list_items_created_filters_match_server_default_timestamps():
+    # Arrange
+    from datetime import datetime
+    from sqlalchemy import text
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+    from arbitrage_os.discovery.item_listing import list_items, parse_fields
+
+    db = database.SessionLocal()
+    db.add(Item(url="http://example.com/orm", created_at=datetime(2026, 1, 1, 0, 10)))
+    # Formatted like a server-default CURRENT_TIMESTAMP, without fractional seconds.
+    db.execute(text("INSERT INTO items (url, created_at) VALUES ('http://example.com/server', '2026-01-01 00:05:00')"))
+    db.commit()
+
+    # Act
+    after, _ = list_items(db, parse_fields("url", []), created_after=datetime(2026, 1, 1, 0, 5))
+    before, _ = list_items(db, parse_fields("url", []), created_before=datetime(2026, 1, 1, 0, 10))
+
+    # Assert
+    assert [row["url"] for row in after] == ["http://example.com/orm", "http://example.com/server"]
+    assert [row["url"] for row in before] == ["http://example.com/server"]
+    db.close()
+
+
+def test_list_items_filters_and_sorts_on_json_hot_fields():
+    # Arrange
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+    from arbitrage_os.discovery.item_listing import list_items, parse_fields
+    from arbitrage_os.verification.image_analyzer import top_hallmark
+
+    analyses = [
+        {"image_url": "http://example.com/1.jpg", "analysis": {"records": [{"best_labels": [{"name": "lion passant", "prob": 0.7}]}]}},
+        {"image_url": "http://example.com/2.jpg", "analysis": {"records": [{"best_labels": [{"name": "sterling", "prob": 0.95}]}]}},
+    ]
+    db = database.SessionLocal()
+    for i in range(12):
+        label, confidence = top_hallmark(analyses if i % 2 else analyses[:1])
+        db.add(Item(url=f"http://example.com/{i}", image_urls=[f"http://example.com/{i}.jpg"],
+                    image_analysis_results=analyses if i % 2 else analyses[:1],
+                    hallmark_label=label, hallmark_confidence=confidence,
+                    roi_analysis={"roi_percent": i * 50.0, "max_buy_price": 100.0 - i} if i < 10 else None))
+    db.commit()
+
+    # Act
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_items(db, parse_fields("roi_percent", []), limit=4, cursor=cursor, sort="roi_percent")
+        seen.extend(page)
+        if cursor is None:
+            break
+    filtered, _ = list_items(db, parse_fields("roi_analysis,hallmark_label,image_urls", []),
+                             min_roi_percent=200, min_hallmark_confidence=0.8)
+
+    # Assert
+    assert [row["roi_percent"] for row in seen] == [i * 50.0 for i in range(9, -1, -1)]
+    assert {row["hallmark_label"] for row in filtered} == {"sterling"}
+    assert sorted(row["roi_analysis"]["roi_percent"] for row in filtered) == [250.0, 350.0, 450.0]
+    assert all(isinstance(row["image_urls"], list) for row in filtered)
+    with pytest.raises(ValueError):
+        list_items(db, ["id"], sort="score")
+    db.close()
+
+
+def test_insert_pending_items_uses_one_statement_and_skips_known_urls(monkeypatch):
+    # Arrange
+    from sqlalchemy import event
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+    from arbitrage_os.discovery import ingestion
+
+    monkeypatch.setattr(ingestion, "INGEST_CHUNK_SIZE", 1000)
+    db = database.SessionLocal()
+    db.add_all([Item(url="http://example.com/known"), Item(url="http://example.com/known")])
+    db.commit()
+    latest_known = max(item.id for item in db.query(Item).all())
+    inserts = []
+    event.listen(database.engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: inserts.append(statement) if statement.lstrip().startswith(("WITH", "INSERT")) else None)
+    urls = ingestion.normalize_urls([f"http://example.com/{i}" for i in range(300)] + [" http://example.com/7 ", "", "http://example.com/known"])
+
+    # Act
+    inserted, existing = ingestion.insert_pending_items(db, urls)
+
+    # Assert
+    assert len(inserts) == 1
+    assert sorted(inserted) == sorted(f"http://example.com/{i}" for i in range(300))
+    assert existing == {"http://example.com/known": latest_known}
+    assert db.query(Item).filter(Item.status == "pending").count() == 300
+    db.close()
+
+
+def test_bulk_discovery_streams_ndjson_in_chunks(mocker, monkeypatch):
+    # Arrange
+    import asyncio
+    from arbitrage_os.api import discovery
+    from arbitrage_os.db import database
+
+    class StreamedRequest:
+        def __init__(self, body: bytes):
+            self.body = body
+
+        async def stream(self):
+            # Uneven chunks, so lines are split across reads.
+            for start in range(0, len(self.body), 7):
+                yield self.body[start:start + 7]
+
+    monkeypatch.setattr(discovery, "INGEST_CHUNK_SIZE", 4)
+    mock_group = mocker.patch("arbitrage_os.api.discovery.group")
+    lines = [json.dumps(f"http://example.com/{i}") for i in range(9)]
+    lines += [json.dumps({"url": "http://example.com/3"}), "not json", json.dumps({"name": "no url"})]
+
+    async def run():
+        async with database.AsyncSessionLocal() as db:
+            return await discovery.run_bulk_discovery(StreamedRequest("\n".join(lines).encode()), db=db)
+
+    # Act
+    counts = asyncio.run(run())
+
+    # Assert
+    assert counts == {"received": 12, "inserted": 9, "duplicates": 1, "invalid": 2}
+    assert mock_group.return_value.apply_async.call_count == 3
+
+
+def test_record_scraped_page_updates_a_row_recorded_concurrently(mocker):
+    # Arrange
+    from sqlalchemy.orm import Query
+    from arbitrage_os.db import database
+    from arbitrage_os.db.scraped_page import ScrapedPage
+    from arbitrage_os.discovery.page_cache import record_scraped_page
+
+    url = "http://example.com/listing"
+    db = database.SessionLocal()
+    other_worker = database.SessionLocal()
+    other_worker.add(ScrapedPage(url=url, content_hash="old"))
+    other_worker.commit()
+    other_worker.close()
+    # The lookup ran before the other worker committed its row.
+    mocker.patch.object(Query, "first", return_value=None)
+
+    # Act
+    record_scraped_page(db, url, {"content_hash": "new", "etag": '"v2"'})
+    db.commit()
+
+    # Assert
+    pages = db.query(ScrapedPage).all()
+    assert [(page.url, page.content_hash, page.etag) for page in pages] == [(url, "new", '"v2"')]
+    db.close()
+
+
+def test_get_cached_pages_runs_one_query_per_table():
+    # Arrange
+    from sqlalchemy import event
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+    from arbitrage_os.db.scraped_page import ScrapedPage
+    from arbitrage_os.discovery.page_cache import get_cached_page, get_cached_pages
+
+    db = database.SessionLocal()
+    urls = [f"http://example.com/{i}" for i in range(5)]
+    db.add_all([ScrapedPage(url=url, content_hash=f"hash{i}", etag=f"etag{i}") for i, url in enumerate(urls[:4])])
+    db.add_all([
+        Item(url=urls[0], content_hash="hash0", status="completed"),
+        Item(url=urls[0], content_hash="hash0", status="completed"),
+        Item(url=urls[1], content_hash="stale", status="completed"),
+        Item(url=urls[2], content_hash="hash2", status="failed"),
+        Item(url=urls[3], content_hash="hash3", status="completed"),
+    ])
+    db.commit()
+    statements = []
+    event.listen(database.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    # Act
+    cached = get_cached_pages(db, urls)
+
+    # Assert
+    assert len(statements) == 2
+    assert set(cached) == {urls[0], urls[3]}
+    validators, latest = cached[urls[0]]
+    assert validators == {"etag": "etag0", "last_modified": None, "content_hash": "hash0"}
+    assert latest.id == 2
+    assert get_cached_page(db, urls[1]) is None
+    db.close()
+
+
+def test_discovery_pipeline_fans_out_geocoding_and_images(mocker, monkeypatch):
+    # Arrange
+    from sqlalchemy import event
+    from arbitrage_os import tasks
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+
+    monkeypatch.setattr(tasks, "SessionLocal", database.SessionLocal)
+    monkeypatch.setattr(tasks.celery_app.conf, "task_always_eager", True)
+    mocker.patch("arbitrage_os.tasks.scrape_url", return_value={
+        "text": "Sterling silver tea set, 925 hallmarked, 800 grams",
+        "image_urls": ["http://example.com/1.jpg", "http://example.com/2.jpg"],
+        "content_hash": "abc",
+    })
+    mocker.patch("arbitrage_os.tasks.analyze_description_cached", return_value={
+        "score": 9, "reasoning": "Hallmarked sterling", "address": "1 Main St", "weight_grams": 800.0, "purity": 0.925,
+    })
+    mocker.patch("arbitrage_os.tasks.cleanup_and_geocode", return_value={"latitude": 40.0, "longitude": -74.0})
+    # One image per batch task: the first batch is analyzed, the second fails.
+    monkeypatch.setattr(tasks, "XIMILAR_BATCH_SIZE", 1)
+    mocker.patch("arbitrage_os.tasks.analyze_listing_images", side_effect=[
+        [{"image_url": "http://example.com/1.jpg", "analysis": {"records": [{"best_labels": [{"name": "sterling", "prob": 0.9}]}]}}],
+        RuntimeError("Ximilar unavailable"),
+    ])
+    mocker.patch("arbitrage_os.tasks.calculate_roi", return_value={"max_buy_price": 500.0, "roi_percent": 40.0})
+    mock_publish = mocker.patch("arbitrage_os.tasks.publish_progress")
+    db = database.SessionLocal()
+    item = Item(url="http://example.com/listing", status="pending")
+    db.add(item)
+    db.commit()
+    commits = []
+    # Counted on the engine, so savepoints are not mistaken for commits.
+    event.listen(database.engine, "commit", commits.append)
+
+    # Act
+    tasks.discovery_pipeline(item.id).apply_async()
+
+    # Assert
+    db.refresh(item)
+    assert item.status == "completed"
+    assert (item.latitude, item.longitude) == (40.0, -74.0)
+    assert [result["image_url"] for result in item.image_analysis_results] == ["http://example.com/1.jpg"]
+    assert (item.hallmark_label, item.hallmark_confidence) == ("sterling", 0.9)
+    assert item.max_buy_price == 500.0
+    # Like re-valuation, discovery stores no profit or ROI for an item without a purchase price.
+    assert item.roi_analysis["profit"] is None and item.roi_percent is None
+    assert tasks.celery_app.amqp.router.route({}, "tasks.discovery.analyze_images")["queue"].name == tasks.DISCOVERY_API_QUEUE
+    # Stage transitions are published; the row is written after scraping, text analysis and at the end.
+    assert [call.args[1] for call in mock_publish.call_args_list] == [
+        "scraping", "analyzing_text", "analyzing_images", "calculating_roi", "completed",
+    ]
+    assert len(commits) == 3
+    db.close()
+
+
+def test_collect_analysis_batch_retries_failed_polls_then_falls_back(mocker, monkeypatch):
+    # Arrange
+    from arbitrage_os import tasks
+
+    monkeypatch.setattr(tasks.celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(tasks, "LLM_BATCH_MAX_POLL_ERRORS", 1)
+    mock_collect = mocker.patch("arbitrage_os.tasks.collect_analysis_batch", side_effect=RuntimeError("OpenAI unavailable"))
+    mock_dispatch = mocker.patch("arbitrage_os.tasks.dispatch_discovery_items")
+
+    # Act
+    tasks.collect_analysis_batch_task.apply_async(("batch_1", [1, 2], [1]))
+
+    # Assert
+    assert mock_collect.call_count == 2
+    mock_dispatch.assert_called_once_with([1, 2], [1])
+
+
+def test_run_discovery_uses_async_sessions_concurrently(mocker):
+    # Arrange
+    import asyncio
+    from arbitrage_os.api import discovery
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+
+    mock_pipeline = mocker.patch("arbitrage_os.api.discovery.discovery_pipeline")
+    urls = [f"http://example.com/{i}" for i in range(20)]
+
+    async def discover(url):
+        async with database.AsyncSessionLocal() as db:
+            return await discovery.run_discovery(url, db=db)
+
+    async def run():
+        return await asyncio.gather(*(discover(url) for url in urls))
+
+    # Act
+    items = asyncio.run(run())
+
+    # Assert
+    assert [item.url for item in items] == urls
+    assert len({item.id for item in items}) == 20
+    assert all(item.status == "pending" for item in items)
+    assert mock_pipeline.call_count == 20
+    db = database.SessionLocal()
+    assert db.query(Item).count() == 20
+    db.close()
+
+
+def test_item_events_stream_current_status_then_published_progress(monkeypatch):
+    # Arrange
+    import asyncio
+    from arbitrage_os.api import discovery
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+    from arbitrage_os.discovery import progress
+
+    published = [
+        {"item_id": 1, "status": "analyzing_text"},
+        None,  # Nothing within the heartbeat interval
+        {"item_id": 1, "status": "completed", "score": 9},
+        {"item_id": 1, "status": "never sent"},
+    ]
+
+    class FakePubSub:
+        def __init__(self):
+            self.channels = []
+            self.closed = False
+
+        async def subscribe(self, channel):
+            self.channels.append(channel)
+
+        async def get_message(self, timeout):
+            event = published.pop(0)
+            return None if event is None else {"type": "message", "data": json.dumps(event)}
+
+        async def aclose(self):
+            self.closed = True
+
+    pubsub = FakePubSub()
+
+    class FakeRedis:
+        def pubsub(self, ignore_subscribe_messages):
+            return pubsub
+
+        async def aclose(self):
+            pass
+
+    monkeypatch.setattr(progress.aioredis, "from_url", lambda url: FakeRedis())
+    db = database.SessionLocal()
+    db.add(Item(url="http://example.com/listing", status="pending"))
+    db.commit()
+    db.close()
+
+    async def run():
+        async with database.AsyncSessionLocal() as session:
+            response = await discovery.item_events(1, db=session)
+        return [chunk async for chunk in response.body_iterator]
+
+    # Act
+    chunks = asyncio.run(run())
+
+    # Assert
+    assert pubsub.channels == ["arbitrage_os:items:1"]
+    assert [chunk.split("\n")[0] for chunk in chunks] == [
+        "event: pending", "event: analyzing_text", ": keep-alive", "event: completed",
+    ]
+    assert json.loads(chunks[-1].split("data: ")[1]) == {"item_id": 1, "status": "completed", "score": 9}
+    assert pubsub.closed
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from arbitrage_os.logistics import geocoding
+from arbitrage_os.logistics.gazetteer import Gazetteer, normalize_address
+from arbitrage_os.logistics.geocode_cache import geocode_cache
+from arbitrage_os.logistics.rate_limit import TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache(monkeypatch):
+    geocode_cache.clear_memory()
+    monkeypatch.setattr(geocoding, "get_gazetteer", lambda: None)
+    yield
+    geocode_cache.clear_memory()
+
+
+@pytest.fixture
+def mock_llm_cleaner(mocker):
+    """Mocks the OpenAI client used to clean addresses."""
+    mocker.patch.dict('os.environ', {'OPENAI_API_KEY': 'test_key'})
+    mock_client_instance = MagicMock()
+    mock_client_instance.chat.completions.create.return_value.choices = [MagicMock()]
+    mock_client_instance.chat.completions.create.return_value.choices[0].message.content = "123 Main Street, Springfield"
+    return mocker.patch('arbitrage_os.clients.OpenAI', return_value=mock_client_instance)
+
+
+def test_cleanup_and_geocode_serves_repeats_from_cache(mock_llm_cleaner, mocker):
+    # Arrange
+    location = MagicMock(latitude=39.78, longitude=-89.65, address="123 Main St, Springfield, IL")
+    mock_geocode = MagicMock(return_value=location)
+    mocker.patch('arbitrage_os.logistics.geocoding.get_rate_limited_geocoder', return_value=mock_geocode)
+
+    # Act
+    first = geocoding.cleanup_and_geocode("123 main st springfield, the blue house")
+    geocode_cache.clear_memory()  # Force the second lookup through the persistent tier
+    second = geocoding.cleanup_and_geocode("123 Main St Springfield, the blue house")
+    cleaned = geocoding.geocode_address("123 Main Street, Springfield")
+
+    # Assert
+    assert first == second == cleaned
+    assert first["latitude"] == 39.78
+    mock_geocode.assert_called_once_with("123 Main Street, Springfield")
+    mock_llm_cleaner().chat.completions.create.assert_called_once()
+    assert geocode_cache.stats()["db_hits"] >= 1
+
+
+def test_geocode_address_caches_negative_results_but_not_errors(mocker):
+    # Arrange
+    mock_geocode = MagicMock(side_effect=[RuntimeError("service down"), None])
+    mocker.patch('arbitrage_os.logistics.geocoding.get_rate_limited_geocoder', return_value=mock_geocode)
+
+    # Act
+    errored = geocoding.geocode_address("Nowhere Lane")
+    not_found = geocoding.geocode_address("Nowhere Lane")
+    cached = geocoding.geocode_address("Nowhere Lane")
+
+    # Assert
+    assert errored["latitude"] is None
+    assert not_found["latitude"] is None
+    assert cached["latitude"] is None
+    assert mock_geocode.call_count == 2
+
+
+def test_gazetteer_resolves_common_address_forms():
+    # Arrange
+    gazetteer = Gazetteer()
+    gazetteer.add("123", "Main Street", "Springfield", "IL", "62701", lat=39.78, lng=-89.65)
+
+    # Act / Assert
+    assert normalize_address("123 Main Street, Springfield.") == "123 main st springfield"
+    assert gazetteer.lookup("123 Main St")["latitude"] == 39.78
+    assert gazetteer.lookup("123 main street, springfield, IL 62701")["longitude"] == -89.65
+    assert gazetteer.lookup("125 Main St") is None
+
+
+def test_gazetteer_drops_keys_shared_by_different_addresses():
+    # Arrange
+    gazetteer = Gazetteer()
+    gazetteer.add("123", "Main Street", "Springfield", "IL", "62701", lat=39.78, lng=-89.65)
+    gazetteer.add("123", "Main Street", "Springfield", "IL", "62701", lat=39.78, lng=-89.65)
+    gazetteer.add("123", "Main Street", "Shelbyville", "IL", "62565", lat=39.41, lng=-88.79)
+    gazetteer.add("123", "Main Street", "Ogden", "UT", "84401", lat=41.22, lng=-111.97)
+
+    # Act / Assert
+    # Without a city the address is ambiguous and left to the online geocoder.
+    assert gazetteer.lookup("123 Main St") is None
+    assert gazetteer.lookup("123 Main St, Springfield")["latitude"] == 39.78
+    assert gazetteer.lookup("123 Main St, Shelbyville")["latitude"] == 39.41
+    assert gazetteer.lookup("123 Main St, Ogden, UT")["latitude"] == 41.22
+
+
+def test_geocode_addresses_stream_cleans_once_and_keeps_order(mocker):
+    # Arrange
+    mocker.patch.dict('os.environ', {'OPENAI_API_KEY': 'test_key'})
+    mock_client_instance = MagicMock()
+    mock_client_instance.chat.completions.create.return_value.choices = [MagicMock()]
+    mock_client_instance.chat.completions.create.return_value.choices[0].message.content = json.dumps(
+        {"addresses": ["1 Oak Street", "2 Elm Street", "1 Oak Street"]}
+    )
+    mocker.patch('arbitrage_os.clients.OpenAI', return_value=mock_client_instance)
+    geocode_cache.set(["9 Cached Rd"], {"latitude": 9.0, "longitude": 9.0, "formatted_address": "9 Cached Rd"})
+    locations = {
+        "1 Oak Street": MagicMock(latitude=1.0, longitude=1.0, address="1 Oak St"),
+        "2 Elm Street": None,
+    }
+    mock_geocode = MagicMock(side_effect=lambda address: locations[address])
+    mocker.patch('arbitrage_os.logistics.geocoding.get_geolocator', return_value=MagicMock(geocode=mock_geocode))
+    mocker.patch.object(geocoding, "geocoder_rate_limit", TokenBucket(rate=1000, capacity=10))
+    addresses = ["oak st #1", "elm st #2", "9 cached rd", "one oak street", "oak st #1"]
+
+    # Act
+    async def run():
+        return [item async for item in geocoding.geocode_addresses_stream(addresses)]
+    results = asyncio.run(run())
+
+    # Assert
+    assert [address for address, _ in results] == addresses
+    assert [result["latitude"] for _, result in results] == [1.0, None, 9.0, 1.0, 1.0]
+    mock_client_instance.chat.completions.create.assert_called_once()
+    sent = json.loads(mock_client_instance.chat.completions.create.call_args.kwargs["messages"][1]["content"])
+    assert sent == {"addresses": ["oak st #1", "elm st #2", "one oak street"]}
+    assert sorted(call.args[0] for call in mock_geocode.call_args_list) == ["1 Oak Street", "2 Elm Street"]
+    assert geocode_cache.get("one oak street")["latitude"] == 1.0
+
+
+def test_token_bucket_queues_reservations_at_the_configured_rate(mocker):
+    # Arrange
+    bucket = TokenBucket(rate=10, capacity=2)
+    mocker.patch('arbitrage_os.logistics.rate_limit.time.monotonic', return_value=100.0)
+    bucket._updated = 100.0
+
+    # Act
+    delays = [bucket._reserve() for _ in range(4)]
+
+    # Assert
+    assert delays == pytest.approx([0.0, 0.0, 0.1, 0.2])
@@ -0,0 +1,86 @@
+import base64
+import io
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from arbitrage_os.discovery.async_scraper import AsyncScraper
+from arbitrage_os.verification import image_analyzer
+
+
+def test_analyze_listing_images_downloads_concurrently_and_batches_recognition(mocker, monkeypatch):
+    # Arrange
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/missing.jpg":
+            return httpx.Response(404)
+        return httpx.Response(200, content=request.url.path.encode())
+
+    monkeypatch.setenv("XIMILAR_API_TOKEN", "token")
+    monkeypatch.setenv("XIMILAR_WORKSPACE_ID", "workspace")
+    monkeypatch.setenv("XIMILAR_TASK_ID", "task")
+    monkeypatch.setattr(image_analyzer, "XIMILAR_BATCH_SIZE", 2)
+    monkeypatch.setattr(
+        image_analyzer, "get_async_scraper",
+        lambda: AsyncScraper(http2=False, transport=httpx.MockTransport(handler)),
+    )
+    mock_client_class = mocker.patch("arbitrage_os.clients.RecognitionClient")
+
+    def recognize(task_id, records):
+        return {
+            "records": [
+                {"_base64": record["_base64"], "best_labels": [{"name": base64.b64decode(record["_base64"]).decode(), "prob": 0.5}]}
+                for record in records
+            ],
+            "status": {"code": 200},
+        }
+
+    mock_client_class.return_value.recognize.side_effect = recognize
+    urls = ["http://example.com/1.jpg", "http://example.com/missing.jpg", "http://example.com/2.jpg", "http://example.com/3.jpg"]
+
+    # Act
+    results = image_analyzer.analyze_listing_images(urls)
+    image_analyzer.analyze_listing_images(urls[:1])
+
+    # Assert
+    assert [result["image_url"] for result in results] == ["http://example.com/1.jpg", "http://example.com/2.jpg", "http://example.com/3.jpg"]
+    assert results[1]["analysis"]["records"][0]["best_labels"][0]["name"] == "/2.jpg"
+    assert "_base64" not in results[1]["analysis"]["records"][0]
+    # Two requests for the three downloaded images; the repeat is served from the cache.
+    assert mock_client_class.return_value.recognize.call_count == 2
+    assert mock_client_class.call_count == 1
+
+
+def _jpeg(pixels: np.ndarray, size=None, quality=90) -> bytes:
+    image = Image.fromarray(pixels.astype(np.uint8))
+    if size:
+        image = image.resize(size)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_near_duplicate_images_reuse_cached_analysis(mocker, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("XIMILAR_API_TOKEN", "token")
+    monkeypatch.setenv("XIMILAR_WORKSPACE_ID", "workspace")
+    monkeypatch.setenv("XIMILAR_TASK_ID", "task")
+    mock_client_class = mocker.patch("arbitrage_os.clients.RecognitionClient")
+    mock_client_class.return_value.recognize.side_effect = lambda task_id, records: {
+        "records": [{"best_labels": [{"name": "sterling", "prob": 0.9}]} for _ in records],
+    }
+    rng = np.random.default_rng(7)
+    photo = np.kron(rng.integers(0, 256, (8, 8, 3)), np.ones((40, 40, 1)))  # Blocky 320x320 photo
+    other = np.kron(rng.integers(0, 256, (8, 8, 3)), np.ones((40, 40, 1)))
+    original = _jpeg(photo)
+    relisted = _jpeg(photo, size=(240, 240), quality=60)  # Rescaled and recompressed by another marketplace
+
+    # Act
+    first = image_analyzer.recognize_images_cached([original, original])
+    second = image_analyzer.recognize_images_cached([relisted, original, _jpeg(other)])
+
+    # Assert
+    calls = mock_client_class.return_value.recognize.call_args_list
+    assert [len(call.kwargs["records"]) for call in calls] == [1, 1]
+    assert first[0] == first[1] == second[0] == second[1]
+    assert second[2] is not None
@@ -0,0 +1,129 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from arbitrage_os.logistics import distance_matrix, routing
+from arbitrage_os.logistics.scheduler import Stop, plan_routes, stop_value
+from arbitrage_os.logistics.tsp import haversine_matrix, path_length, solve_open_path
+
+
+@pytest.fixture(autouse=True)
+def matrix_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(distance_matrix, "DISTANCE_MATRIX_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_haversine_matrix_matches_known_distance():
+    # Act
+    dist = haversine_matrix([40.7128, 34.0522], [-74.0060, -118.2437])
+
+    # Assert
+    assert dist[0, 0] == 0
+    assert dist[0, 1] == pytest.approx(3_936_000, rel=0.01)  # New York to Los Angeles
+    assert dist[0, 1] == dist[1, 0]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_solve_open_path_is_optimal_on_small_instances(seed):
+    # Arrange
+    points = np.random.default_rng(seed).uniform([39.0, -90.0], [40.0, -89.0], size=(7, 2))
+    dist = haversine_matrix(points[:, 0], points[:, 1])
+    brute_force = min(
+        path_length([0, *middle, 6], dist) for middle in itertools.permutations(range(1, 6))
+    )
+
+    # Act
+    path = solve_open_path(dist)
+
+    # Assert
+    assert path[0] == 0 and path[-1] == 6
+    assert sorted(path) == list(range(7))
+    assert path_length(path, dist) <= brute_force * 1.1
+
+
+def test_optimize_route_solves_large_routes_locally(monkeypatch):
+    # Arrange
+    monkeypatch.setenv("MAPBOX_API_KEY", "test_key")
+    points = np.random.default_rng(0).uniform([39.0, -90.0], [40.0, -89.0], size=(120, 2))
+    coordinates = [{"lat": lat, "lng": lng} for lat, lng in points]
+
+    # Act
+    result = routing.optimize_route(coordinates)
+
+    # Assert
+    assert result["code"] == "Ok"
+    assert result["solver"]["backend"] == "local"
+    order = [waypoint["waypoint_index"] for waypoint in result["waypoints"]]
+    assert sorted(order) == list(range(120))
+    assert order[0] == 0 and order[-1] == 119
+    assert len(result["trips"][0]["geometry"]["coordinates"]) == 120
+    assert result["trips"][0]["distance"] > 0
+
+
+def test_haversine_tiled_matches_full_matrix():
+    # Arrange
+    points = np.random.default_rng(1).uniform([39.0, -90.0], [40.0, -89.0], size=(50, 2))
+
+    # Act
+    tiled = distance_matrix.haversine_tiled(points[:, 0], points[:, 1], tile=7)
+
+    # Assert
+    np.testing.assert_allclose(tiled, haversine_matrix(points[:, 0], points[:, 1]))
+
+
+def test_build_distance_matrix_reuses_cached_pairs_and_matrices(mocker, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(distance_matrix, "OSRM_URL", "http://osrm.test")
+    requested = []
+
+    def fake_table(points, sources, destinations):
+        requested.extend((points[s], points[d]) for s in sources for d in destinations if s != d)
+        block = haversine_matrix(*zip(*points)) * 1.3
+        block = block[np.ix_(sources, destinations)]
+        return block, block / 10
+
+    mocker.patch.object(distance_matrix, "fetch_osrm_table", side_effect=fake_table)
+    monday = [{"lat": 39.1, "lng": -89.1}, {"lat": 39.2, "lng": -89.2}, {"lat": 39.3, "lng": -89.3}]
+    tuesday = monday[1:] + [{"lat": 39.4, "lng": -89.4}, {"lat": 39.2000001, "lng": -89.2}]
+
+    # Act
+    first = distance_matrix.build_distance_matrix(monday)
+    monday_requests = len(requested)
+    second = distance_matrix.build_distance_matrix(tuesday)
+    tuesday_requests = len(requested) - monday_requests
+    again = distance_matrix.build_distance_matrix(tuesday)
+
+    # Assert
+    assert first.source == "osrm"
+    assert monday_requests == 6
+    assert tuesday_requests == 4  # Only the pairs involving the new stop, the others come from the cache
+    assert second.distance.shape == (4, 4)
+    assert second.distance[0, 3] == 0  # Stops rounding to the same point
+    assert second.distance[0, 1] == pytest.approx(first.distance[1, 2])
+    np.testing.assert_allclose(again.duration, second.duration)
+    assert len(requested) == monday_requests + tuesday_requests
+
+
+def test_plan_routes_respects_windows_and_prefers_valuable_stops():
+    # Arrange
+    # Stops about 1-2 km apart; at 40 km/h each leg takes a few minutes.
+    stops = [
+        Stop(id=1, lat=39.71, lng=-89.60, value=stop_value(9, 400.0), service=1800),
+        Stop(id=2, lat=39.72, lng=-89.61, value=stop_value(8, None), window_start=3600, window_end=4000, service=1800),
+        Stop(id=3, lat=39.70, lng=-89.62, value=stop_value(3, None), service=1800),
+        Stop(id=4, lat=39.69, lng=-89.59, value=stop_value(2, 5.0), service=1800),
+        Stop(id=5, lat=39.73, lng=-89.58, value=stop_value(10, 900.0), window_start=0, window_end=600, service=1800),
+    ]
+
+    # Act
+    plan = plan_routes(stops, {"lat": 39.70, "lng": -89.60}, vehicles=2, shift_seconds=2 * 3600)
+
+    # Assert
+    scheduled = {stop["id"]: stop for route in plan["routes"] for stop in route["stops"]}
+    assert {1, 2, 5} <= set(scheduled)
+    assert 3600 <= scheduled[2]["start"] <= 4000
+    assert scheduled[5]["start"] <= 600
+    assert all(route["end"] <= 2 * 3600 for route in plan["routes"])
+    assert set(plan["unassigned"]) | set(scheduled) == {1, 2, 3, 4, 5}
+    assert plan["total_value"] == pytest.approx(sum(stop["value"] for stop in scheduled.values()))
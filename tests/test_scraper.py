@@ -12,6 +12,7 @@ def no_http_requests(monkeypatch):
     monkeypatch.setattr(requests, "post", raise_error)
     monkeypatch.setattr(requests, "put", raise_error)
     monkeypatch.setattr(requests, "delete", raise_error)
+    monkeypatch.setattr(requests.Session, "request", raise_error)
 
 # Mock response for successful scraping
 MOCK_HTML_SUCCESS = """
@@ -37,7 +38,7 @@ MOCK_HTML_EMPTY = """
 </html>
 """
 
-@patch('arbitrage_os.discovery.scraper.requests.get')
+@patch('arbitrage_os.discovery.scraper.requests.Session.get')
 def test_scrape_url_success(mock_requests_get):
     # Arrange
     mock_response = MagicMock()
@@ -61,7 +62,7 @@ def test_scrape_url_success(mock_requests_get):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }, timeout=10)
 
-@patch('arbitrage_os.discovery.scraper.requests.get')
+@patch('arbitrage_os.discovery.scraper.requests.Session.get')
 def test_scrape_url_empty_content(mock_requests_get):
     # Arrange
     mock_response = MagicMock()
@@ -84,7 +85,7 @@ def test_scrape_url_empty_content(mock_requests_get):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }, timeout=10)
 
-@patch('arbitrage_os.discovery.scraper.requests.get')
+@patch('arbitrage_os.discovery.scraper.requests.Session.get')
 def test_scrape_url_network_error(mock_requests_get):
     # Arrange
     mock_requests_get.side_effect = requests.exceptions.RequestException("Network error")
@@ -103,7 +104,7 @@ def test_scrape_url_network_error(mock_requests_get):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }, timeout=10)
 
-@patch('arbitrage_os.discovery.scraper.requests.get')
+@patch('arbitrage_os.discovery.scraper.requests.Session.get')
 def test_scrape_url_relative_image_urls(mock_requests_get):
     # Arrange
     mock_response = MagicMock()
@@ -124,3 +125,83 @@ def test_scrape_url_relative_image_urls(mock_requests_get):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }, timeout=10)
 
+@patch('arbitrage_os.discovery.scraper.requests.Session.get')
+def test_scrape_url_sends_conditional_headers_and_handles_not_modified(mock_requests_get):
+    # Arrange
+    mock_response = MagicMock()
+    mock_response.status_code = 304
+    mock_response.content = b''
+    mock_response.headers = {'ETag': '"abc"'}
+    mock_response.raise_for_status.return_value = None
+    mock_requests_get.return_value = mock_response
+
+    url = "http://example.com/test"
+    cached = {"etag": '"abc"', "last_modified": "Wed, 21 Oct 2026 07:28:00 GMT", "content_hash": "deadbeef"}
+
+    # Act
+    result = scrape_url(url, cached=cached)
+
+    # Assert
+    assert result["unchanged"] is True
+    assert result["content_hash"] == "deadbeef"
+    assert result["text"] == ""
+    mock_requests_get.assert_called_once_with(url, headers={
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': "Wed, 21 Oct 2026 07:28:00 GMT",
+    }, timeout=10)
+
+@patch('arbitrage_os.discovery.scraper.parse_html')
+@patch('arbitrage_os.discovery.scraper.requests.Session.get')
+def test_scrape_url_skips_parsing_identical_content(mock_requests_get, mock_parse_html):
+    # Arrange
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.content = MOCK_HTML_SUCCESS.encode('utf-8')
+    mock_response.headers = {}
+    mock_response.raise_for_status.return_value = None
+    mock_requests_get.return_value = mock_response
+    mock_parse_html.return_value = {"text": "Test Title", "image_urls": []}
+
+    url = "http://example.com/test"
+    first = scrape_url(url)
+
+    # Act
+    second = scrape_url(url, cached={"content_hash": first["content_hash"]})
+
+    # Assert
+    assert first["unchanged"] is False
+    assert second["unchanged"] is True
+    assert second["content_hash"] == first["content_hash"]
+    mock_parse_html.assert_called_once()
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml", "selectolax"])
+def test_parser_backends_match_reference(backend):
+    # Arrange
+    from arbitrage_os.discovery import html_parser
+    if not html_parser.is_backend_available(backend):
+        pytest.skip(f"{backend} is not installed")
+    page = MOCK_HTML_SUCCESS.replace("<h1>", "<!-- hidden --><h1>").encode('utf-8')
+    url = "http://example.com/test/page.html"
+
+    # Act
+    result = html_parser.extract_page(page, url, backend=backend)
+
+    # Assert
+    assert result == html_parser.parse_with_bs4(page, url)
+    assert result["text"] == "Test Title\nThis is some test content."
+    assert result["image_urls"] == ["http://example.com/images/test.jpg", "http://example.com/images/another.png"]
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml", "selectolax"])
+def test_parser_backends_decode_utf8_pages_without_charset(backend):
+    # Arrange
+    from arbitrage_os.discovery import html_parser
+    if not html_parser.is_backend_available(backend):
+        pytest.skip(f"{backend} is not installed")
+    page = "<html><body><p>Sterling café set, 925 – £40</p></body></html>".encode('utf-8')
+
+    # Act
+    result = html_parser.extract_page(page, "http://example.com/", backend=backend)
+
+    # Assert
+    assert result["text"] == "Sterling café set, 925 – £40"
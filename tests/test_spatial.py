@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from arbitrage_os.db import database
+from arbitrage_os.db.models import Item
+from arbitrage_os.logistics import geohash, spatial
+from arbitrage_os.logistics.tsp import haversine_block
+
+
+@pytest.fixture
+def geocoded_items(monkeypatch):
+    monkeypatch.setattr(spatial, "_snapshot", None)
+    rng = np.random.default_rng(7)
+    points = rng.uniform([39.0, -90.5], [40.5, -88.5], size=(400, 2))
+    db = database.SessionLocal()
+    for i, (lat, lng) in enumerate(points):
+        db.add(Item(url=f"http://example.com/{i}", status="completed", score=int(rng.integers(1, 11)),
+                    latitude=lat, longitude=lng, geohash=geohash.encode(lat, lng)))
+    db.add(Item(url="http://example.com/no-address", status="completed", score=10))
+    db.commit()
+    yield db
+    db.close()
+
+
+def brute_force(db, lat, lng, radius_km, min_score):
+    items = db.query(Item).filter(Item.latitude.isnot(None), Item.score >= min_score).all()
+    distances = haversine_block([lat], [lng], [i.latitude for i in items], [i.longitude for i in items])[0] / 1000
+    return sorted((d, item.id) for item, d in zip(items, distances) if d <= radius_km)
+
+
+def test_geohash_encode_and_cover():
+    # Act
+    cells = geohash.cover_bbox((10.40, 57.64, 10.42, 57.66))
+
+    # Assert
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert any(geohash.encode(57.64911, 10.40744).startswith(cell) for cell in cells)
+    assert len(cells) <= 32
+
+
+@pytest.mark.parametrize("backend", ["geohash", "kdtree"])
+def test_find_nearby_items_matches_brute_force(geocoded_items, backend):
+    # Arrange
+    db = geocoded_items
+    expected = brute_force(db, 39.75, -89.6, 30, min_score=6)
+    expected_nearest = brute_force(db, 39.75, -89.6, 1000, min_score=6)[:5]
+
+    # Act
+    within = spatial.find_nearby_items(db, lat=39.75, lng=-89.6, radius_km=30, min_score=6, backend=backend)
+    nearest = spatial.find_nearby_items(db, lat=39.75, lng=-89.6, k=5, min_score=6, backend=backend)
+    boxed = spatial.find_nearby_items(db, bbox=(-89.7, 39.7, -89.5, 39.8), limit=1000, backend=backend)
+
+    # Assert
+    assert [item.id for item, _ in within] == [item_id for _, item_id in expected]
+    assert [round(d, 6) for _, d in within] == [round(d, 6) for d, _ in expected]
+    assert len(expected) > 5
+    assert [item.id for item, _ in nearest] == [item_id for _, item_id in expected_nearest]
+    assert {item.id for item, _ in boxed} == {
+        item.id for item in db.query(Item).filter(Item.latitude.between(39.7, 39.8), Item.longitude.between(-89.7, -89.5))
+    }
+
+
+
+@pytest.mark.parametrize("backend", ["geohash", "kdtree"])
+def test_find_nearby_items_loads_only_the_returned_rows(geocoded_items, backend):
+    # Arrange
+    from sqlalchemy import event
+
+    db = geocoded_items
+    db.expunge_all()
+    loaded = []
+
+    def record_load(item, context):
+        loaded.append(item.id)
+
+    event.listen(Item, "load", record_load)
+
+    # Act
+    try:
+        within = spatial.find_nearby_items(db, lat=39.75, lng=-89.6, radius_km=100, limit=3, backend=backend)
+        boxed = spatial.find_nearby_items(db, bbox=(-90.5, 39.0, -88.5, 40.5), limit=4, backend=backend)
+    finally:
+        event.remove(Item, "load", record_load)
+
+    # Assert
+    assert len(within) == 3 and len(boxed) == 4
+    # Candidates are ranked on their coordinates alone; full rows are loaded for the results only.
+    assert sorted(loaded) == sorted(item.id for item, _ in within + boxed)
@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from arbitrage_os.valuation.spot_price import SpotPriceCache
+
+QUOTE = {"success": True, "rates": {"XAG": 30.0}}
+
+
+def test_spot_price_cache_serves_fresh_quote_from_memory():
+    # Arrange
+    fetcher = MagicMock(return_value=QUOTE)
+    cache = SpotPriceCache(fetcher=fetcher, ttl=60, stale_ttl=60)
+
+    # Act
+    first = cache.get()
+    second = cache.get()
+
+    # Assert
+    assert first == QUOTE
+    assert second == QUOTE
+    fetcher.assert_called_once()
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["upstream_calls"] == 1
+
+
+def test_spot_price_cache_single_flight_on_concurrent_miss():
+    # Arrange
+    def slow_fetch():
+        time.sleep(0.1)
+        return QUOTE
+
+    fetcher = MagicMock(side_effect=slow_fetch)
+    cache = SpotPriceCache(fetcher=fetcher, ttl=60, stale_ttl=60)
+    results = []
+
+    # Act
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert results == [QUOTE] * 10
+    fetcher.assert_called_once()
+
+
+def test_spot_price_cache_serves_stale_while_revalidating():
+    # Arrange
+    refreshed = {"success": True, "rates": {"XAG": 31.0}}
+    fetcher = MagicMock(side_effect=[QUOTE, refreshed])
+    cache = SpotPriceCache(fetcher=fetcher, ttl=0.05, stale_ttl=60)
+    cache.get()
+    time.sleep(0.1)
+
+    # Act
+    stale = cache.get()
+    for _ in range(50):
+        if fetcher.call_count == 2 and cache.get() == refreshed:
+            break
+        time.sleep(0.01)
+
+    # Assert
+    assert stale == QUOTE
+    assert fetcher.call_count == 2
+    assert cache.stats()["stale_hits"] >= 1
+
+
+def test_spot_price_cache_keeps_last_quote_when_upstream_fails():
+    # Arrange
+    fetcher = MagicMock(side_effect=[QUOTE, {"error": "upstream down"}])
+    cache = SpotPriceCache(fetcher=fetcher, ttl=0, stale_ttl=60)
+    cache.get()
+
+    # Act
+    result = cache._refresh()
+
+    # Assert
+    assert result == QUOTE
+    assert cache.stats()["upstream_errors"] == 1
@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import pytest
+
+from arbitrage_os.valuation import dashboard
+
+SPOT_QUOTE = {"success": True, "rates": {"XAG": 30.0}}
+
+
+def test_calculate_roi_batch_matches_scalar_calculation(mocker):
+    # Arrange
+    mocker.patch('arbitrage_os.valuation.dashboard.get_silver_spot_price', return_value=SPOT_QUOTE)
+    weights = [100.0, 250.5, 31.1]
+    purities = [0.925, 0.999, 0.8]
+    prices = [50.0, 0.0, 20.0]
+
+    # Act
+    result = dashboard.calculate_roi_batch(weights, purities, prices)
+
+    # Assert
+    for i, (weight, purity, price) in enumerate(zip(weights, purities, prices)):
+        expected = dashboard.calculate_roi(weight, purity, price)
+        assert math.isclose(result["item_silver_value"][i], expected["item_silver_value"])
+        assert math.isclose(result["max_buy_price"][i], expected["max_buy_price"])
+        assert math.isclose(result["profit"][i], expected["profit"])
+        assert result["roi_percent"][i] == expected["roi_percent"] or math.isclose(
+            result["roi_percent"][i], expected["roi_percent"]
+        )
+    assert np.isinf(result["roi_percent"][1])
+
+
+def test_calculate_roi_batch_rejects_mismatched_lengths(mocker):
+    mocker.patch('arbitrage_os.valuation.dashboard.get_silver_spot_price', return_value=SPOT_QUOTE)
+
+    with pytest.raises(ValueError):
+        dashboard.calculate_roi_batch([1.0, 2.0], [0.925], [10.0, 10.0])
+
+
+def test_revalue_inventory_task_rewrites_roi_analysis(mocker, monkeypatch):
+    # Arrange
+    from arbitrage_os import tasks
+    from arbitrage_os.db import database
+    from arbitrage_os.db.models import Item
+
+    monkeypatch.setattr(tasks, "SessionLocal", database.SessionLocal)
+    mocker.patch('arbitrage_os.tasks.get_silver_spot_price', return_value=SPOT_QUOTE)
+
+    db = database.SessionLocal()
+    db.add_all([
+        Item(url="http://example.com/a", weight_grams=100.0, purity=0.925),
+        Item(url="http://example.com/b", weight_grams=50.0, purity=0.999),
+        Item(url="http://example.com/c"),
+    ])
+    db.commit()
+
+    # Act
+    result = tasks.revalue_inventory_task(batch_size=1)
+
+    # Assert
+    assert result == {"updated": 2}
+    items = {item.url: item for item in db.query(Item).all()}
+    roi_a = items["http://example.com/a"].roi_analysis
+    assert roi_a["spot_price_per_ounce"] == 30.0
+    assert math.isclose(roi_a["item_silver_value"], 100.0 * 0.925 * 30.0 * dashboard.GRAMS_TO_TROY_OUNCE)
+    assert items["http://example.com/c"].roi_analysis is None
+    # Without a purchase price, profit and ROI are unknown rather than unbounded.
+    assert roi_a["profit"] is None and roi_a["roi_percent"] is None
+    assert items["http://example.com/a"].roi_percent is None
+    assert items["http://example.com/a"].max_buy_price == roi_a["max_buy_price"]
+    db.close()